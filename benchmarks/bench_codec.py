@@ -0,0 +1,69 @@
+"""
+Encode/decode benchmark of the wire formats.
+
+Compares rencoded dicts, the format PodSixNet peers use, against the binary
+codec of src.core.codec on full state updates (keyframes), typical deltas and
+the small per-input messages.
+
+Run from the repository root:
+    python -m benchmarks.bench_codec
+"""
+import random
+import timeit
+from typing import Any
+
+from PodSixNet.rencode import loads
+
+from src.core.codec import encode_frame, decode_frame
+from src.core.enum import MoveDirection
+from src.core.network import encode_message, TERMINATOR
+
+
+def entities(count: int, rng: random.Random) -> list[dict[str, Any]]:
+    return [
+        {'id': entity_id, 'x': rng.randrange(40), 'y': rng.randrange(30), 'direction': rng.choice(list(MoveDirection)).name}
+        for entity_id in range(count)
+    ]
+
+
+def state_update(players: int, deer: int, rng: random.Random, baseline: int = -1) -> dict[str, Any]:
+    return {'action': 'state_update', 'message': {
+        'sequence': 1000, 'baseline': baseline,
+        'players': entities(players, rng), 'deer': entities(deer, rng),
+        'removed_players': [], 'removed_deer': [],
+        'time_left': 42.5,
+    }}
+
+
+def decode_rencoded(outgoing: bytes) -> Any:
+    return loads(outgoing[:-len(TERMINATOR)])
+
+
+def decode_binary(outgoing: bytes) -> Any:
+    return decode_frame(bytearray(outgoing), 0)[0]
+
+
+def main() -> None:
+    rng = random.Random(0)
+    cases = [
+        ('keyframe 4p/10d', state_update(4, 10, rng)),
+        ('delta 4p/3d', state_update(4, 3, rng, baseline=999)),
+        ('keyframe 64p/1000d', state_update(64, 1000, rng)),
+        ('keyframe 64p/10000d', state_update(64, 10_000, rng)),
+        ('move', {'action': 'move', 'move_direction': 'LEFT'}),
+        ('ack', {'action': 'ack', 'sequence': 1000}),
+    ]
+
+    print(f'{"message":<22}{"dict B":>9}{"binary B":>10}{"dict us":>10}{"binary us":>11}{"speedup":>9}')
+    for name, message in cases:
+        rencoded, binary = encode_message(message), encode_frame(message)
+        assert decode_binary(binary) == decode_rencoded(rencoded)
+
+        number = max(1, 20_000 // (1 + len(rencoded) // 100))
+        dict_time = min(timeit.repeat(lambda: decode_rencoded(encode_message(message)), number=number, repeat=3)) / number
+        binary_time = min(timeit.repeat(lambda: decode_binary(encode_frame(message)), number=number, repeat=3)) / number
+        print(f'{name:<22}{len(rencoded):>9}{len(binary):>10}{dict_time * 1e6:>10.1f}{binary_time * 1e6:>11.1f}{dict_time / binary_time:>8.1f}x')
+
+
+if __name__ == '__main__':
+    main()
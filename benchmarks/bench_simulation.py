@@ -0,0 +1,88 @@
+"""
+Scenario benchmark of the server simulation.
+
+Steps HeadlessSimulation rooms without networking and reports ticks per second,
+the transient memory allocated per tick (tracemalloc peak above the baseline)
+and generation-0 garbage collections per tick, an indicator of object churn.
+
+Scenarios sweep the number of players, the number of deer (object and
+vectorized deer), all levels and the grid size up to a 2000x2000 map.
+
+Run from the repository root:
+    python -m benchmarks.bench_simulation [--ticks N] [--suite players|deer|levels|grid]
+"""
+import argparse
+import gc
+import time
+import tracemalloc
+
+from src.core.config import GameServerConfig
+from src.core.level import max_level
+from src.server.headless import HeadlessSimulation
+
+WARMUP_TICKS = 5
+ALLOCATION_TICKS = 5
+
+
+def measure(ticks: int, **scenario) -> tuple[float, float, float]:
+    """
+    Postcondition:
+        - Returns ticks per second, KiB allocated per tick and gen-0 collections per tick of the scenario
+    """
+    simulation = HeadlessSimulation(seed=0, **scenario)
+    simulation.step(WARMUP_TICKS)
+
+    collections = gc.get_stats()[0]['collections']
+    start = time.perf_counter()
+    simulation.step(ticks)
+    ticks_per_second = ticks / (time.perf_counter() - start)
+    collections_per_tick = (gc.get_stats()[0]['collections'] - collections) / ticks
+
+    tracemalloc.start()
+    allocated = 0
+    for _ in range(ALLOCATION_TICKS):
+        current, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        simulation.step()
+        allocated += tracemalloc.get_traced_memory()[1] - current
+    tracemalloc.stop()
+    return ticks_per_second, allocated / ALLOCATION_TICKS / 1024, collections_per_tick
+
+
+def report(name: str, ticks: int, **scenario) -> None:
+    ticks_per_second, kib_per_tick, collections_per_tick = measure(ticks, **scenario)
+    print(f'{name:<42}{ticks_per_second:>12.1f}{kib_per_tick:>14.1f}{collections_per_tick:>12.2f}')
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Headless simulation benchmarks')
+    parser.add_argument('--ticks', type=int, default=50, help='measured ticks per scenario (default: 50)')
+    parser.add_argument('--suite', choices=('players', 'deer', 'levels', 'grid'), action='append',
+                        help='run only this suite, may be repeated (default: all)')
+    args = parser.parse_args()
+    suites = args.suite or ['players', 'deer', 'levels', 'grid']
+
+    print(f'{"scenario":<42}{"ticks/s":>12}{"KiB/tick":>14}{"gc0/tick":>12}')
+    if 'players' in suites:
+        for player_count in (1, 4, 16, 64):
+            report(f'level 9, {player_count} players, 10 deer', args.ticks, level=9, player_count=player_count, deer_count=10)
+    if 'deer' in suites:
+        # Waves are cut short at the free tiles of the map, about 900 on level 9; the grid suite goes beyond
+        for deer_count in (10, 100, 1000):
+            for vectorized_deer in (False, True):
+                report(f'level 9, 4 players, {deer_count} {"herd" if vectorized_deer else "object"} deer', args.ticks,
+                       level=9, player_count=4, deer_count=deer_count, vectorized_deer=vectorized_deer)
+    if 'levels' in suites:
+        for level in range(GameServerConfig.MIN_LEVEL, max_level() + 1):
+            report(f'level {level}, 4 players, 10 deer', args.ticks, level=level, player_count=4, deer_count=10)
+    if 'grid' in suites:
+        # The level fills the top left corner, the rest of the map is open ground
+        for width, height in ((200, 200), (2000, 2000)):
+            for vectorized_deer in (False, True):
+                ticks = args.ticks if vectorized_deer else max(args.ticks // 10, 1)
+                report(f'{width}x{height}, 4 players, 10000 {"herd" if vectorized_deer else "object"} deer', ticks,
+                       level=9, player_count=4, deer_count=10_000, vectorized_deer=vectorized_deer, grid_size=(width, height))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,106 @@
+"""
+Micro-benchmark of the Position/Direction value types.
+
+Compares the slotted, interned types of src.core.type against the previous
+property-based implementation on the operations of the server hot loops.
+
+Run from the repository root:
+    python -m benchmarks.bench_type
+"""
+import sys
+import timeit
+
+from src.core.enum import MoveDirection
+from src.core.type import Position, Direction, UNIT_DIRECTIONS
+
+
+class LegacyDirection:
+    def __init__(self, x: int, y: int) -> None:
+        self._x = x
+        self._y = y
+
+    @property
+    def x(self) -> int:
+        return self._x
+
+    @property
+    def y(self) -> int:
+        return self._y
+
+    def distance(self) -> int:
+        return abs(self.x) + abs(self.y)
+
+
+class LegacyPosition:
+    def __init__(self, x: int, y: int) -> None:
+        self._x = x
+        self._y = y
+
+    @property
+    def x(self) -> int:
+        return self._x
+
+    @property
+    def y(self) -> int:
+        return self._y
+
+    def __add__(self, direction: 'LegacyDirection') -> 'LegacyPosition':
+        assert isinstance(direction, LegacyDirection), f"Can only add Direction, got {type(direction).__name__}"
+        return LegacyPosition(self.x + direction.x, self.y + direction.y)
+
+    def __sub__(self, position: 'LegacyPosition') -> 'LegacyDirection':
+        assert isinstance(position, LegacyPosition), f"Can only subtract by Position, got {type(position).__name__}"
+        return LegacyDirection(self.x - position.x, self.y - position.y)
+
+    def __eq__(self, position: 'LegacyPosition') -> bool:
+        assert isinstance(position, LegacyPosition), f"Can only compare Position, got {type(position).__name__}"
+        return self.x == position.x and self.y == position.y
+
+
+def legacy_step(position: LegacyPosition, others: list[LegacyPosition]) -> int:
+    """A candidate move followed by collision and nearest-player checks, as in Deer.update"""
+    new_position = position + LegacyDirection(0, -1)
+    nearest = 1_000
+    for other in others:
+        if new_position == other:
+            return 0
+        nearest = min(nearest, (new_position - other).distance())
+    return nearest
+
+
+def current_step(position: Position, others: list[Position]) -> int:
+    """The same work with cached unit directions, interned positions and distance_to"""
+    new_position = position + UNIT_DIRECTIONS[MoveDirection.UP]
+    nearest = 1_000
+    for other in others:
+        if new_position == other:
+            return 0
+        nearest = min(nearest, new_position.distance_to(other))
+    return nearest
+
+
+def size_of(instance: object) -> int:
+    size = sys.getsizeof(instance)
+    if hasattr(instance, '__dict__'):
+        size += sys.getsizeof(instance.__dict__)
+    return size
+
+
+def main() -> None:
+    number = 200_000
+    coordinates = [(20, 5), (3, 17), (31, 28), (8, 2)]
+    legacy_position, legacy_others = LegacyPosition(10, 10), [LegacyPosition(x, y) for x, y in coordinates]
+    position, others = Position.at(10, 10), [Position.at(x, y) for x, y in coordinates]
+
+    legacy = min(timeit.repeat(lambda: legacy_step(legacy_position, legacy_others), number=number, repeat=3))
+    current = min(timeit.repeat(lambda: current_step(position, others), number=number, repeat=3))
+
+    print(f'{"":<10}{"us/step":>10}{"bytes/instance":>16}')
+    print(f'{"legacy":<10}{legacy / number * 1e6:>10.3f}{size_of(legacy_position):>16}')
+    print(f'{"current":<10}{current / number * 1e6:>10.3f}{size_of(position):>16}')
+    print(f'speedup: {legacy / current:.2f}x')
+    print(f'interned: {Position.at(3, 4) is Position.at(3, 4)}, hashable: {len({Position(3, 4), Position.at(3, 4), Direction.at(0, 1)})} distinct keys')
+
+
+if __name__ == '__main__':
+    main()
@@ -4,13 +4,14 @@ from abc import ABC, abstractmethod
 
 import pygame
 import validators
-from PodSixNet.Connection import ConnectionListener, connection
 from pygame.event import Event
 from validators import ValidationError
 
 from src.client.game_map import GameMap
 from src.core.config import GameConfig, GameClientConfig
 from src.core.enum import MoveDirection, PlayerColor
+from src.core.level import max_level
+from src.core.network import ClientConnection
 from src.core.type import Position
 from src.ui.button import DefaultButtonConfig, Button
 from src.ui.gamefont import GameFont
@@ -52,16 +53,16 @@ class Player(GameObject):
         """
         super().__init__(position, direction)
 
-    def draw(self, surface, color: PlayerColor) -> None:
+    def draw(self, surface, color: PlayerColor, origin: tuple[int, int] = (0, 0)) -> None:
         """
         Precondition:
             - surface is a valid Pygame surface
             - color is a valid PlayerColor
 
         Postcondition:
-            - Draws the player sprite on the given surface based on direction
+            - Draws the player sprite on the given surface based on direction, relative to the map tile origin
         """
-        pos = (self.position.x * GameClientConfig.TILE_SIZE, self.position.y * GameClientConfig.TILE_SIZE)
+        pos = ((self.position.x - origin[0]) * GameClientConfig.TILE_SIZE, (self.position.y - origin[1]) * GameClientConfig.TILE_SIZE)
         if self._direction == MoveDirection.UP:
             surface.blit(Texture.hunter[color].back, pos)
         if self._direction == MoveDirection.DOWN:
@@ -83,19 +84,19 @@ class Deer(GameObject):
         """
         super().__init__(position, direction)
 
-    def draw(self, surface):
+    def draw(self, surface, origin: tuple[int, int] = (0, 0)):
         """
         Precondition:
             - surface is a valid Pygame surface
 
         Postcondition:
-            - Draws the deer sprite on the given surface at current position
+            - Draws the deer sprite on the given surface at current position, relative to the map tile origin
         """
-        pos = (self.position.x * GameClientConfig.TILE_SIZE, self.position.y * GameClientConfig.TILE_SIZE)
+        pos = ((self.position.x - origin[0]) * GameClientConfig.TILE_SIZE, (self.position.y - origin[1]) * GameClientConfig.TILE_SIZE)
         surface.blit(Texture.deer, pos)
 
 
-class GameClientContext(ConnectionListener):
+class GameClientContext:
     def __init__(self, server_host: tuple[str, int], is_sound_enabled: bool):
         """
         Precondition:
@@ -112,21 +113,32 @@ class GameClientContext(ConnectionListener):
         self.time_left: float = GameClientConfig.GAME_DURATION
         self.server_host: tuple[str, int]
         self.level: int | None = None
+        self.entity_id: int | None = None  # of the local player in the current game
+        self.position: Position | None = None  # of the local player, which the camera follows
+        # Applied state updates by sequence number, as (players, deer) keyed by entity id; the server sends deltas against them
+        self._snapshots: dict[int, tuple[dict[int, tuple], dict[int, tuple]]] = {}
 
         self.is_disconnected = False
         self._is_server_playing_game = False
 
         self.is_sound_enabled = is_sound_enabled
 
-        self.Connect(server_host)
+        self._connection = ClientConnection()
+        self._connection.connect(server_host)
 
     def pump(self):
         """
         Postcondition:
-            - Processes incoming and outgoing network messages
+            - Dispatches the network messages received since the last pump to the Network_* handlers
         """
-        connection.Pump()
-        self.Pump()
+        self._connection.pump(self)
+
+    def Send(self, data):
+        """
+        Postcondition:
+            - Sends data to the server without blocking the game loop
+        """
+        self._connection.send(data)
 
     def send_move(self, move_direction: MoveDirection):
         """
@@ -153,13 +165,13 @@ class GameClientContext(ConnectionListener):
     def send_select_level(self, level: int):
         """
         Precondition:
-            - level is within GameClientConfig.MIN_LEVEL and MAX_LEVEL
+            - level is within GameClientConfig.MIN_LEVEL and max_level()
 
         Postcondition:
             - Sends a select_level request to the server
         """
-        assert GameClientConfig.MIN_LEVEL <= level <= GameClientConfig.MAX_LEVEL
-        connection.Send({
+        assert GameClientConfig.MIN_LEVEL <= level <= max_level()
+        self.Send({
             'action': 'select_level',
             'level': level,
         })
@@ -167,28 +179,53 @@ class GameClientContext(ConnectionListener):
     def Network_game_started(self, data):
         """
         Precondition:
-            - data contains a valid level
+            - data contains a valid level, the width and height of the server's map and the local player's entity id
 
         Postcondition:
-            - Initializes game map and level
+            - Initializes game map and level; the map's viewport is rendered now instead of on every frame
         """
-        self.map = GameMap(level=data['level'])
+        self.map = GameMap(level=data['level'], width=data['width'], height=data['height'])
+        self.map.render()
         self.level = data['level']
+        self.entity_id = data['entity_id']
+        self.position = None
+        self._snapshots.clear()
 
     def Network_state_update(self, data):
         """
         Precondition:
-            - data['message'] contains valid player and deer states
+            - data['message'] contains the player and deer states changed since its baseline snapshot,
+              a baseline of -1 marks a keyframe with all states
 
         Postcondition:
             - Updates the game state with new player, deer positions and time left
-        """
-        print('Here is the state update:', data['message'])
-        self.players = [Player(Position(position['x'], position['y']), MoveDirection.__dict__[position['direction'].upper()]) for position in
-                        data['message']['players']]
-        self.deer = [Deer(Position(position['x'], position['y']), MoveDirection.__dict__[position['direction'].upper()]) for position in
-                     data['message']['deer']]
-        self.time_left = float(data['message']['time_left'])
+            - Acknowledges the snapshot so the server sends later deltas against it
+        """
+        message = data['message']
+        if message['baseline'] == -1:
+            players, deer = {}, {}
+        elif message['baseline'] in self._snapshots:
+            baseline_players, baseline_deer = self._snapshots[message['baseline']]
+            players, deer = dict(baseline_players), dict(baseline_deer)
+        else:
+            return  # Baseline of a previous game, the server falls back to a keyframe
+
+        players.update((state['id'], (state['x'], state['y'], state['direction'])) for state in message['players'])
+        deer.update((state['id'], (state['x'], state['y'], state['direction'])) for state in message['deer'])
+        [players.pop(entity_id, None) for entity_id in message['removed_players']]
+        [deer.pop(entity_id, None) for entity_id in message['removed_deer']]
+
+        # The server only uses acked snapshots as baselines, and never one older than the latest ack
+        self._snapshots = {sequence: snapshot for sequence, snapshot in self._snapshots.items() if sequence >= message['baseline']}
+        self._snapshots[message['sequence']] = (players, deer)
+        self.Send({'action': 'ack', 'sequence': message['sequence']})
+
+        # Sorted by entity id, so every player keeps its color
+        self.players = [Player(Position.at(x, y), MoveDirection.__dict__[direction.upper()]) for _, (x, y, direction) in sorted(players.items())]
+        if self.entity_id in players:
+            self.position = Position.at(*players[self.entity_id][:2])
+        self.deer = [Deer(Position.at(x, y), MoveDirection.__dict__[direction.upper()]) for x, y, direction in deer.values()]
+        self.time_left = float(message['time_left'])
 
     def Network_score(self, data):
         """
@@ -217,7 +254,7 @@ class GameClientContext(ConnectionListener):
             - Logs error and disconnects client
         """
         print('error:', data['error'])
-        connection.Close()
+        self._connection.close()
         self.is_disconnected = True
 
     def Network_moved(self, data):
@@ -249,7 +286,7 @@ class GameClientContext(ConnectionListener):
         Postcondition:
             - Closes the connection
         """
-        connection.Close()
+        self._connection.close()
 
     @property
     def is_server_playing_game(self):
@@ -395,7 +432,7 @@ class Scores:
             - Resets scores for all levels to 0
         """
         self.level_scores = {}  # {level_number: highest_score}
-        for level in range(GameConfig.MIN_LEVEL, GameConfig.MAX_LEVEL + 1, 1):
+        for level in range(GameConfig.MIN_LEVEL, max_level() + 1, 1):
             self.level_scores[f'{level}'] = 0
 
     def load_scores(self):
@@ -429,21 +466,21 @@ class Scores:
     def get(self, level: int) -> int:
         """
         Precondition:
-            - GameClientConfig.MIN_LEVEL <= level <= GameClientConfig.MAX_LEVEL
+            - GameClientConfig.MIN_LEVEL <= level <= max_level()
         Postcondition:
             - Returns high score for the given level
         """
-        assert GameClientConfig.MIN_LEVEL <= level <= GameClientConfig.MAX_LEVEL
+        assert GameClientConfig.MIN_LEVEL <= level <= max_level()
         return self.level_scores[str(level)]
 
     def set_high_score(self, level: int, score: int) -> None:
         """
         Precondition:
-            - GameClientConfig.MIN_LEVEL <= level <= GameClientConfig.MAX_LEVEL
+            - GameClientConfig.MIN_LEVEL <= level <= max_level()
         Postcondition:
             - Sets the new high score if it's higher than the existing one
         """
-        assert GameClientConfig.MIN_LEVEL <= level <= GameClientConfig.MAX_LEVEL
+        assert GameClientConfig.MIN_LEVEL <= level <= max_level()
         self.level_scores[str(level)] = max(score, self.level_scores[str(level)])
 
 
@@ -592,9 +629,10 @@ class HighScoreMenuState(GameState):
         y_start = 140
         line_spacing = 30
 
-        for i, level in enumerate(range(1, 21)):
-            col = 0 if level <= GameClientConfig.MAX_LEVEL // 2 else 1
-            row = i if level <= GameClientConfig.MAX_LEVEL // 2 else i - GameClientConfig.MAX_LEVEL // 2
+        last_level = max_level()
+        for i, level in enumerate(range(GameClientConfig.MIN_LEVEL, last_level + 1)):
+            col = 0 if level <= last_level // 2 else 1
+            row = i if level <= last_level // 2 else i - last_level // 2
             y = y_start + row * line_spacing
             score = self.scores.get(level)
             text = f'Level {level}: {score if score is not None else '-'}'
@@ -773,7 +811,7 @@ class LevelSelectionMenuState(GameState):
         button_height = 40
         start_x = GameClientConfig.WINDOW_WIDTH // 2 - ((columns * button_width) + (columns - 1) * spacing) // 2
         start_y = 180
-        total_levels = 20
+        total_levels = max_level() - GameClientConfig.MIN_LEVEL + 1
 
         button_center_x = GameClientConfig.WINDOW_WIDTH // 2 - DefaultButtonConfig.default_width // 2
         self.back_button = Button(
@@ -927,12 +965,14 @@ class PlayingState(GameState):
         if context.client_context.map is None:
             return
 
-        context.client_context.map.draw(context.screen)
+        # The camera follows the local player; entities are drawn relative to the map's viewport
+        context.client_context.map.draw(context.screen, context.client_context.position)
+        origin = context.client_context.map.origin
 
         colors: list[PlayerColor] = list(PlayerColor)
 
-        [player.draw(context.screen, colors[index]) for index, player in enumerate(context.client_context.players)]
-        [deer.draw(context.screen) for deer in context.client_context.deer]
+        [player.draw(context.screen, colors[index], origin) for index, player in enumerate(context.client_context.players)]
+        [deer.draw(context.screen, origin) for deer in context.client_context.deer]
 
         # Draw UI
         score_text = GameFont.text_font.render(f'High Score: {context.client_context.score}', True, Color.BLACK)
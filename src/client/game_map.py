@@ -1,64 +1,68 @@
+import pygame
+
 from src.core.config import GameClientConfig
 from src.core.enum import Tile
-from src.util.predefined_levels import LEVELS
+from src.core.level import TILE_BY_CODE, compile_level, max_level
+from src.core.type import Position
 from src.util.texture import Texture
 
 
 class GameMap:
-    def __init__(self, level: int) -> None:
+    def __init__(self, level: int, width: int = GameClientConfig.GRID_WIDTH, height: int = GameClientConfig.GRID_HEIGHT) -> None:
         """
         Initialize a game map for a given level.
 
         Precondition:
-            - GameClientConfig.MIN_LEVEL <= level <= GameClientConfig.MAX_LEVEL
+            - GameClientConfig.MIN_LEVEL <= level <= max_level()
+            - the level's layout fits into width x height
 
         Postcondition:
             - self._level is set to the given level
-            - self._grid is populated with tiles from LEVELS[level]
+            - self._compiled holds the level's tiles on a width x height grid, compiled once and shared by all maps of the level
+            - The map is not rendered yet; its viewport starts at the top-left corner
         """
-        assert GameClientConfig.MIN_LEVEL <= level <= GameClientConfig.MAX_LEVEL
+        assert GameClientConfig.MIN_LEVEL <= level <= max_level()
         self._level = level
-        self._grid: list[list[Tile]] = []
-        self._clear()
-        self.load_map_from_file(self._level)
+        self._compiled = compile_level(level, width, height)
+        self._surface: pygame.Surface | None = None
+        self._origin = (0, 0)  # map tile drawn at the top-left corner of the viewport
 
-    def load_map_from_file(self, level: int) -> None:
+    @property
+    def origin(self) -> tuple[int, int]:
         """
-        Load the map layout from a predefined level.
-
-        Precondition:
-            - GameClientConfig.MIN_LEVEL <= level <= GameClientConfig.MAX_LEVEL
+        Postcondition:
+            - Returns the map tile at the top-left corner of the viewport
+        """
+        return self._origin
 
+    def view_origin(self, center: Position) -> tuple[int, int]:
+        """
         Postcondition:
-            - self._grid is filled with tiles according to LEVELS[level]
+            - Returns the top-left tile of the viewport centred on center, moved inside the map where it can be
         """
-        assert GameClientConfig.MIN_LEVEL <= level <= GameClientConfig.MAX_LEVEL
-        layout = LEVELS.get(level, LEVELS[max(LEVELS.keys())])
-        for y, row in enumerate(layout):
-            for x, character in enumerate(row):
-                assert 0 <= x < GameClientConfig.GRID_WIDTH and 0 <= y < GameClientConfig.GRID_HEIGHT
-                match character:
-                    case 'T':
-                        self._grid[x][y] = Tile.TREE
-                    case 'R':
-                        self._grid[x][y] = Tile.ROCK
-                    case 'B':
-                        self._grid[x][y] = Tile.BUSH
-                    case '.':
-                        self._grid[x][y] = Tile.EMPTY
-                    case _:
-                        assert False, "unreachable"
-
-    def _clear(self) -> None:
+        x = max(min(center.x - GameClientConfig.VIEW_WIDTH // 2, self._compiled.width - GameClientConfig.VIEW_WIDTH), 0)
+        y = max(min(center.y - GameClientConfig.VIEW_HEIGHT // 2, self._compiled.height - GameClientConfig.VIEW_HEIGHT), 0)
+        return x, y
+
+    def render(self, origin: tuple[int, int] = (0, 0)):
         """
-        Clear the map to a grid filled with EMPTY tiles.
+        Render the viewport once into a surface of its own; the map does not change during a level.
+
+        Precondition:
+            - the display mode is set and the textures are loaded
 
         Postcondition:
-            - self._grid is a 2D list of Tile.EMPTY with correct dimensions
+            - self._surface holds the texture of every tile in the VIEW_WIDTH x VIEW_HEIGHT viewport from origin,
+              in the display's pixel format; tiles beyond the map are black
         """
-        self._grid = [[Tile.EMPTY for _ in range(GameClientConfig.GRID_HEIGHT)] for _ in range(GameClientConfig.GRID_WIDTH)]
-
-    def draw(self, surface):
+        size = (GameClientConfig.VIEW_WIDTH * GameClientConfig.TILE_SIZE, GameClientConfig.VIEW_HEIGHT * GameClientConfig.TILE_SIZE)
+        self._surface = pygame.Surface(size).convert()
+        self._origin = origin
+        for view_x in range(GameClientConfig.VIEW_WIDTH):
+            for view_y in range(GameClientConfig.VIEW_HEIGHT):
+                self._draw_grid_cell(self._surface, view_x, view_y)
+
+    def draw(self, surface, center: Position | None = None):
         """
         Draw the map grid onto a surface.
 
@@ -66,27 +70,54 @@ class GameMap:
             - surface must be a valid drawing surface (e.g., Pygame surface)
 
         Postcondition:
-            - Each tile's texture is drawn at its correct grid position
+            - The viewport, centred on center if given, is drawn onto surface with a single blit, rendering it
+              first if needed; when the viewport moves, only the tiles that scroll into it are drawn
         """
-        for x in range(GameClientConfig.GRID_WIDTH):
-            for y in range(GameClientConfig.GRID_HEIGHT):
-                self._draw_grid_cell(surface, x, y)
-
-    def _draw_grid_cell(self, surface, x, y):
+        origin = self.view_origin(center) if center is not None else self._origin
+        if self._surface is None:
+            self.render(origin)
+        elif origin != self._origin:
+            self._scroll(origin)
+        surface.blit(self._surface, (0, 0))
+
+    def _scroll(self, origin: tuple[int, int]):
+        """
+        Postcondition:
+            - self._surface holds the viewport from origin; what it shared with the previous one is moved, not redrawn
+        """
+        dx, dy = origin[0] - self._origin[0], origin[1] - self._origin[1]
+        if abs(dx) >= GameClientConfig.VIEW_WIDTH or abs(dy) >= GameClientConfig.VIEW_HEIGHT:
+            self.render(origin)
+            return
+        self._origin = origin
+        self._surface.scroll(-dx * GameClientConfig.TILE_SIZE, -dy * GameClientConfig.TILE_SIZE)
+        columns = range(GameClientConfig.VIEW_WIDTH - dx, GameClientConfig.VIEW_WIDTH) if dx > 0 else range(-dx)
+        rows = range(GameClientConfig.VIEW_HEIGHT - dy, GameClientConfig.VIEW_HEIGHT) if dy > 0 else range(-dy)
+        for view_x in range(GameClientConfig.VIEW_WIDTH):
+            for view_y in range(GameClientConfig.VIEW_HEIGHT):
+                if view_x in columns or view_y in rows:
+                    self._draw_grid_cell(self._surface, view_x, view_y)
+
+    def _draw_grid_cell(self, surface, view_x, view_y):
         """
         Draw a single grid cell (background + object).
 
         Precondition:
-            - 0 <= x < GameClientConfig.GRID_WIDTH
-            - 0 <= y < GameClientConfig.GRID_HEIGHT
+            - 0 <= view_x < VIEW_WIDTH
+            - 0 <= view_y < VIEW_HEIGHT
 
         Postcondition:
-            - Grass texture and optional object texture (tree, rock, bush) is drawn at (x, y)
+            - Grass texture and optional object texture (tree, rock, bush) of the map tile at view_x, view_y
+              in the viewport is drawn there, or black beyond the map
         """
-        pos = (x * GameClientConfig.TILE_SIZE, y * GameClientConfig.TILE_SIZE)
+        pos = (view_x * GameClientConfig.TILE_SIZE, view_y * GameClientConfig.TILE_SIZE)
+        x, y = self._origin[0] + view_x, self._origin[1] + view_y
+        if not (x < self._compiled.width and y < self._compiled.height):
+            surface.fill((0, 0, 0), (*pos, GameClientConfig.TILE_SIZE, GameClientConfig.TILE_SIZE))
+            return
         surface.blit(Texture.grass, pos)
 
-        match self._grid[x][y]:
+        match TILE_BY_CODE[self._compiled.tiles.get(x, y)]:
             case Tile.TREE:
                 surface.blit(Texture.tree, pos)
             case Tile.ROCK:
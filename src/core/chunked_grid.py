@@ -0,0 +1,149 @@
+CHUNK_SHIFT = 6
+CHUNK_SIZE = 1 << CHUNK_SHIFT  # tiles along each side of a chunk
+CHUNK_MASK = CHUNK_SIZE - 1
+CHUNK_AREA = CHUNK_SIZE * CHUNK_SIZE
+
+
+class ChunkedGrid:
+    """
+    Byte per tile grid stored in CHUNK_SIZE x CHUNK_SIZE chunks. A chunk is only allocated once a
+    tile in it is set to something other than the default value, so uniform regions cost nothing.
+    """
+    __slots__ = ('width', 'height', 'default', 'columns', '_chunks', '_default_row')
+
+    def __init__(self, width: int, height: int, default: int = 0) -> None:
+        """
+        Precondition:
+            - width > 0 and height > 0
+            - 0 <= default <= 255
+
+        Postcondition:
+            - Every tile holds default and no chunk is allocated
+        """
+        assert width > 0 and height > 0
+        self.width = width
+        self.height = height
+        self.default = default
+        self.columns = (width + CHUNK_MASK) >> CHUNK_SHIFT
+        self._chunks: list[bytearray | None] = [None] * (self.columns * ((height + CHUNK_MASK) >> CHUNK_SHIFT))
+        self._default_row = bytes([default]) * CHUNK_SIZE
+
+    def __repr__(self) -> str:
+        return f'ChunkedGrid({self.width}x{self.height}, {self.allocated_chunks()}/{len(self._chunks)} chunks)'
+
+    def allocated_chunks(self) -> int:
+        return sum(chunk is not None for chunk in self._chunks)
+
+    def is_default_chunk(self, chunk_x: int, chunk_y: int) -> bool:
+        """
+        Postcondition:
+            - Returns True if the chunk holds no tile other than default; chunks beyond the grid count as default
+        """
+        if not (0 <= chunk_x < self.columns and 0 <= chunk_y < len(self._chunks) // self.columns):
+            return True
+        return self._chunks[chunk_y * self.columns + chunk_x] is None
+
+    def chunk(self, chunk_x: int, chunk_y: int) -> bytes:
+        """
+        Precondition:
+            - the chunk lies within the grid
+
+        Postcondition:
+            - Returns the chunk-local row-major tiles of the chunk (index (y & CHUNK_MASK) << CHUNK_SHIFT | (x & CHUNK_MASK));
+              tiles of an edge chunk beyond the grid hold default
+        """
+        chunk = self._chunks[chunk_y * self.columns + chunk_x]
+        return self._default_row * CHUNK_SIZE if chunk is None else bytes(chunk)
+
+    def get(self, x: int, y: int) -> int:
+        """
+        Precondition:
+            - 0 <= x < width and 0 <= y < height (not checked)
+        """
+        chunk = self._chunks[(y >> CHUNK_SHIFT) * self.columns + (x >> CHUNK_SHIFT)]
+        return self.default if chunk is None else chunk[(y & CHUNK_MASK) << CHUNK_SHIFT | (x & CHUNK_MASK)]
+
+    def set(self, x: int, y: int, value: int) -> None:
+        """
+        Precondition:
+            - 0 <= x < width and 0 <= y < height (not checked)
+        """
+        index = (y >> CHUNK_SHIFT) * self.columns + (x >> CHUNK_SHIFT)
+        chunk = self._chunks[index]
+        if chunk is None:
+            if value == self.default:
+                return
+            chunk = self._chunks[index] = bytearray(self._default_row) * CHUNK_SIZE
+        chunk[(y & CHUNK_MASK) << CHUNK_SHIFT | (x & CHUNK_MASK)] = value
+
+    def set_row(self, y: int, x: int, values: bytes) -> None:
+        """
+        Precondition:
+            - 0 <= y < height and 0 <= x <= x + len(values) <= width
+
+        Postcondition:
+            - The tiles from (x, y) on hold values; chunks are only allocated for non-default values
+        """
+        row_start = (y & CHUNK_MASK) << CHUNK_SHIFT
+        end = x + len(values)
+        while x < end:
+            chunk_end = min(end, (x | CHUNK_MASK) + 1)
+            part = values[:chunk_end - x]
+            values = values[chunk_end - x:]
+            index = (y >> CHUNK_SHIFT) * self.columns + (x >> CHUNK_SHIFT)
+            chunk = self._chunks[index]
+            if chunk is None and part.count(self.default) != len(part):
+                chunk = self._chunks[index] = bytearray(self._default_row) * CHUNK_SIZE
+            if chunk is not None:
+                chunk[row_start + (x & CHUNK_MASK):row_start + (x & CHUNK_MASK) + len(part)] = part
+            x = chunk_end
+
+    def row(self, y: int, start: int, end: int) -> bytes:
+        """
+        Precondition:
+            - 0 <= y < height and 0 <= start <= end <= width
+
+        Postcondition:
+            - Returns the tiles from (start, y) up to (end, y), excluded
+        """
+        parts: list[bytes] = []
+        row_start = (y & CHUNK_MASK) << CHUNK_SHIFT
+        chunk_row = (y >> CHUNK_SHIFT) * self.columns
+        x = start
+        while x < end:
+            chunk_end = min(end, (x | CHUNK_MASK) + 1)
+            chunk = self._chunks[chunk_row + (x >> CHUNK_SHIFT)]
+            if chunk is None:
+                parts.append(self._default_row[:chunk_end - x])
+            else:
+                parts.append(chunk[row_start + (x & CHUNK_MASK):row_start + ((chunk_end - 1) & CHUNK_MASK) + 1])
+            x = chunk_end
+        return b''.join(parts)
+
+    def column(self, x: int, start: int, end: int) -> bytes:
+        """
+        Precondition:
+            - 0 <= x < width and 0 <= start <= end <= height
+
+        Postcondition:
+            - Returns the tiles from (x, start) up to (x, end), excluded
+        """
+        parts: list[bytes] = []
+        y = start
+        while y < end:
+            chunk_end = min(end, (y | CHUNK_MASK) + 1)
+            chunk = self._chunks[(y >> CHUNK_SHIFT) * self.columns + (x >> CHUNK_SHIFT)]
+            if chunk is None:
+                parts.append(self._default_row[:chunk_end - y])
+            else:
+                first = (y & CHUNK_MASK) << CHUNK_SHIFT | (x & CHUNK_MASK)
+                parts.append(chunk[first:first + ((chunk_end - y - 1) << CHUNK_SHIFT) + 1:CHUNK_SIZE])
+            y = chunk_end
+        return b''.join(parts)
+
+    def to_bytes(self) -> bytes:
+        """
+        Postcondition:
+            - Returns all tiles row-major (index y * width + x)
+        """
+        return b''.join(self.row(y, 0, self.width) for y in range(self.height))
@@ -0,0 +1,160 @@
+import struct
+from typing import Any
+
+from PodSixNet.rencode import loads, dumps
+
+from src.core.type import DIRECTION_CODES, MOVE_DIRECTIONS
+
+# Version of the binary wire format; peers agree on it after connecting and fall back
+# to rencoded dicts if they have no version in common
+CODEC_VERSION = 2
+SUPPORTED_CODEC_VERSIONS = (CODEC_VERSION,)
+
+# Every binary frame starts with the payload length and an opcode
+_FRAME_HEADER = struct.Struct('<IB')
+
+_OPCODE_GENERIC = 0  # any other message, as a rencoded dict
+_OPCODE_STATE_UPDATE = 1
+_OPCODE_MOVE = 2
+_OPCODE_TAKE_PICTURE = 3
+_OPCODE_SCORE = 4
+_OPCODE_GAME_STARTED = 5
+_OPCODE_ACK = 6
+
+_STATE_UPDATE_HEADER = struct.Struct('<IiIIIIf')  # sequence, baseline, player, deer, removed player and removed deer counts, time left
+_MOVE = struct.Struct('<B')
+_SCORE = struct.Struct('<i')
+_GAME_STARTED = struct.Struct('<HHHI')  # level, grid width and height, entity id of the receiving player
+_ACK = struct.Struct('<I')
+
+
+def _pack_entities(entities: list[dict[str, Any]]) -> bytes:
+    """
+    Postcondition:
+        - Returns the ids (uint32), x and y coordinates (uint16) and direction codes (uint8)
+          of the entities, each as a packed column
+    """
+    count = len(entities)
+    return b''.join((
+        struct.pack(f'<{count}I', *[entity['id'] for entity in entities]),
+        struct.pack(f'<{count}H', *[entity['x'] for entity in entities]),
+        struct.pack(f'<{count}H', *[entity['y'] for entity in entities]),
+        bytes([DIRECTION_CODES[entity['direction']] for entity in entities]),
+    ))
+
+
+def _unpack_entities(buffer: bytes, offset: int, count: int) -> tuple[list[dict[str, Any]], int]:
+    """
+    Postcondition:
+        - Returns the entities packed by _pack_entities at offset and the offset after them
+    """
+    ids = struct.unpack_from(f'<{count}I', buffer, offset)
+    offset += 4 * count
+    xs = struct.unpack_from(f'<{count}H', buffer, offset)
+    offset += 2 * count
+    ys = struct.unpack_from(f'<{count}H', buffer, offset)
+    offset += 2 * count
+    directions = buffer[offset:offset + count]
+    offset += count
+    entities = [
+        {'id': entity_id, 'x': x, 'y': y, 'direction': MOVE_DIRECTIONS[direction].name}
+        for entity_id, x, y, direction in zip(ids, xs, ys, directions)
+    ]
+    return entities, offset
+
+
+def _encode_payload(data: dict[str, Any]) -> tuple[int, bytes]:
+    """
+    Postcondition:
+        - Returns the opcode and payload of the message, messages without a compact layout are rencoded
+    """
+    action = data.get('action')
+    if action == 'state_update':
+        message = data['message']
+        header = _STATE_UPDATE_HEADER.pack(
+            message['sequence'], message['baseline'], len(message['players']), len(message['deer']),
+            len(message['removed_players']), len(message['removed_deer']), message['time_left'])
+        removed = message['removed_players'] + message['removed_deer']
+        return _OPCODE_STATE_UPDATE, b''.join((
+            header,
+            _pack_entities(message['players']),
+            _pack_entities(message['deer']),
+            struct.pack(f'<{len(removed)}I', *removed),
+        ))
+    if action == 'move':
+        return _OPCODE_MOVE, _MOVE.pack(DIRECTION_CODES[data['move_direction'].upper()])
+    if action == 'take_picture':
+        return _OPCODE_TAKE_PICTURE, b''
+    if action == 'score':
+        return _OPCODE_SCORE, _SCORE.pack(data['score'])
+    if action == 'game_started':
+        return _OPCODE_GAME_STARTED, _GAME_STARTED.pack(data['level'], data['width'], data['height'], data['entity_id'])
+    if action == 'ack':
+        return _OPCODE_ACK, _ACK.pack(data['sequence'])
+    return _OPCODE_GENERIC, dumps(data)
+
+
+def _decode_payload(opcode: int, payload: bytes) -> Any:
+    """
+    Postcondition:
+        - Returns the message encoded by _encode_payload
+    """
+    if opcode == _OPCODE_STATE_UPDATE:
+        sequence, baseline, player_count, deer_count, removed_player_count, removed_deer_count, time_left \
+            = _STATE_UPDATE_HEADER.unpack_from(payload, 0)
+        players, offset = _unpack_entities(payload, _STATE_UPDATE_HEADER.size, player_count)
+        deer, offset = _unpack_entities(payload, offset, deer_count)
+        removed = struct.unpack_from(f'<{removed_player_count + removed_deer_count}I', payload, offset)
+        return {'action': 'state_update', 'message': {
+            'sequence': sequence,
+            'baseline': baseline,
+            'players': players,
+            'deer': deer,
+            'removed_players': list(removed[:removed_player_count]),
+            'removed_deer': list(removed[removed_player_count:]),
+            'time_left': time_left,
+        }}
+    if opcode == _OPCODE_MOVE:
+        return {'action': 'move', 'move_direction': MOVE_DIRECTIONS[_MOVE.unpack(payload)[0]].name}
+    if opcode == _OPCODE_TAKE_PICTURE:
+        return {'action': 'take_picture'}
+    if opcode == _OPCODE_SCORE:
+        return {'action': 'score', 'score': _SCORE.unpack(payload)[0]}
+    if opcode == _OPCODE_GAME_STARTED:
+        level, width, height, entity_id = _GAME_STARTED.unpack(payload)
+        return {'action': 'game_started', 'level': level, 'width': width, 'height': height, 'entity_id': entity_id}
+    if opcode == _OPCODE_ACK:
+        return {'action': 'ack', 'sequence': _ACK.unpack(payload)[0]}
+    return loads(bytes(payload))
+
+
+def encode_frame(data: dict[str, Any], version: int = CODEC_VERSION) -> bytes:
+    """
+    Precondition:
+        - version in SUPPORTED_CODEC_VERSIONS
+
+    Postcondition:
+        - Returns data as a length-prefixed binary frame
+    """
+    assert version in SUPPORTED_CODEC_VERSIONS
+    opcode, payload = _encode_payload(data)
+    return _FRAME_HEADER.pack(len(payload), opcode) + payload
+
+
+def decode_frame(buffer: bytearray, offset: int, version: int = CODEC_VERSION) -> tuple[Any, int] | None:
+    """
+    Precondition:
+        - version in SUPPORTED_CODEC_VERSIONS
+
+    Postcondition:
+        - Returns the message of the frame starting at offset and the offset after the frame,
+          or None if the frame has not been received completely yet
+    """
+    assert version in SUPPORTED_CODEC_VERSIONS
+    if len(buffer) - offset < _FRAME_HEADER.size:
+        return None
+    length, opcode = _FRAME_HEADER.unpack_from(buffer, offset)
+    start = offset + _FRAME_HEADER.size
+    if len(buffer) - start < length:
+        return None
+    return _decode_payload(opcode, bytes(buffer[start:start + length])), start + length
@@ -1,11 +1,17 @@
+import os
+
+
 class GameConfig:
-    MIN_LEVEL = 1
-    MAX_LEVEL = 20
+    MIN_LEVEL = 1  # the highest level is the last one of the level pack, see level.max_level
 
     TILE_SIZE = 30  # in pixel
     GRID_WIDTH, GRID_HEIGHT = 40, 30
     WINDOW_WIDTH, WINDOW_HEIGHT = (GRID_WIDTH * TILE_SIZE, GRID_HEIGHT * TILE_SIZE)
 
+    # Half width and height of the view rectangle around each player; state updates only carry the
+    # entities inside it and the client's camera shows it. None sends every player the whole map.
+    INTEREST_AREA: tuple[int, int] | None = None
+
     FRAME_RATE = 10
 
     DEER_COUNT = 10
@@ -13,18 +19,86 @@ class GameConfig:
 
     GAME_DURATION = 60  # in seconds
 
+    # Built from src/util/predefined_levels.py by python -m src.core.level_pack; found next to the package, whatever the working directory
+    LEVEL_PACK_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), 'assets', 'levels.pack')
+
 
 class GameServerConfig(GameConfig):
-    def __init__(self) -> None:
-        self._host: tuple[str, int] = ("0.0.0.0", 12345)
+    VECTORIZED_DEER = False  # simulate deer with the NumPy DeerHerd instead of one Deer object each
+    FLOW_FIELD_RANGE = 32  # steps from the players the flee flow field covers; fleeing deer farther away step straight away from the nearest player
+
+    MAX_PLAYERS_PER_ROOM = 4  # one per PlayerColor
+    MAX_ROOMS = 64
+    # Token buckets of (messages per second, burst) per client action; an honest client sends a move per
+    # frame at up to 60 fps while a key is held. Other actions share RATE_LIMIT_DEFAULT.
+    RATE_LIMITS: dict[str, tuple[float, int]] = {
+        'move': (60, 60),
+        'take_picture': (10, 10),
+        'ack': (20, 20),
+        'select_level': (2, 5),
+    }
+    RATE_LIMIT_DEFAULT: tuple[float, int] = (10, 20)
+    RATE_LIMIT_STRIKES: tuple[float, int] = (10, 100)  # dropped messages tolerated before a channel is disconnected
+    MAX_CATCH_UP_STEPS = 5  # ticks run back to back after a stall, older ones are dropped
+    PROFILE_TICKS = False  # time the phases of every tick from the start, SIGUSR1 toggles it at runtime
+
+    LOAD_REPORT_INTERVAL = 5  # in seconds, how often the supervisor prints the load of its workers
+    WORKER_RESTART_BACKOFF: tuple[float, float] = (0.5, 30.0)  # in seconds, first and largest delay before a dead worker restarts
+
+    def __init__(self, host: tuple[str, int] = ("0.0.0.0", 12345), worker_count: int = 0, metrics_address: int | str | None = None,
+                 input_log_path: str | None = None,
+                 grid_size: tuple[int, int] = (GameConfig.GRID_WIDTH, GameConfig.GRID_HEIGHT)) -> None:
+        self._host: tuple[str, int] = host
+        self._worker_count = worker_count
+        self._metrics_address = metrics_address
+        self._input_log_path = input_log_path
+        self._grid_size = grid_size
 
     @property
     def host(self) -> tuple[str, int]:
         return self._host
 
+    @property
+    def worker_count(self) -> int:
+        """
+        Postcondition:
+            - Returns the number of worker processes, 0 runs all matches in a single process
+        """
+        return self._worker_count
+
+    @property
+    def metrics_address(self) -> int | str | None:
+        """
+        Postcondition:
+            - Returns the loopback port or Unix socket path metrics are served on, None serves no metrics
+        """
+        return self._metrics_address
+
+    @property
+    def input_log_path(self) -> str | None:
+        """
+        Postcondition:
+            - Returns the file every match is recorded to for replays, None records nothing
+        """
+        return self._input_log_path
+
+    @property
+    def grid_size(self) -> tuple[int, int]:
+        """
+        Postcondition:
+            - Returns the width and height in tiles of the maps the rooms play on
+        """
+        return self._grid_size
+
 
 class GameClientConfig(GameConfig):
     SCORE_FILE = 'level_scores.json'
 
+    # Tiles the camera shows around the local player: the interest area, or the default grid without one.
+    # The window fits the view, so it keeps its size on maps of any size
+    VIEW_WIDTH, VIEW_HEIGHT = (GameConfig.GRID_WIDTH, GameConfig.GRID_HEIGHT) if GameConfig.INTEREST_AREA is None \
+        else (2 * GameConfig.INTEREST_AREA[0] + 1, 2 * GameConfig.INTEREST_AREA[1] + 1)
+    WINDOW_WIDTH, WINDOW_HEIGHT = (VIEW_WIDTH * GameConfig.TILE_SIZE, VIEW_HEIGHT * GameConfig.TILE_SIZE)
+
     def __init__(self):
         pass
@@ -10,19 +10,6 @@ class ClientEvent:
         self._move_direction = move_direction
         self._take_picture = take_picture
 
-    @classmethod
-    def remove_duplicate_client_events(cls, events: list['ClientEvent']) -> None:
-        seen: set[UUID] = set()
-        result = []
-        for event in events:
-            player = event.player_id
-            if player not in seen:
-                seen.add(player)
-                result.append(event)
-
-        events.clear()
-        events.extend(result)
-
     @property
     def move_direction(self) -> MoveDirection | None:
         return self._move_direction
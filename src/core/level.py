@@ -0,0 +1,195 @@
+from src.core.chunked_grid import CHUNK_AREA, CHUNK_MASK, CHUNK_SHIFT, CHUNK_SIZE, ChunkedGrid
+from src.core.config import GameConfig
+from src.core.enum import MoveDirection, Tile
+from src.core.level_pack import LevelPack
+from src.core.type import UNIT_DIRECTIONS
+
+TILE_BY_CODE: dict[int, Tile] = {ord(tile.value): tile for tile in Tile}
+EMPTY_CODE = ord(Tile.EMPTY.value)
+MAX_CLEAR_RUN = CHUNK_SIZE  # line-of-sight ray lengths are capped, so a chunk's rays only reach into its neighbour
+_MAP_TILES = frozenset(ord(tile.value) for tile in [Tile.EMPTY, Tile.TREE, Tile.ROCK, Tile.BUSH])
+_WALKABLE_BY_CODE = bytes(code not in {ord(tile.value) for tile in [Tile.TREE, Tile.ROCK]} for code in range(256))
+_OPAQUE_BY_CODE = bytes(code in {ord(tile.value) for tile in [Tile.TREE, Tile.ROCK, Tile.BUSH]} for code in range(256))
+_FULL_CLEAR_RUNS = bytes([MAX_CLEAR_RUN]) * CHUNK_AREA  # rays of a chunk without any obstacle or edge in reach
+
+
+class CompiledLevel:
+    __slots__ = ('level', 'width', 'height', 'tiles', 'walkable', 'opaque', '_clear_runs')
+
+    def __init__(self, level: int, layout: list[str], width: int = GameConfig.GRID_WIDTH, height: int = GameConfig.GRID_HEIGHT) -> None:
+        """
+        Precondition:
+            - layout has at most height rows of at most width EMPTY, TREE, ROCK or BUSH characters
+
+        Postcondition:
+            - Chunked tables of the tile codes and of the walkable and opaque masks of the level,
+              which must not be modified; tiles beyond the layout are EMPTY and take no memory
+            - Line-of-sight ray lengths are computed per chunk when first asked for
+        """
+        assert len(layout) <= height
+        self.level = level
+        self.width = width
+        self.height = height
+        self.tiles = ChunkedGrid(width, height, EMPTY_CODE)
+        self.walkable = ChunkedGrid(width, height, 1)
+        self.opaque = ChunkedGrid(width, height, 0)
+        for y, row in enumerate(layout):
+            assert len(row) <= width
+            encoded_row = row.encode('ascii')
+            assert all(code in _MAP_TILES for code in encoded_row), "unreachable"
+            self.tiles.set_row(y, 0, encoded_row)
+            self.walkable.set_row(y, 0, encoded_row.translate(_WALKABLE_BY_CODE))
+            self.opaque.set_row(y, 0, encoded_row.translate(_OPAQUE_BY_CODE))
+        chunk_count = self.opaque.columns * ((height + CHUNK_MASK) >> CHUNK_SHIFT)
+        self._clear_runs: dict[MoveDirection, list[bytes | None]] = {move_direction: [None] * chunk_count for move_direction in MoveDirection}
+
+    def __repr__(self) -> str:
+        return f'CompiledLevel({self.level}, {self.width}x{self.height})'
+
+    def clear_run(self, x: int, y: int, move_direction: MoveDirection) -> int:
+        """
+        Precondition:
+            - 0 <= x < width and 0 <= y < height (not checked)
+
+        Postcondition:
+            - Returns how many consecutive tiles in move_direction from (x, y) are see-through before
+              the next TREE, ROCK, BUSH or the map edge, up to MAX_CLEAR_RUN
+        """
+        chunks = self._clear_runs[move_direction]
+        index = (y >> CHUNK_SHIFT) * self.opaque.columns + (x >> CHUNK_SHIFT)
+        runs = chunks[index]
+        if runs is None:
+            runs = chunks[index] = self._compute_clear_runs(x >> CHUNK_SHIFT, y >> CHUNK_SHIFT, move_direction)
+        return runs[(y & CHUNK_MASK) << CHUNK_SHIFT | (x & CHUNK_MASK)]
+
+    def clear_run_chunk(self, chunk_x: int, chunk_y: int, move_direction: MoveDirection) -> bytes:
+        """
+        Precondition:
+            - the chunk lies within the map
+
+        Postcondition:
+            - Returns clear_run in move_direction for every tile of the chunk, chunk-local row-major
+              (index (y & CHUNK_MASK) << CHUNK_SHIFT | (x & CHUNK_MASK))
+        """
+        chunks = self._clear_runs[move_direction]
+        index = chunk_y * self.opaque.columns + chunk_x
+        runs = chunks[index]
+        if runs is None:
+            runs = chunks[index] = self._compute_clear_runs(chunk_x, chunk_y, move_direction)
+        return runs
+
+    def _compute_clear_runs(self, chunk_x: int, chunk_y: int, move_direction: MoveDirection) -> bytes:
+        """
+        Postcondition:
+            - Returns the chunk-local row-major table of the capped ray lengths of every tile of the chunk
+        """
+        dx, dy = UNIT_DIRECTIONS[move_direction].x, UNIT_DIRECTIONS[move_direction].y
+        x0, y0 = chunk_x << CHUNK_SHIFT, chunk_y << CHUNK_SHIFT
+        x1, y1 = min(x0 + CHUNK_SIZE, self.width), min(y0 + CHUNK_SIZE, self.height)
+
+        # A capped ray from the chunk reaches at most into the neighbouring chunk; without obstacles
+        # in either, only the map edge can stop it
+        if self.opaque.is_default_chunk(chunk_x, chunk_y) and self.opaque.is_default_chunk(chunk_x + dx, chunk_y + dy):
+            far_x = x0 if dx == 0 else (x1 - 1 + MAX_CLEAR_RUN if dx > 0 else x0 - MAX_CLEAR_RUN)
+            far_y = y0 if dy == 0 else (y1 - 1 + MAX_CLEAR_RUN if dy > 0 else y0 - MAX_CLEAR_RUN)
+            if 0 <= far_x < self.width and 0 <= far_y < self.height:
+                return _FULL_CLEAR_RUNS
+            if dx != 0:
+                return bytes(min(max(self.width - 1 - x if dx > 0 else x, 0), MAX_CLEAR_RUN) for x in range(x0, x0 + CHUNK_SIZE)) * CHUNK_SIZE
+            return b''.join(bytes([min(max(self.height - 1 - y if dy > 0 else y, 0), MAX_CLEAR_RUN)]) * CHUNK_SIZE for y in range(y0, y0 + CHUNK_SIZE))
+
+        runs = bytearray(CHUNK_AREA)
+        for along in range(x0, x1) if dx == 0 else range(y0, y1):
+            # Opaque mask of the tiles in ray order, from the chunk's first tile to the farthest reachable one
+            if dx > 0:
+                end = min(x1 + MAX_CLEAR_RUN, self.width)
+                line, reaches_edge = self.opaque.row(along, x0, end), end == self.width
+            elif dx < 0:
+                start = max(x0 - MAX_CLEAR_RUN, 0)
+                line, reaches_edge = self.opaque.row(along, start, x1)[::-1], start == 0
+            elif dy > 0:
+                end = min(y1 + MAX_CLEAR_RUN, self.height)
+                line, reaches_edge = self.opaque.column(along, y0, end), end == self.height
+            else:
+                start = max(y0 - MAX_CLEAR_RUN, 0)
+                line, reaches_edge = self.opaque.column(along, start, y1)[::-1], start == 0
+
+            # Sweep against the ray direction so the next tile's run is always known already
+            line_runs = [0] * len(line)
+            run = line_runs[-1] = 0 if reaches_edge else MAX_CLEAR_RUN
+            for i in range(len(line) - 2, -1, -1):
+                run = line_runs[i] = 0 if line[i + 1] else min(run + 1, MAX_CLEAR_RUN)
+
+            if dx != 0:
+                for i in range(x1 - x0):
+                    runs[(along - y0) << CHUNK_SHIFT | (i if dx > 0 else x1 - 1 - i - x0)] = line_runs[i]
+            else:
+                for i in range(y1 - y0):
+                    runs[(i if dy > 0 else y1 - 1 - i - y0) << CHUNK_SHIFT | (along - x0)] = line_runs[i]
+        return bytes(runs)
+
+
+_compiled_levels: dict[tuple[int, int, int], CompiledLevel] = {}
+_level_pack: LevelPack | None = None
+_is_level_pack_missing = False
+
+
+def _open_level_pack() -> LevelPack | None:
+    """
+    Postcondition:
+        - Returns the level pack at GameConfig.LEVEL_PACK_PATH, opened on first use, or None if no pack
+          was built; a missing pack is reported once
+    """
+    global _level_pack, _is_level_pack_missing
+    if _level_pack is None and not _is_level_pack_missing:
+        try:
+            _level_pack = LevelPack(GameConfig.LEVEL_PACK_PATH)
+        except FileNotFoundError:
+            _is_level_pack_missing = True
+            print(f'No level pack at {GameConfig.LEVEL_PACK_PATH}, falling back to the predefined levels '
+                  f'(build it with python -m src.core.level_pack)')
+    return _level_pack
+
+
+def max_level() -> int:
+    """
+    Postcondition:
+        - Returns the highest level defined by the level pack, or by LEVELS if no pack was built
+    """
+    level_pack = _open_level_pack()
+    if level_pack is None:
+        from src.util.predefined_levels import LEVELS
+
+        return max(LEVELS.keys())
+    return level_pack.levels()[-1]
+
+
+def _load_layout(level: int) -> list[str]:
+    """
+    Postcondition:
+        - Returns the layout of the level from the level pack, or from LEVELS if no pack was built;
+          a level without a layout gets the one of the highest defined level
+    """
+    level_pack = _open_level_pack()
+    if level_pack is None:
+        from src.util.predefined_levels import LEVELS
+
+        return LEVELS.get(level, LEVELS[max(LEVELS.keys())])
+    return level_pack.layout(level if level in level_pack else level_pack.levels()[-1])
+
+
+def compile_level(level: int, width: int = GameConfig.GRID_WIDTH, height: int = GameConfig.GRID_HEIGHT) -> CompiledLevel:
+    """
+    Precondition:
+        - GameConfig.MIN_LEVEL <= level <= max_level()
+        - the level's layout fits into width x height
+
+    Postcondition:
+        - Returns the level compiled on a width x height grid, decoding its layout only the first time it is requested
+    """
+    assert GameConfig.MIN_LEVEL <= level <= max_level()
+    key = (level, width, height)
+    compiled = _compiled_levels.get(key)
+    if compiled is None:
+        compiled = _compiled_levels[key] = CompiledLevel(level, _load_layout(level), width, height)
+    return compiled
@@ -0,0 +1,131 @@
+"""
+Binary level pack: every level as rows of 2-bit tile codes, behind an index by level id.
+
+Layout (little-endian):
+    header  magic b'DPLP', version (uint8), level count (uint32)
+    index   per level: level id (uint32), width (uint16), height (uint16), offset of its rows in the pack (uint32)
+    rows    per level: height rows of ceil(width / 4) bytes, four tiles per byte, the first in the lowest bits
+
+Build the pack from LEVELS, from the repository root:
+    python -m src.core.level_pack [--output PATH]
+"""
+import argparse
+import mmap
+import struct
+
+from src.core.config import GameConfig
+from src.core.enum import Tile
+
+LEVEL_PACK_VERSION = 1
+_MAGIC = b'DPLP'
+_HEADER = struct.Struct('<4sBI')
+_INDEX_ENTRY = struct.Struct('<IHHI')
+
+_TILES_PER_BYTE = 4
+_PACKED_TILES: list[Tile] = [Tile.EMPTY, Tile.TREE, Tile.ROCK, Tile.BUSH]  # tile of each 2-bit code
+_TILE_CODES: dict[str, int] = {tile.value: code for code, tile in enumerate(_PACKED_TILES)}
+# The tile characters of every possible byte, so a row decodes with one lookup per four tiles
+_UNPACKED_BYTES: list[bytes] = [
+    ''.join(_PACKED_TILES[(byte >> (2 * i)) & 0b11].value for i in range(_TILES_PER_BYTE)).encode('ascii') for byte in range(256)
+]
+
+
+def _row_size(width: int) -> int:
+    return (width + _TILES_PER_BYTE - 1) // _TILES_PER_BYTE
+
+
+def _pack_row(row: str, width: int) -> bytes:
+    """
+    Postcondition:
+        - Returns the row padded with EMPTY tiles to width, four tiles per byte
+    """
+    codes = [_TILE_CODES[character] for character in row.ljust(width, Tile.EMPTY.value)]
+    codes.extend([0] * (-len(codes) % _TILES_PER_BYTE))
+    return bytes(
+        codes[i] | codes[i + 1] << 2 | codes[i + 2] << 4 | codes[i + 3] << 6 for i in range(0, len(codes), _TILES_PER_BYTE)
+    )
+
+
+def write_level_pack(path: str, levels: dict[int, list[str]]) -> None:
+    """
+    Precondition:
+        - every layout consists of rows of EMPTY, TREE, ROCK or BUSH characters
+
+    Postcondition:
+        - The levels are written to a level pack at path; each is as wide as its longest row
+    """
+    sizes = {level: (max((len(row) for row in layout), default=0), len(layout)) for level, layout in levels.items()}
+    offset = _HEADER.size + _INDEX_ENTRY.size * len(levels)
+    index, rows = [], []
+    for level, layout in sorted(levels.items()):
+        width, height = sizes[level]
+        index.append(_INDEX_ENTRY.pack(level, width, height, offset))
+        rows.extend(_pack_row(row, width) for row in layout)
+        offset += _row_size(width) * height
+
+    with open(path, 'wb') as file:
+        file.write(_HEADER.pack(_MAGIC, LEVEL_PACK_VERSION, len(levels)))
+        file.writelines(index)
+        file.writelines(rows)
+
+
+class LevelPack:
+    def __init__(self, path: str) -> None:
+        """
+        Precondition:
+            - path is a level pack written by write_level_pack
+
+        Postcondition:
+            - The pack is memory-mapped and its index read; no level is decoded yet
+        """
+        with open(path, 'rb') as file:
+            self._buffer = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, count = _HEADER.unpack_from(self._buffer)
+        if magic != _MAGIC or version != LEVEL_PACK_VERSION:
+            raise ValueError(f'{path} is not a level pack of version {LEVEL_PACK_VERSION}')
+        self._index: dict[int, tuple[int, int, int]] = {}  # level -> width, height, offset
+        for i in range(count):
+            level, width, height, offset = _INDEX_ENTRY.unpack_from(self._buffer, _HEADER.size + i * _INDEX_ENTRY.size)
+            self._index[level] = (width, height, offset)
+
+    def __contains__(self, level: int) -> bool:
+        return level in self._index
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def levels(self) -> list[int]:
+        return sorted(self._index)
+
+    def layout(self, level: int) -> list[str]:
+        """
+        Precondition:
+            - level in self
+
+        Postcondition:
+            - Returns the rows of the level as tile characters, decoded from the mapped pack
+        """
+        width, height, offset = self._index[level]
+        row_size = _row_size(width)
+        return [
+            b''.join(_UNPACKED_BYTES[byte] for byte in self._buffer[start:start + row_size])[:width].decode('ascii')
+            for start in range(offset, offset + row_size * height, row_size)
+        ]
+
+    def close(self) -> None:
+        self._buffer.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Convert the predefined levels into a level pack')
+    parser.add_argument('--output', default=GameConfig.LEVEL_PACK_PATH, help=f'pack to write (default: {GameConfig.LEVEL_PACK_PATH})')
+    args = parser.parse_args()
+
+    from src.util.predefined_levels import LEVELS
+
+    write_level_pack(args.output, LEVELS)
+    print(f'Wrote {len(LEVELS)} levels to {args.output}')
+
+
+if __name__ == '__main__':
+    main()
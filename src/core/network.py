@@ -0,0 +1,283 @@
+import asyncio
+import queue
+import threading
+from typing import Any
+
+from PodSixNet.rencode import loads, dumps
+
+from src.core.codec import SUPPORTED_CODEC_VERSIONS, encode_frame, decode_frame
+
+# Messages are rencoded dicts followed by this terminator, the same framing PodSixNet uses,
+# so asyncio peers and PodSixNet peers can talk to each other. Peers that both support the
+# binary codec switch to its length-prefixed frames after a 'codec' handshake:
+#   server -> client  {'action': 'connected', 'codecs': [...]}
+#   client -> server  {'action': 'codec', 'version': v}, binary frames from here on
+#   server -> client  {'action': 'codec', 'version': v}, binary frames from here on
+TERMINATOR = b'\0---\0'
+
+
+def encode_message(data: dict[str, Any]) -> bytes:
+    return dumps(data) + TERMINATOR
+
+
+def dispatch_message(listener: object, data: Any) -> None:
+    """
+    Postcondition:
+        - Calls listener.Network_<action>(data) and listener.Network(data), where they exist,
+          like PodSixNet does
+    """
+    if isinstance(data, dict) and 'action' in data:
+        [getattr(listener, name)(data) for name in ('Network_' + data['action'], 'Network') if hasattr(listener, name)]
+    else:
+        print("OOB data:", data)
+
+
+class TrafficCounter:
+    def __init__(self) -> None:
+        """
+        Postcondition:
+            - All counts are zero
+        """
+        self.messages_in = 0
+        self.bytes_in = 0
+        self.messages_out = 0
+        self.bytes_out = 0
+
+
+class MessageProtocol(asyncio.Protocol):
+    MAX_OUTBOUND_BUFFER = 1 << 20  # in bytes, a peer that lets more pile up is disconnected
+    MAX_INBOUND_BUFFER = 1 << 20  # in bytes, a peer whose unfinished message grows larger is disconnected
+
+    def __init__(self, traffic: TrafficCounter | None = None) -> None:
+        """
+        Postcondition:
+            - Protocol is not yet connected
+            - Messages and bytes are counted in traffic, which may be shared by many protocols
+        """
+        self.traffic = traffic if traffic is not None else TrafficCounter()
+        self._transport: asyncio.Transport | None = None
+        self._incoming = bytearray()
+        self._is_writing_paused = False
+        # Binary codec version used per direction, None while messages are rencoded dicts
+        self._incoming_codec: int | None = None
+        self._outgoing_codec: int | None = None
+
+    def connection_made(self, transport: asyncio.BaseTransport) -> None:
+        self._transport = transport
+
+    def data_received(self, data: bytes) -> None:
+        """
+        Postcondition:
+            - Every complete message received so far is passed to message_received
+        """
+        self.traffic.bytes_in += len(data)
+        self._incoming += data
+        start = 0
+        while True:
+            # A message may switch the codec, so the framing is chosen anew for every message
+            if self._incoming_codec is None:
+                end = self._incoming.find(TERMINATOR, start)
+                if end == -1:
+                    break
+                message = loads(bytes(self._incoming[start:end]))
+                start = end + len(TERMINATOR)
+            else:
+                frame = decode_frame(self._incoming, start, self._incoming_codec)
+                if frame is None:
+                    break
+                message, start = frame
+            self.traffic.messages_in += 1
+            self.message_received(message)
+        del self._incoming[:start]
+        if len(self._incoming) > self.MAX_INBOUND_BUFFER and self._transport is not None:
+            print(f'Disconnecting peer {self._transport.get_extra_info("peername")}: oversized message')
+            self._transport.abort()
+
+    def message_received(self, data: Any) -> None:
+        dispatch_message(self, data)
+
+    def pause_writing(self) -> None:
+        self._is_writing_paused = True
+
+    def resume_writing(self) -> None:
+        self._is_writing_paused = False
+
+    @property
+    def is_congested(self) -> bool:
+        """
+        Postcondition:
+            - Returns True while the peer reads slower than it is sent to
+        """
+        return self._is_writing_paused
+
+    @property
+    def outbound_buffer_size(self) -> int:
+        return 0 if self._transport is None else self._transport.get_write_buffer_size()
+
+    def Send(self, data: dict[str, Any]) -> int:
+        """
+        Postcondition:
+            - data is queued for sending and the number of encoded bytes is returned
+            - A peer whose outbound buffer exceeds MAX_OUTBOUND_BUFFER is disconnected
+        """
+        if self._transport is None or self._transport.is_closing():
+            return 0
+        outgoing = encode_message(data) if self._outgoing_codec is None else encode_frame(data, self._outgoing_codec)
+        self._transport.write(outgoing)
+        self.traffic.messages_out += 1
+        self.traffic.bytes_out += len(outgoing)
+        if self._transport.get_write_buffer_size() > self.MAX_OUTBOUND_BUFFER:
+            print(f'Disconnecting slow peer {self._transport.get_extra_info("peername")}')
+            self._transport.abort()
+        return len(outgoing)
+
+    @property
+    def codec_version(self) -> int | None:
+        """
+        Postcondition:
+            - Returns the binary codec version used to send, None while sending rencoded dicts
+        """
+        return self._outgoing_codec
+
+    def close(self) -> None:
+        """
+        Postcondition:
+            - The connection is closed once all queued data is sent
+        """
+        if self._transport is not None:
+            self._transport.close()
+
+
+class Channel(MessageProtocol):
+    def __init__(self, server: Any = None) -> None:
+        """
+        Postcondition:
+            - Channel of a server-side connection, server.Connected is called once it is established
+            - Traffic is counted in server.traffic if the server has one
+        """
+        super().__init__(getattr(server, 'traffic', None))
+        self.addr: tuple = ()
+        self._server = server
+
+    def connection_made(self, transport: asyncio.BaseTransport) -> None:
+        """
+        Postcondition:
+            - The client is greeted with a 'connected' message and announced to the server
+        """
+        super().connection_made(transport)
+        self.addr = transport.get_extra_info('peername')
+        self.Send({'action': 'connected', 'codecs': list(SUPPORTED_CODEC_VERSIONS)})
+        if hasattr(self._server, 'Connected'):
+            self._server.Connected(self, self.addr)
+
+    def message_received(self, data: Any) -> None:
+        """
+        Postcondition:
+            - A codec request is answered and both directions switch to the codec, other messages are dispatched
+        """
+        if isinstance(data, dict) and data.get('action') == 'codec':
+            if data.get('version') in SUPPORTED_CODEC_VERSIONS:
+                self._incoming_codec = data['version']
+                self.Send(data)
+                self._outgoing_codec = data['version']
+            return
+        dispatch_message(self, data)
+
+    def connection_lost(self, exc: Exception | None) -> None:
+        if hasattr(self, 'Close'):
+            self.Close()
+
+    def __repr__(self) -> str:
+        return f'<{type(self).__module__}.{type(self).__name__} {self.addr}>'
+
+
+class _ClientProtocol(MessageProtocol):
+    def __init__(self, incoming: queue.SimpleQueue) -> None:
+        super().__init__()
+        self._queue = incoming
+
+    def message_received(self, data: Any) -> None:
+        """
+        Postcondition:
+            - Negotiates the newest binary codec both peers support, queues every other message for pump
+        """
+        if isinstance(data, dict) and data.get('action') == 'codec':
+            self._incoming_codec = data['version']
+            return
+        if isinstance(data, dict) and data.get('action') == 'connected':
+            versions = set(data.get('codecs', ())) & set(SUPPORTED_CODEC_VERSIONS)
+            if versions:
+                self.Send({'action': 'codec', 'version': max(versions)})
+                self._outgoing_codec = max(versions)
+        self._queue.put(data)
+
+    def connection_lost(self, exc: Exception | None) -> None:
+        self._queue.put({'action': 'disconnected'})
+
+
+class ClientConnection:
+    def __init__(self) -> None:
+        """
+        Postcondition:
+            - An asyncio event loop runs the connection in a background thread, so the game loop never blocks on the network
+        """
+        self._incoming: queue.SimpleQueue = queue.SimpleQueue()
+        self._protocol: _ClientProtocol | None = None
+        self._pending: list[dict[str, Any]] = []
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, name='network', daemon=True)
+        self._thread.start()
+
+    def connect(self, address: tuple[str, int]) -> None:
+        """
+        Postcondition:
+            - Connects to address in the background; failures arrive as an 'error' message
+        """
+        asyncio.run_coroutine_threadsafe(self._connect(address), self._loop)
+
+    async def _connect(self, address: tuple[str, int]) -> None:
+        try:
+            _, self._protocol = await self._loop.create_connection(lambda: _ClientProtocol(self._incoming), *address)
+        except OSError as error:
+            self._incoming.put({'action': 'error', 'error': error.args})
+            return
+        [self._protocol.Send(data) for data in self._pending]
+        self._pending.clear()
+
+    def pump(self, listener: object) -> None:
+        """
+        Postcondition:
+            - Every message received since the last pump is dispatched to listener in the calling thread
+        """
+        while True:
+            try:
+                data = self._incoming.get_nowait()
+            except queue.Empty:
+                return
+            dispatch_message(listener, data)
+
+    def send(self, data: dict[str, Any]) -> None:
+        """
+        Postcondition:
+            - data is sent now, or once the connection is established
+        """
+        self._loop.call_soon_threadsafe(self._send, data)
+
+    def _send(self, data: dict[str, Any]) -> None:
+        if self._protocol is None:
+            self._pending.append(data)
+        else:
+            self._protocol.Send(data)
+
+    def close(self) -> None:
+        """
+        Postcondition:
+            - The connection is closed and the background event loop stops
+        """
+        self._loop.call_soon_threadsafe(self._close)
+
+    def _close(self) -> None:
+        if self._protocol is not None:
+            self._protocol.close()
+        # Give the transport a moment to flush before the loop stops
+        self._loop.call_later(0.1, self._loop.stop)
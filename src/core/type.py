@@ -1,58 +1,133 @@
+from src.core.config import GameConfig
+from src.core.enum import MoveDirection
+
+_GRID_WIDTH, _GRID_HEIGHT = GameConfig.GRID_WIDTH, GameConfig.GRID_HEIGHT
+
+
 class Direction:
+    __slots__ = ('x', 'y')
+
+    x: int
+    y: int
+
     def __init__(self, x: int, y: int) -> None:
-        self._x = x
-        self._y = y
+        object.__setattr__(self, 'x', x)
+        object.__setattr__(self, 'y', y)
 
-    @property
-    def x(self) -> int:
-        return self._x
+    @classmethod
+    def at(cls, x: int, y: int) -> 'Direction':
+        """
+        Postcondition:
+            - Returns the shared instance for steps with -1 <= x, y <= 1, a new Direction otherwise
+        """
+        if -1 <= x <= 1 and -1 <= y <= 1:
+            return _STEP_CACHE[x + 1][y + 1]
+        return cls(x, y)
 
-    @property
-    def y(self) -> int:
-        return self._y
+    def __setattr__(self, name: str, value: object) -> None:
+        raise AttributeError(f"{type(self).__name__} is immutable")
 
     def __mul__(self, scalar: int) -> 'Direction':
-        assert isinstance(scalar, int), f"Can only multiply by int, got {type(scalar).__name__}"
-        return Direction(self.x * scalar, self.y * scalar)
+        return Direction.at(self.x * scalar, self.y * scalar)
 
     def __rmul__(self, scalar: int) -> 'Direction':
         return self.__mul__(scalar)
 
     def __add__(self, direction: 'Direction') -> 'Direction':
-        assert isinstance(direction, Direction), f"Can only add by Direction, got {type(direction).__name__}"
-        return Direction(self.x * direction.x, self.y * direction.y)
+        return Direction.at(self.x + direction.x, self.y + direction.y)
 
     def __radd__(self, direction: 'Direction') -> 'Direction':
         return self.__add__(direction)
 
+    def __eq__(self, direction: object) -> bool:
+        if not isinstance(direction, Direction):
+            return NotImplemented
+        return self.x == direction.x and self.y == direction.y
+
+    def __hash__(self) -> int:
+        return hash((self.x, self.y))
+
+    def __repr__(self) -> str:
+        return f'Direction({self.x}, {self.y})'
+
+    def __reduce__(self):
+        return Direction, (self.x, self.y)
+
     def distance(self) -> int:
         return abs(self.x) + abs(self.y)
 
 
 class Position:
+    __slots__ = ('x', 'y')
+
+    x: int
+    y: int
+
     def __init__(self, x: int, y: int) -> None:
-        self._x = x
-        self._y = y
+        object.__setattr__(self, 'x', x)
+        object.__setattr__(self, 'y', y)
 
-    @property
-    def x(self) -> int:
-        return self._x
+    @classmethod
+    def at(cls, x: int, y: int) -> 'Position':
+        """
+        Postcondition:
+            - Returns the shared instance for positions on the default grid, a new Position otherwise
+        """
+        if 0 <= x < _GRID_WIDTH and 0 <= y < _GRID_HEIGHT:
+            return _POSITION_CACHE[x][y]
+        return cls(x, y)
 
-    @property
-    def y(self) -> int:
-        return self._y
+    def __setattr__(self, name: str, value: object) -> None:
+        raise AttributeError(f"{type(self).__name__} is immutable")
 
     def __add__(self, direction: 'Direction') -> 'Position':
-        assert isinstance(direction, Direction), f"Can only add Direction, got {type(direction).__name__}"
-        return Position(self.x + direction.x, self.y + direction.y)
+        x, y = self.x + direction.x, self.y + direction.y
+        if 0 <= x < _GRID_WIDTH and 0 <= y < _GRID_HEIGHT:
+            return _POSITION_CACHE[x][y]
+        return Position(x, y)
 
     def __radd__(self, direction: 'Direction') -> 'Position':
         return self.__add__(direction)
 
     def __sub__(self, position: 'Position') -> 'Direction':
-        assert isinstance(position, Position), f"Can only subtract by Position, got {type(position).__name__}"
         return Direction(self.x - position.x, self.y - position.y)
 
-    def __eq__(self, position: 'Position') -> bool:
-        assert isinstance(position, Position), f"Can only compare Position, got {type(position).__name__}"
+    def __eq__(self, position: object) -> bool:
+        if not isinstance(position, Position):
+            return NotImplemented
         return self.x == position.x and self.y == position.y
+
+    def __hash__(self) -> int:
+        return hash((self.x, self.y))
+
+    def __repr__(self) -> str:
+        return f'Position({self.x}, {self.y})'
+
+    def __reduce__(self):
+        return Position, (self.x, self.y)
+
+    def distance_to(self, position: 'Position') -> int:
+        """
+        Postcondition:
+            - Returns the Manhattan distance without allocating a Direction
+        """
+        return abs(self.x - position.x) + abs(self.y - position.y)
+
+
+_STEP_CACHE: list[list[Direction]] = [[Direction(x, y) for y in range(-1, 2)] for x in range(-1, 2)]
+_POSITION_CACHE: list[list[Position]] = [[Position(x, y) for y in range(_GRID_HEIGHT)] for x in range(_GRID_WIDTH)]
+
+UNIT_DIRECTIONS: dict[MoveDirection, Direction] = {
+    MoveDirection.UP: Direction.at(0, -1),
+    MoveDirection.DOWN: Direction.at(0, +1),
+    MoveDirection.LEFT: Direction.at(-1, 0),
+    MoveDirection.RIGHT: Direction.at(+1, 0),
+}
+
+# Order of the move directions wherever they are encoded as small integers (wire format, input log,
+# deer tables): a direction's code is its index in MOVE_DIRECTIONS
+MOVE_DIRECTIONS: list[MoveDirection] = list(MoveDirection)
+DIRECTION_CODES: dict[MoveDirection, int] = {move_direction: code for code, move_direction in enumerate(MOVE_DIRECTIONS)}
+MOVE_STEPS: list[Direction] = [UNIT_DIRECTIONS[move_direction] for move_direction in MOVE_DIRECTIONS]  # indexed by code
+# The move steps followed by the diagonals, all eight tiles around a tile
+NEIGHBOUR_STEPS: list[Direction] = MOVE_STEPS + [Direction.at(x, y) for x in (-1, 1) for y in (-1, 1)]
@@ -1,8 +1,59 @@
+import argparse
+
 from src.core.config import GameServerConfig
-from src.server.game_server import GameServer
+
+
+def parse_grid_size(value: str) -> tuple[int, int]:
+    """
+    Postcondition:
+        - Returns the width and height of a WIDTHxHEIGHT value that every level fits into
+        - Raises argparse.ArgumentTypeError for a malformed value or a grid smaller than the level layouts
+    """
+    width, separator, height = value.lower().partition('x')
+    if not separator or not width.isdigit() or not height.isdigit():
+        raise argparse.ArgumentTypeError(f'expected WIDTHxHEIGHT, got {value!r}')
+    width, height = int(width), int(height)
+    if width < GameServerConfig.GRID_WIDTH or height < GameServerConfig.GRID_HEIGHT:
+        raise argparse.ArgumentTypeError(f'the levels need at least {GameServerConfig.GRID_WIDTH}x{GameServerConfig.GRID_HEIGHT} tiles, '
+                                         f'got {width}x{height}')
+    if width > 0xFFFF or height > 0xFFFF:
+        raise argparse.ArgumentTypeError(f'positions are sent as 16 bit coordinates, so at most 65535x65535 tiles, got {width}x{height}')
+    return width, height
+
 
 if __name__ == "__main__":
-    game_server_config = GameServerConfig()
+    parser = argparse.ArgumentParser(description='Deer Picture Hunting Game server')
+    parser.add_argument('--workers', type=int, default=0,
+                        help='run a supervisor that shards matches over this many worker processes (default: single process)')
+    parser.add_argument('--metrics', metavar='PORT_OR_PATH',
+                        help='serve Prometheus metrics on this loopback port or Unix socket path '
+                             '(with workers, worker N uses PORT+1+N or PATH.N)')
+    parser.add_argument('--record', metavar='PATH',
+                        help='append the seed and inputs of every match to this input log (with workers, worker N uses PATH.N)')
+    parser.add_argument('--grid', metavar='WIDTHxHEIGHT', type=parse_grid_size,
+                        default=(GameServerConfig.GRID_WIDTH, GameServerConfig.GRID_HEIGHT),
+                        help=f'play on maps of this many tiles (default: {GameServerConfig.GRID_WIDTH}x{GameServerConfig.GRID_HEIGHT}), '
+                             'every level must fit into it')
+    parser.add_argument('--replay', metavar='PATH',
+                        help='replay the matches of this input log headlessly and exit, instead of serving')
+    args = parser.parse_args()
+
+    if args.replay is not None:
+        from src.server.headless import replay_input_log
+
+        raise SystemExit(0 if replay_input_log(args.replay) else 1)
+
+    metrics_address = int(args.metrics) if args.metrics is not None and args.metrics.isdigit() else args.metrics
+    game_server_config = GameServerConfig(worker_count=args.workers, metrics_address=metrics_address, input_log_path=args.record,
+                                          grid_size=args.grid)
+
+    if game_server_config.worker_count > 0:
+        from src.server.supervisor import GameServerSupervisor
+
+        supervisor = GameServerSupervisor(game_server_config)
+        supervisor.run()
+    else:
+        from src.server.game_server import GameServer
 
-    game_server = GameServer(game_server_config)
-    game_server.run()
+        game_server = GameServer(game_server_config)
+        game_server.run()
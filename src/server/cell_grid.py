@@ -0,0 +1,90 @@
+from typing import Any, Iterator
+
+
+class CellGrid:
+    """
+    Items bucketed by the coarse cell of the tile they stand on, so spatial queries only visit the
+    cells around a tile instead of every item. The cell walks of the player and interest indices.
+    """
+    CELL_SIZE = 8  # in tiles
+
+    def __init__(self) -> None:
+        """
+        Postcondition:
+            - Empty grid
+        """
+        self._cells: dict[tuple[int, int], list[Any]] = {}
+
+    @classmethod
+    def cell(cls, x: int, y: int) -> tuple[int, int]:
+        """
+        Postcondition:
+            - Returns the cell the tile (x, y) falls into
+        """
+        return x // cls.CELL_SIZE, y // cls.CELL_SIZE
+
+    def add(self, cell: tuple[int, int], item: Any) -> None:
+        """
+        Postcondition:
+            - item is bucketed in cell
+        """
+        self._cells.setdefault(cell, []).append(item)
+
+    def remove(self, cell: tuple[int, int], item: Any) -> None:
+        """
+        Precondition:
+            - item is bucketed in cell
+
+        Postcondition:
+            - item is no longer bucketed in cell; empty cells are dropped
+        """
+        items = self._cells[cell]
+        items.remove(item)
+        if not items:
+            del self._cells[cell]
+
+    def in_rectangle(self, x: int, y: int, half_width: int, half_height: int) -> Iterator[list[Any]]:
+        """
+        Precondition:
+            - half_width >= 0 and half_height >= 0
+
+        Postcondition:
+            - Yields the items of the occupied cells overlapping the tiles within half_width columns
+              and half_height rows of (x, y)
+        """
+        size = self.CELL_SIZE
+        for cell_x in range((x - half_width) // size, (x + half_width) // size + 1):
+            for cell_y in range((y - half_height) // size, (y + half_height) // size + 1):
+                items = self._cells.get((cell_x, cell_y))
+                if items is not None:
+                    yield items
+
+    def rings(self, x: int, y: int, max_distance: int, max_ring: int) -> Iterator[tuple[int, list[Any]]]:
+        """
+        Precondition:
+            - max_distance >= 0 and max_ring >= 0
+
+        Postcondition:
+            - Yields the items of the occupied cells within max_distance of (x, y), in up to max_ring rings of
+              growing Chebyshev distance around its cell, with the smallest Manhattan distance any tile of the
+              ring has to (x, y)
+        """
+        if not self._cells:
+            return
+        size = self.CELL_SIZE
+        center_x, center_y = self.cell(x, y)
+        min_x, max_x = (x - max_distance) // size, (x + max_distance) // size
+        min_y, max_y = (y - max_distance) // size, (y + max_distance) // size
+        for ring in range(min(max(center_x - min_x, max_x - center_x, center_y - min_y, max_y - center_y), max_ring) + 1):
+            lower_bound = (ring - 1) * size + 1 if ring > 0 else 0
+            top, bottom = center_y - ring, center_y + ring
+            for cell_x in range(max(center_x - ring, min_x), min(center_x + ring, max_x) + 1):
+                if cell_x == center_x - ring or cell_x == center_x + ring:
+                    cell_ys = range(max(top, min_y), min(bottom, max_y) + 1)
+                else:
+                    # Interior columns of the ring only have their top and bottom cell
+                    cell_ys = [cell_y for cell_y in (top, bottom) if min_y <= cell_y <= max_y]
+                for cell_y in cell_ys:
+                    items = self._cells.get((cell_x, cell_y))
+                    if items is not None:
+                        yield lower_bound, items
@@ -0,0 +1,304 @@
+from typing import TYPE_CHECKING
+
+import numpy as np
+
+from src.core.chunked_grid import CHUNK_AREA, CHUNK_MASK, CHUNK_SHIFT
+from src.core.config import GameServerConfig
+from src.core.type import DIRECTION_CODES, MOVE_DIRECTIONS, MOVE_STEPS, NEIGHBOUR_STEPS, Position
+from src.server.flow_field import FlowField
+from src.server.free_tiles import FreeTileSet
+from src.server.game_map import GameMap
+from src.server.snapshot import EntityState
+
+if TYPE_CHECKING:
+    from src.server.game_server import Deer
+
+_STEP_X = np.array([step.x for step in MOVE_STEPS], dtype=np.int64)  # indexed by direction code
+_STEP_Y = np.array([step.y for step in MOVE_STEPS], dtype=np.int64)
+# Steps a fleeing deer considers like Deer.flee: the move directions, then the diagonals
+_FLEE_STEP_X = np.array([[step.x for step in NEIGHBOUR_STEPS]], dtype=np.int64)
+_FLEE_STEP_Y = np.array([[step.y for step in NEIGHBOUR_STEPS]], dtype=np.int64)
+_NO_CHUNK = -1
+
+
+class DeerHerd:
+    """
+    Structure-of-arrays deer simulation that updates the whole herd in vectorized passes.
+
+    Follows the rules of Deer.update with one difference: all deer move at once, so a deer only
+    steps onto tiles that were free at the start of the tick, and a contested tile goes to the
+    deer with the lowest index.
+
+    Its state only grows with the deer, not the map: the tiles the deer stand on are kept by tile key
+    (y * width + x), and the walkable mask and line-of-sight rays are read from the map per chunk, the
+    first time a deer comes near the chunk.
+    """
+
+    def __init__(self, game_map: GameMap, deer: list['Deer'], seed: int, free_tiles: FreeTileSet | None = None) -> None:
+        """
+        Precondition:
+            - every deer stands on a walkable tile of game_map, which is not in free_tiles
+            - the entity id of every deer is its index in deer
+
+        Postcondition:
+            - The herd holds the position, direction, alert level and perception of every deer
+            - Its random decisions are drawn from a generator seeded with seed
+            - free_tiles follows the moves of the deer
+        """
+        self._width = game_map.width
+        self._height = game_map.height
+        self._rng = np.random.default_rng(seed)
+        self._free_tiles = free_tiles
+
+        self._map = game_map
+        self._columns = game_map.walkable.columns
+        # Slot of every chunk in the chunk tables below, _NO_CHUNK until a deer reads the chunk
+        self._chunk_slots = np.full(self._columns * ((self._height + CHUNK_MASK) >> CHUNK_SHIFT), _NO_CHUNK, dtype=np.intp)
+        self._chunk_count = 0
+        self._walkable_chunks = np.zeros((0, CHUNK_AREA), dtype=bool)  # indexed [slot, chunk-local tile]
+        self._clear_run_chunks = np.zeros((len(MOVE_DIRECTIONS), 0, CHUNK_AREA), dtype=np.uint8)  # [direction code, slot, tile]
+
+        self._x = np.array([d.position.x for d in deer], dtype=np.int64)
+        self._y = np.array([d.position.y for d in deer], dtype=np.int64)
+        self._direction = np.array([DIRECTION_CODES[d.direction] for d in deer], dtype=np.int64)
+        self._alert_level = np.array([d.alert_level for d in deer], dtype=np.int64)
+        self._smell_distance = np.array([d.smell_distance for d in deer], dtype=np.int64)
+        self._visual_distance = np.array([d.visual_distance for d in deer], dtype=np.int64)
+        self._alert_threshold = np.array([d.alert_threshold for d in deer], dtype=np.int64)
+
+        # Tile keys of the deer in ascending order and the deer on each, built on the first deer_at after a move
+        self._owner_keys: np.ndarray | None = None
+        self._owners: np.ndarray | None = None
+
+    def __len__(self) -> int:
+        return len(self._x)
+
+    def deer_at(self, x: int, y: int) -> int | None:
+        """
+        Postcondition:
+            - Returns the entity id of the deer standing on (x, y), or None
+        """
+        if not (0 <= x < self._width and 0 <= y < self._height):
+            return None
+        if self._owner_keys is None:
+            keys = self._y * self._width + self._x
+            self._owners = np.argsort(keys)
+            self._owner_keys = keys[self._owners]
+        key = y * self._width + x
+        found = int(np.searchsorted(self._owner_keys, key))
+        return int(self._owners[found]) if found < len(self._owner_keys) and self._owner_keys[found] == key else None
+
+    def is_deer_at(self, position: Position) -> bool:
+        return self.deer_at(position.x, position.y) is not None
+
+    def states(self) -> dict[int, EntityState]:
+        """
+        Postcondition:
+            - Returns position and direction of every deer, keyed by its entity id
+        """
+        return {
+            index: (x, y, MOVE_DIRECTIONS[direction].name)
+            for index, (x, y, direction) in enumerate(zip(self._x.tolist(), self._y.tolist(), self._direction.tolist()))
+        }
+
+    def update(self, player_positions: list[Position], flow_field: FlowField) -> None:
+        """
+        Precondition:
+            - flow_field measures the distances to player_positions on the herd's map
+
+        Postcondition:
+            - Alert levels are updated from smell and sight of the given players
+            - Every deer flees along the flow field or walks randomly
+        """
+        count = len(self._x)
+        if count == 0:
+            return
+
+        player_x = np.array([p.x for p in player_positions], dtype=np.int64)
+        player_y = np.array([p.y for p in player_positions], dtype=np.int64)
+
+        # Tiles taken by a deer or player at the start of the tick, sorted for lookup
+        blocked = np.sort(np.concatenate([self._y * self._width + self._x, player_y * self._width + player_x]))
+
+        if len(player_positions) == 0:
+            self._alert_level -= 1  # Calm down over time
+            self._move(self._random_walk_targets(np.arange(count), blocked))
+            return
+
+        # Manhattan distance to the nearest player, which the deer smells
+        dx = player_x[np.newaxis, :] - self._x[:, np.newaxis]
+        dy = player_y[np.newaxis, :] - self._y[:, np.newaxis]
+        distance = np.abs(dx) + np.abs(dy)
+        nearest = np.argmin(distance, axis=1)
+        nearest_distance = distance[np.arange(count), nearest]
+
+        # A player is in sight if it stands on the unobstructed ray in front of the deer
+        step_x = _STEP_X[self._direction][:, np.newaxis]
+        step_y = _STEP_Y[self._direction][:, np.newaxis]
+        along = dx * step_x + dy * step_y
+        slots, tiles = self._chunk_tiles(self._x, self._y)
+        visual_range = np.minimum(self._visual_distance, self._clear_run_chunks[self._direction, slots, tiles])
+        in_sight = ((dx == along * step_x) & (dy == along * step_y) & (along >= 1) & (along <= visual_range[:, np.newaxis])).any(axis=1)
+
+        self._alert_level += np.where(in_sight, 4, np.where(nearest_distance < self._smell_distance, 2, -1))
+        # Limit alert Level to 5 seconds and cooldown period to 10 seconds
+        np.clip(self._alert_level, 0, 10 * GameServerConfig.FRAME_RATE, out=self._alert_level)
+
+        fleeing = self._alert_level >= self._alert_threshold
+        walk_targets = self._random_walk_targets(np.flatnonzero(~fleeing), blocked)
+        # Beyond the reach of the flow field it has no gradient, so those deer step away from their nearest player
+        fleeing = np.flatnonzero(fleeing)
+        in_reach = flow_field.distances_at(self._x[fleeing], self._y[fleeing]) < flow_field.out_of_reach
+        flee_targets = self._flee_targets(fleeing[in_reach], flow_field, blocked)
+        away_targets = self._flee_from_targets(fleeing[~in_reach], player_x[nearest], player_y[nearest], blocked)
+        self._move(tuple(np.concatenate(parts) for parts in zip(walk_targets, flee_targets, away_targets)))
+
+    def _random_walk_targets(self, candidates: np.ndarray, blocked: np.ndarray) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Postcondition:
+            - Every candidate deer tries a random direction with 25% chance
+            - Returns indices and target coordinates of the deer that found a free tile
+        """
+        walkers = candidates[self._rng.random(len(candidates)) < 0.25]
+        order = np.argsort(self._rng.random((len(walkers), 4)), axis=1)
+        return self._first_free(walkers, _STEP_X[order], _STEP_Y[order], blocked)
+
+    def _flee_targets(self, candidates: np.ndarray, flow_field: FlowField, blocked: np.ndarray) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Precondition:
+            - every candidate deer stands within the reach of flow_field
+
+        Postcondition:
+            - Every candidate deer picks the free neighbour, diagonals included, with the largest distance
+              to the players, the first of the steps on a tie
+            - Returns indices and target coordinates of the deer whose pick is farther than their own tile
+        """
+        x, y = self._x[candidates], self._y[candidates]
+        target_x = x[:, np.newaxis] + _FLEE_STEP_X
+        target_y = y[:, np.newaxis] + _FLEE_STEP_Y
+        in_bounds = (0 <= target_x) & (target_x < self._width) & (0 <= target_y) & (target_y < self._height)
+        target_distance = np.full(target_x.shape, -1, dtype=np.int64)
+        inside_x, inside_y = target_x[in_bounds], target_y[in_bounds]
+        target_distance[in_bounds] = np.where(self._is_free(inside_x, inside_y, blocked), flow_field.distances_at(inside_x, inside_y), -1)
+
+        choice = target_distance.argmax(axis=1)
+        rows = np.arange(len(candidates))
+        farther = target_distance[rows, choice] > flow_field.distances_at(x, y)
+        return candidates[farther], target_x[rows, choice][farther], target_y[rows, choice][farther]
+
+    def _flee_from_targets(self, candidates: np.ndarray, nearest_x: np.ndarray, nearest_y: np.ndarray,
+                           blocked: np.ndarray) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Postcondition:
+            - Every candidate deer tries to step horizontally, vertically or diagonally away from its nearest player
+            - Returns indices and target coordinates of the deer that found a free tile
+        """
+        if len(candidates) == 0:
+            return candidates, candidates, candidates
+
+        def sign(value: np.ndarray) -> np.ndarray:
+            return np.where(value == 0, self._rng.choice([-1, 1], size=len(value)), np.sign(value))
+
+        dx = sign(nearest_x[candidates] - self._x[candidates])
+        dy = sign(nearest_y[candidates] - self._y[candidates])
+        zero = np.zeros_like(dx)
+        steps_x = np.stack([-dx, zero, -dx], axis=1)
+        steps_y = np.stack([zero, -dy, -dy], axis=1)
+        return self._first_free(candidates, steps_x, steps_y, blocked)
+
+    def _first_free(self, deer: np.ndarray, steps_x: np.ndarray, steps_y: np.ndarray, blocked: np.ndarray) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Precondition:
+            - steps_x and steps_y hold one row of candidate steps per deer, in order of preference
+
+        Postcondition:
+            - Returns indices and target coordinates of the deer that have a free candidate,
+              using the first free candidate of each
+        """
+        target_x = self._x[deer][:, np.newaxis] + steps_x
+        target_y = self._y[deer][:, np.newaxis] + steps_y
+        in_bounds = (0 <= target_x) & (target_x < self._width) & (0 <= target_y) & (target_y < self._height)
+        free = in_bounds.copy()
+        free[in_bounds] = self._is_free(target_x[in_bounds], target_y[in_bounds], blocked)
+
+        has_free = free.any(axis=1)
+        choice = free.argmax(axis=1)[has_free]
+        rows = np.flatnonzero(has_free)
+        return deer[has_free], target_x[rows, choice], target_y[rows, choice]
+
+    def _chunk_tiles(self, x: np.ndarray, y: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Precondition:
+            - every (x, y) lies within the map
+
+        Postcondition:
+            - Returns the slot in the chunk tables of the chunk of every tile (x, y) and the tile's index in it;
+              chunks no deer read before are loaded from the map
+        """
+        chunks = (y >> CHUNK_SHIFT) * self._columns + (x >> CHUNK_SHIFT)
+        slots = self._chunk_slots[chunks]
+        if (slots == _NO_CHUNK).any():
+            self._load_chunks(np.unique(chunks[slots == _NO_CHUNK]))
+            slots = self._chunk_slots[chunks]
+        return slots, (y & CHUNK_MASK) << CHUNK_SHIFT | (x & CHUNK_MASK)
+
+    def _load_chunks(self, chunks: np.ndarray) -> None:
+        """
+        Postcondition:
+            - The walkable mask and clear runs of every chunk are in the chunk tables, which double
+              their capacity when full
+        """
+        count = self._chunk_count + len(chunks)
+        if count > self._walkable_chunks.shape[0]:
+            capacity = max(count, 2 * self._walkable_chunks.shape[0])
+            walkable_chunks = np.zeros((capacity, CHUNK_AREA), dtype=bool)
+            walkable_chunks[:self._chunk_count] = self._walkable_chunks[:self._chunk_count]
+            clear_run_chunks = np.zeros((len(MOVE_DIRECTIONS), capacity, CHUNK_AREA), dtype=np.uint8)
+            clear_run_chunks[:, :self._chunk_count] = self._clear_run_chunks[:, :self._chunk_count]
+            self._walkable_chunks, self._clear_run_chunks = walkable_chunks, clear_run_chunks
+        for slot, chunk in enumerate(chunks.tolist(), self._chunk_count):
+            chunk_x, chunk_y = chunk % self._columns, chunk // self._columns
+            self._walkable_chunks[slot] = np.frombuffer(self._map.walkable.chunk(chunk_x, chunk_y), dtype=np.uint8) == 1
+            for code, move_direction in enumerate(MOVE_DIRECTIONS):
+                self._clear_run_chunks[code, slot] = np.frombuffer(self._map.clear_run_chunk(chunk_x, chunk_y, move_direction), dtype=np.uint8)
+            self._chunk_slots[chunk] = slot
+        self._chunk_count = count
+
+    def _is_free(self, x: np.ndarray, y: np.ndarray, blocked: np.ndarray) -> np.ndarray:
+        """
+        Precondition:
+            - every (x, y) lies within the map
+            - blocked holds the sorted keys of the tiles taken by a deer or player, at least one
+
+        Postcondition:
+            - Returns for every tile (x, y) whether it is walkable and not taken
+        """
+        keys = y * self._width + x
+        taken = blocked[np.minimum(np.searchsorted(blocked, keys), len(blocked) - 1)] == keys
+        slots, tiles = self._chunk_tiles(x, y)
+        return self._walkable_chunks[slots, tiles] & ~taken
+
+    def _move(self, targets: tuple[np.ndarray, np.ndarray, np.ndarray]) -> None:
+        """
+        Precondition:
+            - no target is taken by a deer or player at the start of the tick
+
+        Postcondition:
+            - Moves every deer to its target, the lowest deer index wins a contested tile
+        """
+        deer, target_x, target_y = targets
+        if len(deer) == 0:
+            return
+
+        order = np.argsort(deer, kind='stable')
+        deer, target_x, target_y = deer[order], target_x[order], target_y[order]
+        _, winners = np.unique(target_y * self._width + target_x, return_index=True)
+        deer, target_x, target_y = deer[winners], target_x[winners], target_y[winners]
+
+        left, entered = self._y[deer] * self._width + self._x[deer], target_y * self._width + target_x
+        self._x[deer] = target_x
+        self._y[deer] = target_y
+        self._owner_keys = self._owners = None
+        if self._free_tiles is not None:
+            self._free_tiles.discard_many(entered)
+            self._free_tiles.add_many(left)
@@ -0,0 +1,190 @@
+import numpy as np
+
+from src.core.chunked_grid import CHUNK_SHIFT, CHUNK_SIZE
+from src.core.config import GameServerConfig
+from src.core.type import Position
+from src.server.game_map import GameMap
+
+
+class _Window:
+    """
+    Rectangle of the map searched from the sources in it, with the distances it measured.
+    """
+
+    def __init__(self, x: int, y: int, end_x: int, end_y: int, sources: list[Position]) -> None:
+        self.x, self.y, self.end_x, self.end_y = x, y, end_x, end_y
+        self.sources = sources
+        self.distances: np.ndarray | None = None  # indexed [y - self.y, x - self.x]
+
+    def overlaps(self, other: '_Window') -> bool:
+        return self.x < other.end_x and other.x < self.end_x and self.y < other.end_y and other.y < self.end_y
+
+    def merge(self, other: '_Window') -> None:
+        """
+        Postcondition:
+            - The window covers the tiles and sources of both windows
+        """
+        self.x, self.y = min(self.x, other.x), min(self.y, other.y)
+        self.end_x, self.end_y = max(self.end_x, other.end_x), max(self.end_y, other.end_y)
+        self.sources = self.sources + other.sources
+
+
+class FlowField:
+    """
+    Walking distance from the tiles around the players to the nearest player, shared by all deer of a context.
+
+    One breadth-first search from all players, over the walkable tiles, serves every deer in the tick:
+    a fleeing deer steps to the neighbour with the largest distance by lookup. The search stops after
+    max_distance steps, so it only covers the window of tiles within max_distance of each group of
+    nearby players and runs the first time a deer flees in the tick. Each window expands a whole
+    frontier per step in NumPy; the walkable tiles are read from the map per chunk, once per field.
+    """
+
+    def __init__(self, game_map: GameMap, max_distance: int = GameServerConfig.FLOW_FIELD_RANGE) -> None:
+        """
+        Precondition:
+            - 0 < max_distance < 32767
+
+        Postcondition:
+            - Empty field over the walkable tiles of game_map; every tile is out of reach until update
+        """
+        assert 0 < max_distance < np.iinfo(np.int16).max
+        self._walkable = game_map.walkable
+        self._width, self._height = game_map.width, game_map.height
+        self.max_distance = max_distance
+        self.out_of_reach = max_distance + 1
+        self._walkable_chunks: dict[tuple[int, int], np.ndarray] = {}
+        self._windows: list[_Window] = []
+        self._sources: list[Position] = []
+        self._is_stale = False
+
+    def update(self, sources: list[Position]) -> None:
+        """
+        Precondition:
+            - every source lies on a walkable tile
+
+        Postcondition:
+            - Distances are measured from sources from now on; the search runs when they are first read
+        """
+        self._sources = sources
+        self._is_stale = True
+
+    def distance(self, position: Position) -> int:
+        """
+        Precondition:
+            - position lies within the map
+
+        Postcondition:
+            - Returns the number of steps from position to the nearest source, up to out_of_reach
+              for tiles farther than max_distance, unreachable or not walkable
+        """
+        for window in self._searched_windows():
+            if window.x <= position.x < window.end_x and window.y <= position.y < window.end_y:
+                return int(window.distances[position.y - window.y, position.x - window.x])
+        return self.out_of_reach
+
+    def distances_at(self, xs: np.ndarray, ys: np.ndarray) -> np.ndarray:
+        """
+        Precondition:
+            - every (x, y) lies within the map
+
+        Postcondition:
+            - Returns distance for every tile (x, y), in an array shaped like xs; an empty read runs no search
+        """
+        distances = np.full(xs.shape, self.out_of_reach, dtype=np.int16)
+        if distances.size == 0:
+            return distances  # no deer flees, so the search need not run
+        for window in self._searched_windows():
+            inside = (window.x <= xs) & (xs < window.end_x) & (window.y <= ys) & (ys < window.end_y)
+            distances[inside] = window.distances[ys[inside] - window.y, xs[inside] - window.x]
+        return distances
+
+    def _searched_windows(self) -> list[_Window]:
+        """
+        Postcondition:
+            - Returns the disjoint windows that hold the search from the current sources
+        """
+        if self._is_stale:
+            self._is_stale = False
+            self._windows = self._cover(self._sources)
+            [self._search(window) for window in self._windows]
+        return self._windows
+
+    def _cover(self, sources: list[Position]) -> list[_Window]:
+        """
+        Postcondition:
+            - Returns disjoint windows within the map that hold every tile within max_distance of a source,
+              each window the smallest to cover the overlapping ranges of its sources
+        """
+        reach = self.max_distance
+        windows: list[_Window] = []
+        for source in sources:
+            window = _Window(max(source.x - reach, 0), max(source.y - reach, 0),
+                             min(source.x + reach + 1, self._width), min(source.y + reach + 1, self._height), [source])
+            # A grown window may overlap windows it missed before, so merge until it overlaps none
+            merged = True
+            while merged:
+                merged = False
+                for other in windows:
+                    if other.overlaps(window):
+                        windows.remove(other)
+                        window.merge(other)
+                        merged = True
+                        break
+            windows.append(window)
+        return windows
+
+    def _walkable_chunk(self, chunk_x: int, chunk_y: int) -> np.ndarray:
+        """
+        Postcondition:
+            - Returns the walkable mask of the chunk, False beyond the map, read from the map only once
+        """
+        chunk = self._walkable_chunks.get((chunk_x, chunk_y))
+        if chunk is None:
+            chunk = self._walkable_chunks[(chunk_x, chunk_y)] = np.zeros((CHUNK_SIZE, CHUNK_SIZE), dtype=bool)
+            x, y = chunk_x << CHUNK_SHIFT, chunk_y << CHUNK_SHIFT
+            end_x, end_y = min(x + CHUNK_SIZE, self._width), min(y + CHUNK_SIZE, self._height)
+            if self._walkable.is_default_chunk(chunk_x, chunk_y):
+                chunk[:end_y - y, :end_x - x] = self._walkable.default == 1
+            else:
+                for row in range(y, end_y):
+                    chunk[row - y, :end_x - x] = np.frombuffer(self._walkable.row(row, x, end_x), dtype=np.uint8) == 1
+        return chunk
+
+    def _search(self, window: _Window) -> None:
+        """
+        Postcondition:
+            - window.distances holds the breadth-first search from the sources in the window
+        """
+        width, height = window.end_x - window.x, window.end_y - window.y
+        # The window is padded with a border that is never open, so neighbours need no bounds checks
+        stride = width + 2
+        open_tiles = np.zeros((height + 2, stride), dtype=bool)  # walkable tiles the search has not reached yet
+        for chunk_y in range(window.y >> CHUNK_SHIFT, ((window.end_y - 1) >> CHUNK_SHIFT) + 1):
+            for chunk_x in range(window.x >> CHUNK_SHIFT, ((window.end_x - 1) >> CHUNK_SHIFT) + 1):
+                left, top = chunk_x << CHUNK_SHIFT, chunk_y << CHUNK_SHIFT
+                x, end_x = max(window.x, left), min(window.end_x, left + CHUNK_SIZE)
+                y, end_y = max(window.y, top), min(window.end_y, top + CHUNK_SIZE)
+                open_tiles[y - window.y + 1:end_y - window.y + 1, x - window.x + 1:end_x - window.x + 1] \
+                    = self._walkable_chunk(chunk_x, chunk_y)[y - top:end_y - top, x - left:end_x - left]
+        is_open = open_tiles.ravel()
+        padded = np.full((height + 2, stride), self.out_of_reach, dtype=np.int16)
+        distances = padded.ravel()
+        stamp = np.zeros(len(is_open), dtype=np.int32)  # scratch to drop duplicate neighbours
+        offsets = np.array([-1, +1, -stride, +stride], dtype=np.intp)
+
+        frontier = np.unique(np.array([(p.y - window.y + 1) * stride + p.x - window.x + 1 for p in window.sources], dtype=np.intp))
+        distances[frontier] = 0
+        is_open[frontier] = False
+        for distance in range(1, self.out_of_reach):
+            if len(frontier) == 0:
+                break
+            neighbours = (frontier[:, np.newaxis] + offsets).ravel()
+            neighbours = neighbours[is_open[neighbours]]
+            # Keep one of the neighbours reached from several frontier tiles
+            order = np.arange(len(neighbours), dtype=np.int32)
+            stamp[neighbours] = order
+            frontier = neighbours[stamp[neighbours] == order]
+            distances[frontier] = distance
+            is_open[frontier] = False
+        window.distances = padded[1:-1, 1:-1]
@@ -0,0 +1,304 @@
+import random
+
+import numpy as np
+
+from src.core.chunked_grid import CHUNK_AREA, CHUNK_MASK, CHUNK_SHIFT, CHUNK_SIZE
+from src.core.level import EMPTY_CODE
+from src.core.type import Position
+from src.server.game_map import GameMap
+
+# Slot of a tile in a chunk the set has taken tiles from: its index in the chunk's free list while it is free
+_BLOCKED = -1  # not EMPTY or beyond the map, never free
+_TAKEN = -2
+
+_UNTOUCHED = -1  # chunk without a free list: every EMPTY tile in it is free
+
+
+class FreeTileSet:
+    """
+    The EMPTY tiles of a map that no player or deer stands on, with O(log chunks) add and discard and a
+    uniformly random sample in O(log chunks).
+
+    The set follows the CHUNK_SIZE x CHUNK_SIZE chunks of the map and counts the free tiles per chunk in a
+    Fenwick tree. A chunk only gets a free list of its tiles, with the slot of every tile in it, once a tile
+    in it is taken; until then the EMPTY tiles of the map are read where needed. A taken tile is swapped with
+    the last one of its chunk's list. A sample descends the tree to the chunk of a random rank and picks the
+    tile at the rest of the rank from its list, so memory and sampling scale with the chunks the players and
+    deer touch.
+    """
+
+    def __init__(self, game_map: GameMap) -> None:
+        """
+        Postcondition:
+            - Every EMPTY tile of game_map is free
+        """
+        self._free_lists = np.empty((0, CHUNK_AREA), dtype=np.int16)  # chunk-local indices of the free tiles first
+        self._slots = np.empty((0, CHUNK_AREA), dtype=np.int16)  # per chunk-local index
+        self.reset(game_map)
+
+    def reset(self, game_map: GameMap) -> None:
+        """
+        Postcondition:
+            - Every EMPTY tile of game_map is free, whatever was taken before
+        """
+        self._tiles = game_map.tiles
+        self._width, self._height = game_map.width, game_map.height
+        self._columns = (self._width + CHUNK_MASK) >> CHUNK_SHIFT
+        rows = (self._height + CHUNK_MASK) >> CHUNK_SHIFT
+        # The free lists of the previous map are reused for the chunks touched on this one
+        self._block_of = np.full(self._columns * rows, _UNTOUCHED, dtype=np.int32)
+        self._block_count = 0
+        self._counts = np.zeros(self._columns * rows, dtype=np.int64)
+        for chunk_y in range(rows):
+            for chunk_x in range(self._columns):
+                x, y, end_x, end_y = self._chunk_bounds(chunk_y * self._columns + chunk_x)
+                if self._tiles.is_default_chunk(chunk_x, chunk_y):
+                    empty = (end_x - x) * (end_y - y) if self._tiles.default == EMPTY_CODE else 0
+                else:
+                    empty = sum(self._tiles.row(row, x, end_x).count(EMPTY_CODE) for row in range(y, end_y))
+                self._counts[chunk_y * self._columns + chunk_x] = empty
+        self._count = int(self._counts.sum())
+
+        # Fenwick tree over the counts: node i holds the counts of the chunks i - (i & -i) up to i - 1
+        nodes = np.arange(1, len(self._counts) + 1)
+        ends = np.concatenate([[0], np.cumsum(self._counts)])
+        self._tree = np.concatenate([[0], ends[nodes] - ends[nodes - (nodes & -nodes)]])
+        self._tree_step = 1 << (len(self._counts).bit_length() - 1)  # largest power of two up to the chunk count
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __contains__(self, position: Position) -> bool:
+        block = self._block_of[(position.y >> CHUNK_SHIFT) * self._columns + (position.x >> CHUNK_SHIFT)]
+        if block == _UNTOUCHED:
+            return self._tiles.get(position.x, position.y) == EMPTY_CODE
+        return self._slots[block, (position.y & CHUNK_MASK) << CHUNK_SHIFT | (position.x & CHUNK_MASK)] >= 0
+
+    def _chunk_bounds(self, chunk: int) -> tuple[int, int, int, int]:
+        """
+        Postcondition:
+            - Returns the first x and y and the x and y past the last tile of chunk that lie within the map
+        """
+        chunk_y, chunk_x = divmod(chunk, self._columns)
+        x, y = chunk_x << CHUNK_SHIFT, chunk_y << CHUNK_SHIFT
+        return x, y, min(x + CHUNK_SIZE, self._width), min(y + CHUNK_SIZE, self._height)
+
+    def _touch(self, chunk: int) -> int:
+        """
+        Postcondition:
+            - Returns the free list of chunk, allocated with its EMPTY tiles free in row-major order if it had none
+        """
+        block = int(self._block_of[chunk])
+        if block != _UNTOUCHED:
+            return block
+        if self._block_count == len(self._slots):
+            grown = max(len(self._slots), 1)
+            self._free_lists = np.concatenate([self._free_lists, np.empty((grown, CHUNK_AREA), dtype=np.int16)])
+            self._slots = np.concatenate([self._slots, np.empty((grown, CHUNK_AREA), dtype=np.int16)])
+        block = self._block_of[chunk] = self._block_count
+        self._block_count += 1
+
+        x, y, end_x, end_y = self._chunk_bounds(chunk)
+        empty = np.zeros((CHUNK_SIZE, CHUNK_SIZE), dtype=bool)
+        if self._tiles.is_default_chunk(x >> CHUNK_SHIFT, y >> CHUNK_SHIFT):
+            empty[:end_y - y, :end_x - x] = self._tiles.default == EMPTY_CODE
+        else:
+            for row in range(y, end_y):
+                empty[row - y, :end_x - x] = np.frombuffer(self._tiles.row(row, x, end_x), dtype=np.uint8) == EMPTY_CODE
+        free = np.flatnonzero(empty)
+        self._free_lists[block, :len(free)] = free
+        self._slots[block] = _BLOCKED
+        self._slots[block, free] = np.arange(len(free))
+        return block
+
+    def _locate(self, indices: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Postcondition:
+            - Returns the chunk and the index within it of each row-major tile index
+        """
+        ys = indices // self._width
+        xs = indices - ys * self._width
+        return (ys >> CHUNK_SHIFT) * self._columns + (xs >> CHUNK_SHIFT), (ys & CHUNK_MASK) << CHUNK_SHIFT | (xs & CHUNK_MASK)
+
+    def _count_in_tree(self, chunk: int, delta: int) -> None:
+        """
+        Postcondition:
+            - The Fenwick tree counts delta more free tiles in chunk
+        """
+        node = chunk + 1
+        while node < len(self._tree):
+            self._tree[node] += delta
+            node += node & -node
+
+    def _count_many_in_tree(self, chunks: np.ndarray, deltas: np.ndarray) -> None:
+        """
+        Postcondition:
+            - The Fenwick tree counts deltas more free tiles in chunks, one tree level per pass
+        """
+        nodes = chunks + 1
+        while len(nodes) > 0:
+            np.add.at(self._tree, nodes, deltas)  # chunks below share parent nodes
+            nodes = nodes + (nodes & -nodes)
+            inside = nodes < len(self._tree)
+            nodes, deltas = nodes[inside], deltas[inside]
+
+    def _find(self, rank: int) -> tuple[int, int]:
+        """
+        Precondition:
+            - 0 <= rank < len(self)
+
+        Postcondition:
+            - Returns the chunk of the free tile with the rank in chunk order and its rank within the chunk
+        """
+        tree = self._tree
+        chunk, step = 0, self._tree_step
+        while step > 0:
+            if chunk + step < len(tree) and tree[chunk + step] <= rank:
+                chunk += step
+                rank -= int(tree[chunk])
+            step >>= 1
+        return chunk, rank
+
+    def add(self, x: int, y: int) -> None:
+        """
+        Precondition:
+            - (x, y) lies within the map
+
+        Postcondition:
+            - The tile is free again if it is EMPTY
+        """
+        chunk = (y >> CHUNK_SHIFT) * self._columns + (x >> CHUNK_SHIFT)
+        block = self._block_of[chunk]
+        if block == _UNTOUCHED:
+            return  # nothing was taken from the chunk, so every EMPTY tile in it is free
+        local = (y & CHUNK_MASK) << CHUNK_SHIFT | (x & CHUNK_MASK)
+        if self._slots[block, local] == _TAKEN:
+            slot = self._counts[chunk]
+            self._free_lists[block, slot] = local
+            self._slots[block, local] = slot
+            self._counts[chunk] += 1
+            self._count_in_tree(chunk, 1)
+            self._count += 1
+
+    def discard(self, x: int, y: int) -> None:
+        """
+        Precondition:
+            - (x, y) lies within the map
+
+        Postcondition:
+            - The tile is not free
+        """
+        chunk = (y >> CHUNK_SHIFT) * self._columns + (x >> CHUNK_SHIFT)
+        if self._block_of[chunk] == _UNTOUCHED and self._tiles.get(x, y) != EMPTY_CODE:
+            return
+        block = self._touch(chunk)
+        local = (y & CHUNK_MASK) << CHUNK_SHIFT | (x & CHUNK_MASK)
+        slot = self._slots[block, local]
+        if slot >= 0:
+            # The last free tile of the chunk takes the slot of the tile
+            last = self._free_lists[block, self._counts[chunk] - 1]
+            self._free_lists[block, slot] = last
+            self._slots[block, last] = slot
+            self._slots[block, local] = _TAKEN
+            self._counts[chunk] -= 1
+            self._count_in_tree(chunk, -1)
+            self._count -= 1
+
+    def add_many(self, indices: np.ndarray) -> None:
+        """
+        Precondition:
+            - indices are distinct row-major tile indices (y * width + x) within the map
+
+        Postcondition:
+            - Those of the tiles that are EMPTY are free again
+        """
+        chunks, locals_ = self._locate(indices)
+        blocks = self._block_of[chunks]
+        touched = blocks != _UNTOUCHED
+        chunks, locals_, blocks = chunks[touched], locals_[touched], blocks[touched]
+        taken = self._slots[blocks, locals_] == _TAKEN
+        if not taken.any():
+            return
+        chunks, locals_, blocks = chunks[taken], locals_[taken], blocks[taken]
+
+        # Append the tiles of each chunk to its free list, in their order
+        order = np.argsort(chunks, kind='stable')
+        chunks, locals_, blocks = chunks[order], locals_[order], blocks[order]
+        added_chunks, starts, added = np.unique(chunks, return_index=True, return_counts=True)
+        slots = self._counts[chunks] + np.arange(len(chunks)) - np.repeat(starts, added)
+        self._free_lists[blocks, slots] = locals_
+        self._slots[blocks, locals_] = slots
+        self._counts[added_chunks] += added
+        self._count_many_in_tree(added_chunks, added)
+        self._count += len(chunks)
+
+    def discard_many(self, indices: np.ndarray) -> None:
+        """
+        Precondition:
+            - indices are distinct row-major tile indices (y * width + x) within the map
+
+        Postcondition:
+            - None of the tiles is free
+        """
+        chunks, locals_ = self._locate(indices)
+        [self._touch(int(chunk)) for chunk in np.unique(chunks[self._block_of[chunks] == _UNTOUCHED])]
+        blocks = self._block_of[chunks]
+        slots = self._slots[blocks, locals_]
+        free = slots >= 0
+        if not free.any():
+            return
+        chunks, locals_, blocks, slots = chunks[free], locals_[free], blocks[free], slots[free]
+        self._slots[blocks, locals_] = _TAKEN
+
+        # Each free list shrinks by the tiles taken from it: the tiles left in the tail that is cut off
+        # move into the slots the taken tiles leave before the tail, paired up chunk by chunk
+        taken_chunks, inverse, taken = np.unique(chunks, return_inverse=True, return_counts=True)
+        taken_blocks = self._block_of[taken_chunks]
+        counts = self._counts[taken_chunks] - taken
+        holes = slots < counts[inverse]
+        order = np.argsort(inverse[holes], kind='stable')
+        hole_blocks, hole_slots = blocks[holes][order], slots[holes][order]
+        tail_chunks = np.repeat(np.arange(len(taken_chunks)), taken)
+        tail_slots = counts[tail_chunks] + np.arange(len(tail_chunks)) - np.repeat(np.cumsum(taken) - taken, taken)
+        tail_blocks = taken_blocks[tail_chunks]
+        tail_locals = self._free_lists[tail_blocks, tail_slots]
+        kept = self._slots[tail_blocks, tail_locals] >= 0
+        self._free_lists[hole_blocks, hole_slots] = tail_locals[kept]
+        self._slots[hole_blocks, tail_locals[kept]] = hole_slots
+
+        self._counts[taken_chunks] = counts
+        self._count_many_in_tree(taken_chunks, -taken)
+        self._count -= len(chunks)
+
+    def sample(self, rng: random.Random) -> Position:
+        """
+        Precondition:
+            - len(self) > 0
+
+        Postcondition:
+            - Returns a uniformly random free tile, drawn from rng
+        """
+        if self._count == 0:
+            raise ValueError('No free tile left on the map')
+        chunk, rank = self._find(rng.randrange(self._count))
+
+        x, y, end_x, _ = self._chunk_bounds(chunk)
+        if self._block_of[chunk] == _UNTOUCHED and self._tiles.is_default_chunk(x >> CHUNK_SHIFT, y >> CHUNK_SHIFT):
+            # Every tile of the chunk within the map is free, in row-major order
+            row, column = divmod(rank, end_x - x)
+            return Position.at(x + column, y + row)
+        block = self._touch(chunk)
+        local = int(self._free_lists[block, rank])
+        return Position.at(x + (local & CHUNK_MASK), y + (local >> CHUNK_SHIFT))
+
+    def take(self, rng: random.Random) -> Position:
+        """
+        Precondition:
+            - len(self) > 0
+
+        Postcondition:
+            - Returns a uniformly random free tile, drawn from rng, which is no longer free
+        """
+        position = self.sample(rng)
+        self.discard(position.x, position.y)
+        return position
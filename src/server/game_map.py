@@ -1,80 +1,111 @@
-import random
-
+from src.core.chunked_grid import ChunkedGrid
 from src.core.config import GameServerConfig
-from src.core.enum import Tile
+from src.core.enum import MoveDirection, Tile
+from src.core.level import TILE_BY_CODE, CompiledLevel, compile_level, max_level
 from src.core.type import Position
-from src.util.predefined_levels import LEVELS
 
 
 class GameMap:
-    def __init__(self, level: int) -> None:
+    def __init__(self, level: int, width: int = GameServerConfig.GRID_WIDTH, height: int = GameServerConfig.GRID_HEIGHT) -> None:
         """
         Precondition:
-            - GameServerConfig.MIN_LEVEL <= level <= GameServerConfig.MAX_LEVEL
+            - GameServerConfig.MIN_LEVEL <= level <= max_level()
+            - the level's layout fits into width x height
 
         Postcondition:
-            - Initializes map grid with tiles from predefined LEVELS
+            - width x height map of the level, a view over its compiled tables shared by all maps of
+              the level and size; tiles beyond the level's layout are EMPTY
         """
-        assert GameServerConfig.MIN_LEVEL <= level <= GameServerConfig.MAX_LEVEL
+        assert GameServerConfig.MIN_LEVEL <= level <= max_level()
         self._level = level
-        self._grid: list[list[Tile]] = []
-        self._clear()
-        self.load_map_from_file(self._level)
+        self._compiled: CompiledLevel = compile_level(level, width, height)
+        self._width = width
+        self._height = height
+        self._tiles = self._compiled.tiles
+        self._walkable = self._compiled.walkable
+        self._opaque = self._compiled.opaque
+
+    @property
+    def width(self) -> int:
+        return self._width
 
-    def load_map_from_file(self, level: int) -> None:
+    @property
+    def height(self) -> int:
+        return self._height
+
+    @property
+    def tiles(self) -> ChunkedGrid:
         """
-        Precondition:
-            - GameServerConfig.MIN_LEVEL <= level <= GameServerConfig.MAX_LEVEL
+        Postcondition:
+            - Returns the character codes of the tiles
+        """
+        return self._tiles
+
+    @property
+    def walkable(self) -> ChunkedGrid:
+        """
+        Postcondition:
+            - Returns the mask that is 1 where hunters and deer may stand
+        """
+        return self._walkable
 
+    @property
+    def opaque(self) -> ChunkedGrid:
+        """
         Postcondition:
-            - self._grid is filled with tiles according to LEVELS[level]
-        """
-        assert GameServerConfig.MIN_LEVEL <= level <= GameServerConfig.MAX_LEVEL
-        layout = LEVELS.get(level, LEVELS[max(LEVELS.keys())])
-        for y, row in enumerate(layout):
-            for x, character in enumerate(row):
-                assert 0 <= x < GameServerConfig.GRID_WIDTH and 0 <= y < GameServerConfig.GRID_HEIGHT
-                match character:
-                    case 'T':
-                        self._grid[x][y] = Tile.TREE
-                    case 'R':
-                        self._grid[x][y] = Tile.ROCK
-                    case 'B':
-                        self._grid[x][y] = Tile.BUSH
-                    case '.':
-                        self._grid[x][y] = Tile.EMPTY
-                    case _:
-                        assert False, "unreachable"
-
-    def _clear(self) -> None:
+            - Returns the mask that is 1 where the line of sight is blocked
+        """
+        return self._opaque
+
+    def is_in_bounds(self, position: Position) -> bool:
+        return 0 <= position.x < self._width and 0 <= position.y < self._height
+
+    def is_walkable(self, position: Position) -> bool:
         """
         Postcondition:
-            - Initializes self._grid to a 2D grid filled with Tile.EMPTY
+            - Returns True if position lies on the grid and is not a TREE or ROCK
         """
-        self._grid = [[Tile.EMPTY for _ in range(GameServerConfig.GRID_HEIGHT)] for _ in range(GameServerConfig.GRID_WIDTH)]
+        x, y = position.x, position.y
+        return 0 <= x < self._width and 0 <= y < self._height and self._walkable.get(x, y) == 1
 
-    def get_tile(self, position: Position) -> Tile:
+    def clear_run(self, position: Position, move_direction: MoveDirection) -> int:
         """
         Precondition:
-            - 0 <= position.x < GameServerConfig.GRID_WIDTH
-            - 0 <= position.y < GameServerConfig.GRID_HEIGHT
+            - position lies within the grid
 
         Postcondition:
-            - Returns the tile at the specified position
+            - Returns how many tiles in move_direction can be seen from position, up to level.MAX_CLEAR_RUN
         """
-        assert 0 <= position.x < GameServerConfig.GRID_WIDTH and 0 <= position.y < GameServerConfig.GRID_HEIGHT
-        return self._grid[position.x][position.y]
+        return self._compiled.clear_run(position.x, position.y, move_direction)
 
-    def get_empty_tile(self) -> Position:
+    def clear_run_chunk(self, chunk_x: int, chunk_y: int, move_direction: MoveDirection) -> bytes:
         """
+        Precondition:
+            - the chunk lies within the grid
+
+        Postcondition:
+            - Returns clear_run in move_direction for every tile of the chunk, chunk-local row-major
+        """
+        return self._compiled.clear_run_chunk(chunk_x, chunk_y, move_direction)
+
+    def get_tile_unchecked(self, x: int, y: int) -> Tile:
+        """
+        Precondition:
+            - 0 <= x < width and 0 <= y < height (not checked)
+
         Postcondition:
-            - Returns a random position on the grid where the tile is Tile.EMPTY
+            - Returns the tile at (x, y)
         """
-        while True:
-            position = Position(
-                random.randint(0, GameServerConfig.GRID_WIDTH - 1),
-                random.randint(0, GameServerConfig.GRID_HEIGHT - 1)
-            )
+        return TILE_BY_CODE[self._tiles.get(x, y)]
 
-            if self.get_tile(position) == Tile.EMPTY:
-                return position
+    def get_tile(self, position: Position) -> Tile:
+        """
+        Precondition:
+            - 0 <= position.x < width
+            - 0 <= position.y < height
+
+        Postcondition:
+            - Returns the tile at the specified position
+        """
+        assert self.is_in_bounds(position)
+        return self.get_tile_unchecked(position.x, position.y)
@@ -1,4 +1,8 @@
+import asyncio
+import hashlib
 import random
+import signal
+import socket
 import time
 import uuid
 from abc import ABC, abstractmethod
@@ -6,16 +10,26 @@ from enum import StrEnum
 from typing import Any
 from weakref import WeakKeyDictionary
 
-import pygame
-from PodSixNet.Channel import Channel
-from PodSixNet.Server import Server
-from pygame.time import Clock
-
 from src.core.config import GameServerConfig
-from src.core.enum import MoveDirection, Tile
+from src.core.enum import MoveDirection
 from src.core.event import ClientEvent
-from src.core.type import Position, Direction
+from src.core.level import max_level
+from src.core.network import Channel, TrafficCounter
+from src.core.type import NEIGHBOUR_STEPS, Position, Direction, UNIT_DIRECTIONS
+from src.server.deer_herd import DeerHerd
+from src.server.flow_field import FlowField
+from src.server.free_tiles import FreeTileSet
 from src.server.game_map import GameMap
+from src.server.input_log import InputLogWriter
+from src.server.input_queue import InputQueue
+from src.server.interest import InterestGrid
+from src.server.metrics import MetricsEndpoint
+from src.server.occupancy_grid import OccupancyGrid
+from src.server.player_grid import PlayerGrid
+from src.server.profiler import TickProfiler
+from src.server.rate_limit import RateLimiter
+from src.server.scheduler import FixedTimestepScheduler
+from src.server.snapshot import EntityState, SnapshotHistory, View
 
 class GameObject(ABC):
     def __init__(self, position: Position) -> None:
@@ -28,9 +42,10 @@ class GameObject(ABC):
         """
         self._position = position
         self._direction = MoveDirection.UP
+        self._occupancy: OccupancyGrid | None = None
 
     @abstractmethod
-    def handle_events(self, events: list[ClientEvent], context: 'GameServerContext') -> None:
+    def handle_events(self, context: 'GameServerContext') -> None:
         pass
 
     @abstractmethod
@@ -52,10 +67,30 @@ class GameObject(ABC):
             - value is a valid Position instance
 
         Postcondition:
-            - Updates the position
+            - Updates the position and the occupancy index it is registered in
         """
+        if self._occupancy is not None:
+            self._occupancy.move(self, self._position, value)
         self._position = value
 
+    def attach(self, occupancy: OccupancyGrid) -> None:
+        """
+        Postcondition:
+            - Registers the object at its current position in the given occupancy index
+        """
+        self.detach()
+        self._occupancy = occupancy
+        occupancy.add(self, self._position)
+
+    def detach(self) -> None:
+        """
+        Postcondition:
+            - Removes the object from the occupancy index it is registered in, if any
+        """
+        if self._occupancy is not None:
+            self._occupancy.remove(self, self._position)
+            self._occupancy = None
+
     @property
     def direction(self) -> MoveDirection:
         """
@@ -73,41 +108,68 @@ class Player(Channel, GameObject):
         """
         self.player_id = uuid.uuid4()
         Channel.__init__(self, *args, **kwargs)
-        GameObject.__init__(self, Position(0, 0))
-        self.deer_photographed: set[Deer] = set()
+        GameObject.__init__(self, Position.at(0, 0))
+        self.deer_photographed: set[int] = set()  # entity ids of the deer of the wave
         self.has_photographed_player = False
+        self.room: GameRoom | None = None
+        self.entity_id: int | None = None  # stable id within the room, used in state_update messages
+        self.acked_sequence: int | None = None  # latest state_update the client confirmed
+        self.inputs = InputQueue()
+        self.rate_limiter = RateLimiter(GameServerConfig.RATE_LIMITS, GameServerConfig.RATE_LIMIT_DEFAULT, GameServerConfig.RATE_LIMIT_STRIKES)
 
     def set_position(self, position: Position) -> None:
         """
         Postcondition:
             - Sets the player's position to the given value
         """
-        self._position = position
+        self.position = position
 
     def Close(self) -> None:
         """
         Postcondition:
-            - Removes player from server
+            - Removes player from server and its room
         """
         self._server.remove_player(self)
 
+    def message_received(self, data: Any) -> None:
+        """
+        Postcondition:
+            - Messages within the rate limit of their action are handled, others are dropped and counted
+            - A channel that keeps exceeding its limits is disconnected
+        """
+        if self._transport is not None and self._transport.is_closing():
+            return
+        action = data.get('action') if isinstance(data, dict) else None
+        if self.rate_limiter.allow(action):
+            super().message_received(data)
+            return
+
+        if self._server is not None:
+            self._server.message_dropped(action)
+        if self.rate_limiter.is_abusive:
+            print(f'Disconnecting Player {str(self.addr)}: flooding with {self.rate_limiter.dropped}')
+            if self._server is not None:
+                self._server.abusive_disconnects += 1
+            if self._transport is not None:
+                self._transport.abort()
+
     def Network_move(self, data) -> None:
         """
         Precondition:
             - data contains 'move_direction'
 
         Postcondition:
-            - Appends a movement event to the server context
+            - Queues a movement event for the next tick
         """
         move_direction: MoveDirection = MoveDirection(data['move_direction'].upper())
-        self._server.context.events.append(ClientEvent(self.player_id, move_direction, False))
+        self.inputs.push(ClientEvent(self.player_id, move_direction, False))
 
     def Network_take_picture(self, data) -> None:
         """
         Postcondition:
-            - Appends a picture event to the server context
+            - Queues a picture event for the next tick
         """
-        self._server.context.events.append(ClientEvent(self.player_id, None, True))
+        self.inputs.push(ClientEvent(self.player_id, None, True))
 
     def Network_select_level(self, data) -> None:
         """
@@ -115,20 +177,32 @@ class Player(Channel, GameObject):
             - data contains 'level', and server allows level reset
 
         Postcondition:
-            - Starts the game with the selected level
+            - Starts the game in the player's room with the selected level
         """
-        if self._server.is_level_reset_allowed():
-            self._server.start_game(data['level'])
+        if self.room.is_level_reset_allowed():
+            self.room.start_game(data['level'])
+            self._server.wake()
 
-    def handle_events(self, events: list[ClientEvent], context: 'GameServerContext') -> None:
+    def Network_ack(self, data) -> None:
         """
+        Precondition:
+            - data contains 'sequence' of a state_update the client has applied
+
         Postcondition:
-            - Handles movement or picture taking for this player based on queued events
+            - Later state updates are sent as deltas against that snapshot
         """
-        for event in events:
-            if event.player_id != self.player_id:
-                continue
+        if self.acked_sequence is None or data['sequence'] > self.acked_sequence:
+            self.acked_sequence = data['sequence']
 
+    def handle_events(self, context: 'GameServerContext') -> None:
+        """
+        Postcondition:
+            - Handles at most one move and one picture from the events queued since the last tick, in arrival order
+        """
+        events = self.inputs.drain()
+        if events and self.room is not None:
+            self.room.record_inputs(self, events)
+        for event in events:
             assert (event.move_direction is not None and event.take_picture is False) \
                    or (event.move_direction is None and event.take_picture is True)
 
@@ -137,14 +211,7 @@ class Player(Channel, GameObject):
                 self.Send({'action': 'picture_taken'})
 
             if event.move_direction is not None:
-                if event.move_direction == MoveDirection.UP:
-                    self.move(Direction(0, -1), MoveDirection.UP, context)
-                if event.move_direction == MoveDirection.DOWN:
-                    self.move(Direction(0, +1), MoveDirection.DOWN, context)
-                if event.move_direction == MoveDirection.LEFT:
-                    self.move(Direction(-1, 0), MoveDirection.LEFT, context)
-                if event.move_direction == MoveDirection.RIGHT:
-                    self.move(Direction(+1, 0), MoveDirection.RIGHT, context)
+                self.move(UNIT_DIRECTIONS[event.move_direction], event.move_direction, context)
 
     def update(self, dt: int, context: 'GameServerContext') -> None:
         """
@@ -167,9 +234,7 @@ class Player(Channel, GameObject):
         is_deer_at_new_position = context.is_deer_at_position(new_position)
         is_player_at_new_position = context.is_player_at_position(new_position)
 
-        if 0 <= new_position.x < GameServerConfig.GRID_WIDTH \
-                and 0 <= new_position.y < GameServerConfig.GRID_HEIGHT \
-                and context.map.get_tile(new_position) not in [Tile.TREE, Tile.ROCK] \
+        if context.map.is_walkable(new_position) \
                 and not is_deer_at_new_position \
                 and not is_player_at_new_position:
             self.position = new_position
@@ -180,43 +245,33 @@ class Player(Channel, GameObject):
         Postcondition:
             - Updates deer_photographed or sets has_photographed_player if any target in line of sight
         """
-        picture_direction = Direction(0, 0)
-        match self._direction:
-            case MoveDirection.UP:
-                picture_direction = Direction(0, -1)
-            case MoveDirection.DOWN:
-                picture_direction = Direction(0, +1)
-            case MoveDirection.LEFT:
-                picture_direction = Direction(-1, 0)
-            case MoveDirection.RIGHT:
-                picture_direction = Direction(+1, 0)
-
-        for i in range(1, GameServerConfig.PHOTO_RANGE + 1):
-            position_to_check = self.position + i * picture_direction
-
-            # Stop if we hit a boundary
-            if not (0 <= position_to_check.x < GameServerConfig.GRID_WIDTH and 0 <= position_to_check.y < GameServerConfig.GRID_HEIGHT):
-                break
+        picture_direction = UNIT_DIRECTIONS[self._direction]
 
-            # Stop if we hit a solid obstacle
-            if context.map.get_tile(position_to_check) in [Tile.TREE, Tile.ROCK, Tile.BUSH]:
-                break
-
-            for player in context.players:
-                if player.position == position_to_check:
+        # Stop before the first boundary or solid obstacle
+        photo_range = min(GameServerConfig.PHOTO_RANGE, context.map.clear_run(self.position, self._direction))
+        x, y = self.position.x, self.position.y
+        for i in range(1, photo_range + 1):
+            x_to_check, y_to_check = x + i * picture_direction.x, y + i * picture_direction.y
+            for game_object in context.occupancy.get_unchecked(x_to_check, y_to_check):
+                if isinstance(game_object, Player):
                     self.has_photographed_player = True
+                elif isinstance(game_object, Deer):
+                    self.deer_photographed.add(game_object.entity_id)
 
-            for deer in context.deer:
-                if deer.position == position_to_check:
-                    self.deer_photographed.add(deer)
+            if context.herd is not None:
+                deer_index = context.herd.deer_at(x_to_check, y_to_check)
+                if deer_index is not None:
+                    self.deer_photographed.add(deer_index)
 
     def reset(self):
         """
         Postcondition:
-            - Clears all previously photographed targets
+            - Clears all previously photographed targets and inputs of the previous game, and faces up again
         """
+        self._direction = MoveDirection.UP
         self.deer_photographed = set()
         self.has_photographed_player = False
+        self.inputs.clear()
 
 
 class Deer(GameObject, ABC):
@@ -232,8 +287,9 @@ class Deer(GameObject, ABC):
         self.smell_distance = smell_distance
         self.visual_distance = visual_distance
         self.alert_threshold = alert_threshold
+        self.entity_id: int | None = None  # index in the deer wave, the same id a DeerHerd gives the deer
 
-    def handle_events(self, events: list[ClientEvent], context: 'GameServerContext') -> None:
+    def handle_events(self, context: 'GameServerContext') -> None:
         pass
 
     def update(self, dt: int, context: 'GameServerContext') -> None:
@@ -242,16 +298,13 @@ class Deer(GameObject, ABC):
             - Updates alert level based on player distance or sight
             - Moves the deer by fleeing or randomly
         """
-        nearest_player = self._get_nearest_player(context)
-        player_in_direct_sight = self._get_any_player_in_direct_sight(context)
-
-        if nearest_player is None and player_in_direct_sight is None:
+        if len(context.players) == 0:
             self.alert_level -= 1  # Calm down over time
             self.random_walk(context)
             return
-        elif player_in_direct_sight is not None:
+        elif self._get_any_player_in_direct_sight(context) is not None:
             self.alert_level += 4
-        elif nearest_player is not None and (self.position - nearest_player.position).distance() < self.smell_distance:
+        elif self._get_nearest_player(context) is not None:
             self.alert_level += 2
         else:
             self.alert_level -= 1  # Calm down over time
@@ -261,26 +314,49 @@ class Deer(GameObject, ABC):
         if self.alert_level < self.alert_threshold:
             self.random_walk(context)
         else:
-            self.flee_from(nearest_player.position, context)
+            self.flee(context)
 
     def random_walk(self, context: 'GameServerContext') -> None:
         """
         Postcondition:
             - Deer may move in a random direction (25% chance)
         """
-        if random.random() >= 0.25:
+        if context.rng.random() >= 0.25:
             return
 
-        possible_moves = [
-            Direction(0, -1),
-            Direction(0, +1),
-            Direction(-1, 0),
-            Direction(+1, 0)
-        ]
-        random.shuffle(possible_moves)
+        possible_moves = list(UNIT_DIRECTIONS.values())
+        context.rng.shuffle(possible_moves)
 
         self.move_with_possible_directions(possible_moves, context)
 
+    def flee(self, context: 'GameServerContext') -> None:
+        """
+        Postcondition:
+            - Deer steps to the free neighbour, diagonals included, that is farthest from all players
+              by walking distance, or stays put if none is farther than its own tile
+            - Beyond the reach of the flow field, deer steps away from the nearest player instead
+        """
+        flow_field = context.flow_field
+        best_position, best_distance = None, flow_field.distance(self.position)
+        if best_distance == flow_field.out_of_reach:
+            # The field has no gradient this far from the players
+            nearest_player = context.player_grid.nearest(self.position, context.map.width + context.map.height)
+            if nearest_player is not None:
+                self.flee_from(nearest_player.position, context)
+            return
+
+        for move in NEIGHBOUR_STEPS:  # in order of preference among equally safe tiles
+            new_position = self.position + move
+            if context.map.is_walkable(new_position) \
+                    and not context.is_deer_at_position(new_position) \
+                    and not context.is_player_at_position(new_position):
+                distance = flow_field.distance(new_position)
+                if distance > best_distance:
+                    best_position, best_distance = new_position, distance
+
+        if best_position is not None:
+            self.position = best_position
+
     def flee_from(self, nearest_player_position: Position, context: 'GameServerContext') -> None:
         """
         Precondition:
@@ -294,17 +370,17 @@ class Deer(GameObject, ABC):
             elif value > 0:
                 return 1
             else:
-                return random.choice([-1, 1])
+                return context.rng.choice([-1, 1])
 
         dx = sign(nearest_player_position.x - self.position.x)
         dy = sign(nearest_player_position.y - self.position.y)
 
         # Try to move in that direction
         possible_moves = [
-            Direction(-dx, 0),  # Horizontal away
-            Direction(0, -dy),  # Vertical away
-            Direction(-dx, -dy),  # Diagonal away
-            Direction(0, 0)  # Stay put
+            Direction.at(-dx, 0),  # Horizontal away
+            Direction.at(0, -dy),  # Vertical away
+            Direction.at(-dx, -dy),  # Diagonal away
+            Direction.at(0, 0)  # Stay put
         ]
         self.move_with_possible_directions(possible_moves, context)
 
@@ -320,9 +396,7 @@ class Deer(GameObject, ABC):
             is_deer_at_new_position = context.is_deer_at_position(new_position)
             is_player_at_new_position = context.is_player_at_position(new_position)
 
-            if 0 <= new_position.x < GameServerConfig.GRID_WIDTH \
-                    and 0 <= new_position.y < GameServerConfig.GRID_HEIGHT \
-                    and context.map.get_tile(new_position) not in [Tile.TREE, Tile.ROCK] \
+            if context.map.is_walkable(new_position) \
                     and not is_deer_at_new_position \
                     and not is_player_at_new_position:
                 self.position = new_position
@@ -333,49 +407,25 @@ class Deer(GameObject, ABC):
         Postcondition:
             - Returns a player if one is in a straight unobstructed line of sight
         """
-        direction = Direction(0, 0)
-        match self._direction:
-            case MoveDirection.UP:
-                direction = Direction(0, -1)
-            case MoveDirection.DOWN:
-                direction = Direction(0, +1)
-            case MoveDirection.LEFT:
-                direction = Direction(-1, 0)
-            case MoveDirection.RIGHT:
-                direction = Direction(+1, 0)
-
-        for i in range(1, self.visual_distance + 1):
-            position_to_check = self.position + i * direction
-
-            # Stop if we hit a boundary
-            if not (0 <= position_to_check.x < GameServerConfig.GRID_WIDTH and 0 <= position_to_check.y < GameServerConfig.GRID_HEIGHT):
-                break
+        direction = UNIT_DIRECTIONS[self._direction]
 
-            # Stop if we hit a solid obstacle
-            if context.map.get_tile(position_to_check) in [Tile.TREE, Tile.ROCK, Tile.BUSH]:
-                break
-
-            for player in context.players:
-                if player.position == position_to_check:
-                    return player
+        # Stop before the first boundary or solid obstacle
+        visual_range = min(self.visual_distance, context.map.clear_run(self.position, self._direction))
+        x, y = self.position.x, self.position.y
+        for i in range(1, visual_range + 1):
+            for game_object in context.occupancy.get_unchecked(x + i * direction.x, y + i * direction.y):
+                if isinstance(game_object, Player):
+                    return game_object
         return None
 
     def _get_nearest_player(self, context: 'GameServerContext') -> Player | None:
         """
         Postcondition:
-            - Returns the closest player based on distance metric
+            - Returns the closest player the deer can smell, i.e. closer than smell_distance, if any
         """
-        nearest_player: Player | None = None
-        for player in context.players:
-            if nearest_player is None:
-                nearest_player = player
-            else:
-                distance_to_nearest_player = (self.position - nearest_player.position).distance()
-                distance_to_current_player = (self.position - player.position).distance()
-
-                if distance_to_current_player < distance_to_nearest_player:
-                    nearest_player = player
-        return nearest_player
+        if self.smell_distance == 0:
+            return None
+        return context.player_grid.nearest(self.position, self.smell_distance - 1)
 
 
 class BlindDeer(Deer):
@@ -386,14 +436,6 @@ class BlindDeer(Deer):
         """
         super().__init__(position, 5, 7, 40)
 
-    @property
-    def position(self) -> Position:
-        return self._position
-
-    @position.setter
-    def position(self, value: Position) -> None:
-        self._position = value
-
     @property
     def direction(self) -> MoveDirection:
         return self._direction
@@ -407,14 +449,6 @@ class MediumDeer(Deer):
         """
         super().__init__(position, 6, 8, 40)
 
-    @property
-    def position(self) -> Position:
-        return self._position
-
-    @position.setter
-    def position(self, value: Position) -> None:
-        self._position = value
-
     @property
     def direction(self) -> MoveDirection:
         return self._direction
@@ -428,14 +462,6 @@ class SuperDeer(Deer):
         """
         super().__init__(position, 6, 8, 30)
 
-    @property
-    def position(self) -> Position:
-        return self._position
-
-    @position.setter
-    def position(self, value: Position) -> None:
-        self._position = value
-
     @property
     def direction(self) -> MoveDirection:
         return self._direction
@@ -450,100 +476,222 @@ def clamp(n: int, lower: int, upper: int) -> int:
 
 
 class GameServerContext:
-    def __init__(self) -> None:
+    def __init__(self, rng: random.Random | None = None, deer_count: int = GameServerConfig.DEER_COUNT,
+                 vectorized_deer: bool = GameServerConfig.VECTORIZED_DEER,
+                 grid_size: tuple[int, int] = (GameServerConfig.GRID_WIDTH, GameServerConfig.GRID_HEIGHT)) -> None:
         """
-        Postcondition:
-            - Initializes game state, players, deer, clock, and map for the current level.
-        """
-        self._clock = pygame.time.Clock()
+        Precondition:
+            - deer_count >= 0
+            - every level fits into the grid_size (width, height)
 
+        Postcondition:
+            - Initializes game state, players, and map for the current level; the deer wave is only
+              spawned once a game starts, so it does not take the tiles of joining players
+            - Every random decision of the simulation is drawn from rng, so a seeded rng makes it reproducible
+            - The maps of all its games are grid_size tiles large
+        """
+        self.rng = rng if rng is not None else random.Random()
+        self.wave_size = deer_count
+        self.vectorized_deer = vectorized_deer
+        self.grid_size = grid_size
         self.level = GameServerConfig.MIN_LEVEL
-        self._map = GameMap(level=self.level)
+        self._map = GameMap(self.level, *grid_size)
+        self._free_tiles = FreeTileSet(self._map)
+        self._occupancy = OccupancyGrid(*grid_size, self._free_tiles)
+        self._flow_field = FlowField(self._map)
+        self._player_grid = PlayerGrid(*grid_size)
 
         self._players: WeakKeyDictionary[Player, bool] = WeakKeyDictionary()
-        self._deer = self._generate_deer_wave(level=self.level)
+        self._deer: list[Deer] = []
+        self._herd: DeerHerd | None = None
 
-        self._events: list[ClientEvent] = []
-        self._game_start_time = time.time()
+        self._game_start_time = time.monotonic()
 
     def _generate_deer_wave(self, level: int) -> list[Deer]:
         """
         Precondition:
-            - GameServerConfig.MIN_LEVEL <= level <= GameServerConfig.MAX_LEVEL
+            - GameServerConfig.MIN_LEVEL <= level <= max_level()
         Postcondition:
-            - Returns a list of deer (Blind, Medium, Super) depending on level
+            - Returns a list of deer (Blind, Medium, Super) depending on level, each on a distinct
+              free tile it takes; the wave is cut short if the map runs out of free tiles
         """
-        assert GameServerConfig.MIN_LEVEL <= level <= GameServerConfig.MAX_LEVEL
-        total_deer = GameServerConfig.DEER_COUNT
+        assert GameServerConfig.MIN_LEVEL <= level <= max_level()
+        total_deer = min(self.wave_size, len(self._free_tiles))
 
         if level <= 5:
             num_blind = total_deer
             num_medium = 0
             num_super = 0
         elif level <= 13:
-            num_medium = level - 5
-            num_blind = total_deer - num_medium - 1
-            num_super = 1
+            num_super = min(1, total_deer)
+            num_medium = min(level - 5, total_deer - num_super)
+            num_blind = total_deer - num_medium - num_super
         else:
-            num_super = level - 12
+            num_super = min(level - 12, total_deer)
             num_medium = total_deer - num_super
             num_blind = 0
 
         deer_list: list[Deer] = []
-        deer_list.extend([BlindDeer(self._map.get_empty_tile()) for _ in range(num_blind)])
-        deer_list.extend([MediumDeer(self._map.get_empty_tile()) for _ in range(num_medium)])
-        deer_list.extend([SuperDeer(self._map.get_empty_tile()) for _ in range(num_super)])
+        deer_list.extend([BlindDeer(self._free_tiles.take(self.rng)) for _ in range(num_blind)])
+        deer_list.extend([MediumDeer(self._free_tiles.take(self.rng)) for _ in range(num_medium)])
+        deer_list.extend([SuperDeer(self._free_tiles.take(self.rng)) for _ in range(num_super)])
 
         return deer_list
 
-    @property
-    def clock(self) -> Clock:
-        return self._clock
+    def _spawn_deer(self, level: int) -> None:
+        """
+        Postcondition:
+            - A new deer wave for the level is either registered in the occupancy index
+              or, with vectorized_deer, simulated by a DeerHerd
+            - Every deer's entity id is its index in the wave
+        """
+        deer_list = self._generate_deer_wave(level=level)
+        for entity_id, deer in enumerate(deer_list):
+            deer.entity_id = entity_id
+        if self.vectorized_deer:
+            self._deer = []
+            self._herd = DeerHerd(self._map, deer_list, self.rng.getrandbits(64), self._free_tiles)
+        else:
+            [deer.attach(self._occupancy) for deer in deer_list]
+            self._deer = deer_list
+            self._herd = None
 
     @property
     def deer(self) -> list[Deer]:
         return self._deer
 
     @property
-    def players(self) -> WeakKeyDictionary[Player, bool]:
-        return self._players
+    def herd(self) -> DeerHerd | None:
+        return self._herd
 
     @property
-    def events(self) -> list[ClientEvent]:
-        return self._events
+    def players(self) -> WeakKeyDictionary[Player, bool]:
+        return self._players
 
     @property
     def map(self) -> GameMap:
         return self._map
 
+    @property
+    def occupancy(self) -> OccupancyGrid:
+        return self._occupancy
+
+    @property
+    def free_tiles(self) -> FreeTileSet:
+        return self._free_tiles
+
+    @property
+    def flow_field(self) -> FlowField:
+        """
+        Postcondition:
+            - Returns the walking distances to the nearest player as of the last track_players
+        """
+        return self._flow_field
+
+    @property
+    def player_grid(self) -> PlayerGrid:
+        """
+        Postcondition:
+            - Returns the index of the players by position as of the last track_players
+        """
+        return self._player_grid
+
+    def track_players(self) -> None:
+        """
+        Postcondition:
+            - The player grid and the flow field follow the current player positions; the flow field
+              is searched when a deer first flees
+        """
+        self._player_grid.update(self.players)
+        self._flow_field.update([player.position for player in self.players])
+
+    def take_free_tile(self) -> Position:
+        """
+        Precondition:
+            - len(self.free_tiles) > 0
+
+        Postcondition:
+            - Returns a random EMPTY tile no player or deer stands on, drawn from rng, and takes it
+              so the next spawn cannot land on it
+        """
+        return self._free_tiles.take(self.rng)
+
+    def add_player(self, player: Player) -> None:
+        """
+        Postcondition:
+            - Player is part of the context and registered in the occupancy index and player grid
+        """
+        self._players[player] = True
+        player.attach(self._occupancy)
+        self._player_grid.add(player)
+
+    def remove_player(self, player: Player) -> None:
+        """
+        Postcondition:
+            - Player is no longer part of the context nor of the occupancy index and player grid
+        """
+        player.detach()
+        self._player_grid.remove(player)
+        del self._players[player]
+
     def is_player_at_position(self, new_position: Position) -> bool:
-        for player in self.players:
-            if player.position == new_position:
+        for game_object in self._occupancy.get(new_position):
+            if isinstance(game_object, Player):
                 return True
         return False
 
     def is_deer_at_position(self, new_position: Position) -> bool:
-        for deer in self.deer:
-            if deer.position == new_position:
+        for game_object in self._occupancy.get(new_position):
+            if isinstance(game_object, Deer):
                 return True
-        return False
+        return self._herd is not None and self._herd.is_deer_at(new_position)
 
-    def reset(self, level: int):
+    def deer_count(self) -> int:
+        return len(self._deer) + (len(self._herd) if self._herd is not None else 0)
+
+    def player_states(self) -> dict[int, EntityState]:
+        """
+        Postcondition:
+            - Returns position and direction of every player, keyed by its entity id
+        """
+        return {player.entity_id: (player.position.x, player.position.y, player.direction.name) for player in self.players}
+
+    def deer_states(self) -> dict[int, EntityState]:
+        """
+        Postcondition:
+            - Returns position and direction of every deer, keyed by its entity id
+        """
+        if self._herd is not None:
+            return self._herd.states()
+        return {deer.entity_id: (deer.position.x, deer.position.y, deer.direction.name) for deer in self.deer}
+
+    def state_digest(self) -> str:
+        """
+        Postcondition:
+            - Returns a hash of the positions and directions of all players and deer
+        """
+        states = (sorted(self.player_states().items()), sorted(self.deer_states().items()))
+        return hashlib.sha256(repr(states).encode()).hexdigest()
+
+    def reset(self, level: int, seed: int):
         """
         Precondition:
-            - GameServerConfig.MIN_LEVEL <= level <= GameServerConfig.MAX_LEVEL
+            - GameServerConfig.MIN_LEVEL <= level <= max_level()
         Postcondition:
             - Context is reset with new map, deer, and player states for the given level.
+            - The rng is reseeded with seed first, so the new game only depends on seed, level and the players
         """
-        assert GameServerConfig.MIN_LEVEL <= level <= GameServerConfig.MAX_LEVEL
+        assert GameServerConfig.MIN_LEVEL <= level <= max_level()
+        self.rng.seed(seed)
         self.level = level
-        self._map = GameMap(level=self.level)
+        self._map = GameMap(self.level, *self.grid_size)
+        self._free_tiles.reset(self._map)
+        self._occupancy.clear()
+        self._flow_field = FlowField(self._map)
 
         [player.reset() for player in self.players]
-        [player.set_position(self.map.get_empty_tile()) for player in self.players]
-        self._deer = self._generate_deer_wave(level=self.level)
-
-        self._events: list[ClientEvent] = []
+        [player.set_position(self.take_free_tile()) for player in self.players]
+        self._spawn_deer(level=self.level)
 
     @property
     def game_start_time(self):
@@ -560,125 +708,382 @@ class GameServerState(StrEnum):
     FINISHED = 'FINISHED'
 
 
-class GameServer(Server):
-    channelClass = Player
-
-    def __init__(self, config: GameServerConfig) -> None:
+class GameRoom:
+    def __init__(self, room_id: int, profiler: TickProfiler | None = None, context: GameServerContext | None = None,
+                 capacity: int = GameServerConfig.MAX_PLAYERS_PER_ROOM, input_log: InputLogWriter | None = None,
+                 grid_size: tuple[int, int] = (GameServerConfig.GRID_WIDTH, GameServerConfig.GRID_HEIGHT)) -> None:
         """
+        Precondition:
+            - capacity > 0
+            - every level fits into the grid_size (width, height)
+
         Postcondition:
-            - Server initialized and ready in LEVEL_SELECTION state.
-        """
-        super().__init__(localaddr=config.host)
-        pygame.init()
-        self.config: GameServerConfig = config
-        self.context: GameServerContext = GameServerContext()
-        print('Server Launched')
+            - Room initialized with the given or its own context and ready in LEVEL_SELECTION state.
+              Its own context plays on grid_size maps, a given context keeps its grid size
+            - The phases of its updates are timed by profiler, if given
+            - At most capacity players can join
+            - Its matches are recorded to input_log, if given, so they can be replayed
+        """
+        assert capacity > 0
+        self.room_id = room_id
+        self.capacity = capacity
+        self.profiler = profiler if profiler is not None else TickProfiler(1 / GameServerConfig.FRAME_RATE)
+        self.context: GameServerContext = context if context is not None else GameServerContext(grid_size=grid_size)
         self.passed_time = 0  # in ms
         self.state = GameServerState.LEVEL_SELECTION
+        self.remaining_ticks = 0
+        self.tick_number = 0  # updates since the game started
+        self.input_log = input_log
+        self._snapshots = SnapshotHistory()
 
-    def Connected(self, player: Player, address: Any) -> None:
-        """
-        Postcondition:
-            - Adds player to game if server is in level selection phase.
-        """
-        if self.state != GameServerState.LEVEL_SELECTION:
-            player.Close()
-        position = self.context.map.get_empty_tile()
-        player.set_position(position)
-        self.add_player(player)
+    def __repr__(self) -> str:
+        return f'GameRoom({self.room_id}, {self.state})'
 
-    def add_player(self, player) -> None:
+    def is_empty(self) -> bool:
+        return len(self.context.players) == 0
+
+    def is_joinable(self) -> bool:
+        return self.state == GameServerState.LEVEL_SELECTION and len(self.context.players) < self.capacity and len(self.context.free_tiles) > 0
+
+    def add_player(self, player: Player) -> None:
         """
+        Precondition:
+            - self.is_joinable()
         Postcondition:
-            - Registers player in the context
+            - Player is placed on an empty tile and registered in the room's context
         """
-        print(f'New Player {str(player.addr)}')
-        self.context.players[player] = True
-        print(f'players: {[player for player in self.context.players]}')
+        assert self.is_joinable()
+        player.room = self
+        taken_ids = {other.entity_id for other in self.context.players}
+        player.entity_id = next(entity_id for entity_id in range(len(taken_ids) + 1) if entity_id not in taken_ids)
+        player.acked_sequence = None
+        player.set_position(self.context.take_free_tile())
+        self.context.add_player(player)
 
     def remove_player(self, player: Player) -> None:
         """
         Postcondition:
-            - Removes player from context
+            - Removes player from the room's context
         """
-        print(f'Removing Player {str(player.addr)}')
-        del self.context.players[player]
+        if self.input_log is not None and self.state == GameServerState.PLAYING:
+            self.input_log.player_left(self.room_id, self.tick_number, player.entity_id)
+        self.context.remove_player(player)
+        player.room = None
+        player.entity_id = None
 
     def send_to_all(self, data: dict[str, Any]) -> None:
         """
         Postcondition:
-            - Broadcasts data to all connected players
+            - Broadcasts data to all players in the room
         """
         [player.Send(data) for player in self.context.players]
 
     def send_score(self):
         """
         Postcondition:
-            - Sends score to all players
+            - Sends score to all players in the room
         """
         [player.Send({'action': 'score', 'score': len(player.deer_photographed) if not player.has_photographed_player else -1}) for player in self.context.players]
 
     def is_level_reset_allowed(self) -> bool:
         return self.state == GameServerState.LEVEL_SELECTION
 
-    def start_game(self, level: int) -> None:
+    def start_game(self, level: int, seed: int | None = None) -> None:
         """
         Precondition:
-            - GameServerConfig.MIN_LEVEL <= level <= GameServerConfig.MAX_LEVEL
+            - GameServerConfig.MIN_LEVEL <= level <= max_level()
         Postcondition:
             - Starts game and transitions to PLAYING state
-        """
-        assert GameServerConfig.MIN_LEVEL <= level <= GameServerConfig.MAX_LEVEL
-        self.context.reset(level)
+            - The game's random decisions follow seed, or a seed drawn from the context's rng if not given
+        """
+        assert GameServerConfig.MIN_LEVEL <= level <= max_level()
+        if seed is None:
+            seed = self.context.rng.getrandbits(64)
+        self.context.reset(level, seed)
+        self.tick_number = 0
+        if self.input_log is not None:
+            self.input_log.match_started(self.room_id, seed, level, self.context.grid_size, self.context.wave_size,
+                                         self.context.vectorized_deer, [player.entity_id for player in self.context.players])
+        # The new deer wave reuses entity ids, so no snapshot of the previous game may serve as a baseline
+        self._snapshots.clear()
         self.state = GameServerState.PLAYING
-        self.context.game_start_time = time.time()
-        self.send_to_all({
+        self.context.game_start_time = time.monotonic()
+        self.remaining_ticks = GameServerConfig.GAME_DURATION * GameServerConfig.FRAME_RATE
+        width, height = self.context.grid_size
+        # Every player learns its own entity id, which the client's camera follows
+        [player.Send({
             'action': 'game_started',
             'level': level,
-        })
+            'width': width,
+            'height': height,
+            'entity_id': player.entity_id,
+        }) for player in self.context.players]
 
     def update(self, dt: int) -> None:
         """
         Postcondition:
             - Processes events, updates all objects, and sends game state to clients
         """
-        ClientEvent.remove_duplicate_client_events(self.context.events)
-
-        [player.handle_events(self.context.events, self.context) for player in self.context.players]
-        [deer.handle_events(self.context.events, self.context) for deer in self.context.deer]
+        start = self.profiler.now()
+        [player.handle_events(self.context) for player in self.context.players]
+        [deer.handle_events(self.context) for deer in self.context.deer]
+        start = self.profiler.lap('handle_events', start)
 
         [player.update(dt, self.context) for player in self.context.players]
+        self.context.track_players()
         [deer.update(dt, self.context) for deer in self.context.deer]
+        if self.context.herd is not None:
+            self.context.herd.update([player.position for player in self.context.players], self.context.flow_field)
+        start = self.profiler.lap('deer_update', start)
+
+        self.send_state_update()
+        self.profiler.lap('state_update', start)
+        self.tick_number += 1
+
+    def record_inputs(self, player: Player, events: list[ClientEvent]) -> None:
+        """
+        Postcondition:
+            - The events the player applies in the current tick are recorded to the input log, if any
+        """
+        if self.input_log is not None:
+            self.input_log.inputs(self.room_id, self.tick_number, player.entity_id, events)
+
+    def send_state_update(self) -> None:
+        """
+        Postcondition:
+            - Records a snapshot of the room and sends each player the changes since the snapshot it acked last
+            - Congested players are skipped; they catch up with a larger delta once their connection drains
+        """
+        player_states, deer_states = self.context.player_states(), self.context.deer_states()
+        views = self._views(player_states, deer_states) if GameServerConfig.INTEREST_AREA is not None else None
+        snapshot = self._snapshots.record(player_states, deer_states, views)
+        time_left = self.remaining_ticks / GameServerConfig.FRAME_RATE
+        for player in self.context.players:
+            if player.is_congested:
+                continue
+            player.Send({
+                'action': 'state_update',
+                'message': {**self._snapshots.message(snapshot, player.acked_sequence, player.entity_id), 'time_left': time_left}
+            })
+
+    def _views(self, player_states: dict[int, EntityState], deer_states: dict[int, EntityState]) -> dict[int, View]:
+        """
+        Postcondition:
+            - Returns the ids of the players and deer within GameServerConfig.INTEREST_AREA of each player
+        """
+        half_width, half_height = GameServerConfig.INTEREST_AREA
+        player_grid, deer_grid = InterestGrid(player_states), InterestGrid(deer_states)
+        return {
+            entity_id: (player_grid.query(x, y, half_width, half_height), deer_grid.query(x, y, half_width, half_height))
+            for entity_id, (x, y, _) in player_states.items()
+        }
+
+    def tick(self, dt: int) -> None:
+        """
+        Postcondition:
+            - Advances the room's state machine by one fixed step of dt ms; a game lasts
+              GameServerConfig.GAME_DURATION * GameServerConfig.FRAME_RATE steps
+        """
+        if self.state == GameServerState.PLAYING:
+            self.passed_time = dt
+            self.remaining_ticks -= 1
+            self.update(dt)
+
+            if self.remaining_ticks <= 0:
+                self.state = GameServerState.FINISHED
+                if self.input_log is not None:
+                    self.input_log.match_finished(self.room_id, self.tick_number, self.context.state_digest())
+
+        elif self.state == GameServerState.FINISHED:
+            self.send_score()
+            self.state = GameServerState.LEVEL_SELECTION
+
+    def is_active(self) -> bool:
+        """
+        Postcondition:
+            - Returns True while the room needs ticks, i.e. is not waiting for a level selection
+        """
+        return self.state != GameServerState.LEVEL_SELECTION
+
+
+class GameServer:
+    channelClass = Player
 
-        self.context.events.clear()
+    def __init__(self, config: GameServerConfig) -> None:
+        """
+        Postcondition:
+            - Server initialized without rooms; rooms are opened as players connect.
+        """
+        self.config: GameServerConfig = config
+        self.channels: list[Player] = []
+        self.rooms: dict[int, GameRoom] = {}
+        self._next_room_id = 0
+        self._wakeup: asyncio.Event | None = None
+        self.scheduler = FixedTimestepScheduler(GameServerConfig.FRAME_RATE, GameServerConfig.MAX_CATCH_UP_STEPS)
+        # Metrics report tick durations, so ticks are profiled whenever metrics are served
+        self.profiler = TickProfiler(1 / GameServerConfig.FRAME_RATE, GameServerConfig.PROFILE_TICKS or config.metrics_address is not None)
+        self.traffic = TrafficCounter()
+        self.dropped_messages: dict[str, int] = {}
+        self.abusive_disconnects = 0
+        self.input_log = InputLogWriter(config.input_log_path) if config.input_log_path is not None else None
+
+    def Connected(self, player: Player, address: Any) -> None:
+        """
+        Postcondition:
+            - Adds player to a room in level selection phase, opening a new room if none is joinable.
+            - Rejects the player if GameServerConfig.MAX_ROOMS rooms are open and none is joinable.
+        """
+        self.channels.append(player)
+        room = self._find_joinable_room()
+        if room is None:
+            print(f'Rejecting Player {str(player.addr)}: server full')
+            player.Send({'action': 'error', 'error': 'server full'})
+            player.close()
+            return
+        self.add_player(player, room)
+
+    def _find_joinable_room(self) -> GameRoom | None:
+        """
+        Postcondition:
+            - Returns a joinable room, opening a new one if needed and GameServerConfig.MAX_ROOMS allows it
+        """
+        for room in self.rooms.values():
+            if room.is_joinable():
+                return room
+
+        if len(self.rooms) >= GameServerConfig.MAX_ROOMS:
+            return None
 
-        self.send_to_all({
-            'action': 'state_update',
-            'message': {
-                'players': [{'x': player.position.x, 'y': player.position.y, 'direction': player.direction.name} for player in self.context.players],
-                'deer': [{'x': deer.position.x, 'y': deer.position.y, 'direction': deer.direction.name} for deer in self.context.deer],
-                'time_left': self.context.game_start_time + GameServerConfig.GAME_DURATION - time.time()
-            }
-        })
+        room = GameRoom(self._next_room_id, self.profiler, input_log=self.input_log, grid_size=self.config.grid_size)
+        self._next_room_id += 1
+        self.rooms[room.room_id] = room
+        return room
+
+    def add_player(self, player: Player, room: GameRoom) -> None:
+        """
+        Postcondition:
+            - Registers player in the given room
+        """
+        print(f'New Player {str(player.addr)} in room {room.room_id}')
+        room.add_player(player)
+        print(f'players: {[player for player in room.context.players]}')
+
+    def remove_player(self, player: Player) -> None:
+        """
+        Postcondition:
+            - Removes player from its room, and closes the room once it is empty
+        """
+        if player in self.channels:
+            self.channels.remove(player)
+
+        room = player.room
+        if room is None:
+            return
+        print(f'Removing Player {str(player.addr)} from room {room.room_id}')
+        room.remove_player(player)
+        if room.is_empty():
+            del self.rooms[room.room_id]
+
+    def message_dropped(self, action: str | None) -> None:
+        """
+        Postcondition:
+            - Counts a message a channel dropped for exceeding its rate limit
+        """
+        self.dropped_messages[str(action)] = self.dropped_messages.get(str(action), 0) + 1
+
+    def accept_connection(self, connection: socket.socket, address: Any) -> None:
+        """
+        Precondition:
+            - connection is a connected client socket accepted by another process
+            - called from within the running event loop
+        Postcondition:
+            - The connection is served like one accepted by this server's own listening socket
+        """
+        loop = asyncio.get_running_loop()
+        loop.create_task(loop.connect_accepted_socket(lambda: self.channelClass(server=self), connection))
+
+    def load(self) -> dict[str, int]:
+        """
+        Postcondition:
+            - Returns the number of rooms, players and free slots in joinable rooms
+        """
+        return {
+            'rooms': len(self.rooms),
+            'players': sum(len(room.context.players) for room in self.rooms.values()),
+            'open_slots': sum(room.capacity - len(room.context.players) for room in self.rooms.values() if room.is_joinable()),
+        }
+
+    def wake(self) -> None:
+        """
+        Postcondition:
+            - The tick loop re-evaluates when the next room needs a tick, e.g. after a game started
+        """
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    def update(self, dt: int) -> None:
+        """
+        Postcondition:
+            - Advances every room by one fixed step of dt ms, and writes what the input log recorded in it
+        """
+        start = self.profiler.now()
+        [room.tick(dt) for room in list(self.rooms.values())]
+        if self.input_log is not None:
+            self.input_log.flush()
+        self.profiler.tick_finished(start)
+
+    def toggle_profiling(self) -> None:
+        """
+        Postcondition:
+            - Tick profiling is switched on or off, the report so far is printed when it is switched off
+        """
+        self.profiler.toggle()
+        print(f'Tick profiling {"enabled" if self.profiler.is_enabled else "disabled"}')
+        if not self.profiler.is_enabled:
+            print(self.profiler.report())
 
     def run(self) -> None:
         """
         Postcondition:
-            - Runs the server main loop and updates state based on time and progression.
+            - Runs the server on an asyncio event loop until interrupted.
+        """
+        asyncio.run(self.serve())
+
+    async def serve(self, listen: bool = True) -> None:
         """
+        Postcondition:
+            - Accepts connections on config.host if listen is set, and updates the rooms in fixed steps
+              of 1 / GameServerConfig.FRAME_RATE seconds, catching up after a slow step;
+              the loop sleeps while no room needs a tick instead of polling
+        """
+        self._wakeup = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        try:
+            # kill -USR1 switches tick profiling on and off, kill -USR2 prints the report so far
+            loop.add_signal_handler(signal.SIGUSR1, self.toggle_profiling)
+            loop.add_signal_handler(signal.SIGUSR2, lambda: print(self.profiler.report()))
+        except (AttributeError, NotImplementedError, RuntimeError):
+            pass  # no POSIX signals on this platform or not in the main thread
+        if self.config.metrics_address is not None:
+            await MetricsEndpoint(self).start(self.config.metrics_address)
+        if listen:
+            host, port = self.config.host
+            await loop.create_server(lambda: self.channelClass(server=self), host, port)
+        print('Server Launched')
+
         while True:
-            if self.state == GameServerState.LEVEL_SELECTION:
-                self.Pump()
-                time.sleep(0.001)
-            if self.state == GameServerState.PLAYING:
-                print(self.context.game_start_time + GameServerConfig.GAME_DURATION - time.time())
-                self.Pump()
-                self.update(self.passed_time)
-                self.passed_time = self.context.clock.tick(GameServerConfig.FRAME_RATE)
-
-                if time.time() >= self.context.game_start_time + GameServerConfig.GAME_DURATION:
-                    self.state = GameServerState.FINISHED
-
-            elif self.state == GameServerState.FINISHED:
-                self.send_score()
-                self.state = GameServerState.LEVEL_SELECTION
+            is_any_room_active = any(room.is_active() for room in self.rooms.values())
+            if is_any_room_active and not self.scheduler.is_running:
+                self.scheduler.start()
+            elif not is_any_room_active:
+                self.scheduler.stop()
+
+            for _ in range(self.scheduler.due_steps()):
+                self.update(self.scheduler.step_ms)
+
+            timeout = self.scheduler.time_until_next_step()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout)
+            except TimeoutError:
+                pass
+            self._wakeup.clear()
@@ -0,0 +1,154 @@
+import random
+import time
+from typing import Any
+
+from src.core.codec import encode_frame
+from src.core.config import GameServerConfig
+from src.core.event import ClientEvent
+from src.core.type import MOVE_DIRECTIONS
+from src.server.game_server import GameRoom, GameServerContext, Player
+from src.server.input_log import RecordedMatch, read_input_log
+from src.server.profiler import TickProfiler
+
+
+class VirtualPlayer(Player):
+    def __init__(self, encode: bool = True) -> None:
+        """
+        Postcondition:
+            - Player without a connection that acks every state update at once
+            - With encode, every message sent to it is encoded like for a binary codec client and counted in traffic
+        """
+        super().__init__()
+        self.encode = encode
+
+    def Send(self, data: dict[str, Any]) -> int:
+        if data.get('action') == 'state_update':
+            self.acked_sequence = data['message']['sequence']
+        size = len(encode_frame(data)) if self.encode else 0
+        self.traffic.messages_out += 1
+        self.traffic.bytes_out += size
+        return size
+
+
+class HeadlessSimulation:
+    def __init__(self, level: int = GameServerConfig.MIN_LEVEL, player_count: int = 1, deer_count: int = GameServerConfig.DEER_COUNT,
+                 seed: int = 0, vectorized_deer: bool = GameServerConfig.VECTORIZED_DEER, encode: bool = True,
+                 grid_size: tuple[int, int] = (GameServerConfig.GRID_WIDTH, GameServerConfig.GRID_HEIGHT)) -> None:
+        """
+        Precondition:
+            - GameServerConfig.MIN_LEVEL <= level <= max_level()
+            - player_count >= 0 and deer_count >= 0
+
+        Postcondition:
+            - A room plays the level on a grid_size map with player_count virtual players and deer_count deer, without any networking
+            - The simulation and the virtual players' inputs are drawn from RNGs seeded with seed,
+              so two simulations with the same arguments step through identical states
+        """
+        assert player_count >= 0
+        rng = random.Random(seed)
+        self._input_rng = random.Random(rng.getrandbits(64))
+        self.context = GameServerContext(rng=rng, deer_count=deer_count, vectorized_deer=vectorized_deer, grid_size=grid_size)
+        self.room = GameRoom(0, context=self.context, capacity=max(player_count, 1))
+        self.players = [VirtualPlayer(encode) for _ in range(player_count)]
+        [self.room.add_player(player) for player in self.players]
+        self.room.start_game(level)
+        self.tick_count = 0
+
+    def send_inputs(self) -> None:
+        """
+        Postcondition:
+            - Every virtual player sends a move in a random direction with 60% chance
+              and takes a picture with 5% chance, like a player holding the arrow keys
+        """
+        for player in self.players:
+            if self._input_rng.random() < 0.6:
+                player.Network_move({'move_direction': self._input_rng.choice(MOVE_DIRECTIONS).name})
+            if self._input_rng.random() < 0.05:
+                player.Network_take_picture({})
+
+    def step(self, ticks: int = 1) -> None:
+        """
+        Postcondition:
+            - The room is updated ticks times, each after the virtual players sent their inputs;
+              the game does not end however many ticks are stepped
+        """
+        dt = 1000 // GameServerConfig.FRAME_RATE
+        for _ in range(ticks):
+            self.send_inputs()
+            self.room.update(dt)
+            self.tick_count += 1
+
+    def state_digest(self) -> str:
+        """
+        Postcondition:
+            - Returns a hash of the positions and directions of all players and deer
+        """
+        return self.context.state_digest()
+
+
+class MatchReplay:
+    def __init__(self, match: RecordedMatch, profiler: TickProfiler | None = None, encode: bool = False) -> None:
+        """
+        Postcondition:
+            - A room with one virtual player per recorded player starts the match with its recorded seed
+            - The phases of its ticks are timed by profiler, if given
+        """
+        self.match = match
+        self.context = GameServerContext(deer_count=match.deer_count, vectorized_deer=match.vectorized_deer, grid_size=match.grid_size)
+        self.room = GameRoom(match.room_id, profiler, self.context, capacity=max(len(match.entity_ids), 1))
+        self.players: dict[int, VirtualPlayer] = {}
+        for entity_id in match.entity_ids:
+            player = self.players[entity_id] = VirtualPlayer(encode)
+            self.room.add_player(player)
+            player.entity_id = entity_id
+        self.room.start_game(match.level, match.seed)
+
+    def step(self) -> None:
+        """
+        Postcondition:
+            - The room is updated once, after the players that left before this tick were removed
+              and the remaining ones sent the inputs recorded for it
+        """
+        start = self.room.profiler.now()
+        tick = self.room.tick_number
+        for entity_id in self.match.departures.get(tick, []):
+            self.room.remove_player(self.players.pop(entity_id))
+        for entity_id, move_direction in self.match.inputs.get(tick, []):
+            player = self.players[entity_id]
+            player.inputs.push(ClientEvent(player.player_id, move_direction, move_direction is None))
+        self.room.update(1000 // GameServerConfig.FRAME_RATE)
+        self.room.profiler.tick_finished(start)
+
+    def run(self) -> bool | None:
+        """
+        Postcondition:
+            - The whole match is replayed
+            - Returns whether the final state matches the recorded one, None if the match was not recorded to its end
+        """
+        while self.room.tick_number < self.match.length():
+            self.step()
+        if self.match.digest is None:
+            return None
+        return bytes.fromhex(self.context.state_digest())[:len(self.match.digest)] == self.match.digest
+
+
+def replay_input_log(path: str) -> bool:
+    """
+    Postcondition:
+        - Replays every match of the input log at path and prints its speed, whether it reproduced
+          the recorded final state and a profile of its ticks
+        - Returns False if any finished match diverged
+    """
+    is_reproduced = True
+    for match in read_input_log(path):
+        profiler = TickProfiler(1 / GameServerConfig.FRAME_RATE, is_enabled=True)
+        replay = MatchReplay(match, profiler)
+        start = time.perf_counter()
+        result = replay.run()
+        duration = time.perf_counter() - start
+        real_time = match.length() / GameServerConfig.FRAME_RATE
+        status = {True: 'state reproduced', False: 'STATE DIVERGED', None: 'unfinished, no state to compare'}[result]
+        print(f'{match}: {status}, {match.length() / max(duration, 1e-9):.0f} ticks/s, {real_time / max(duration, 1e-9):.0f}x real time')
+        print(profiler.report())
+        is_reproduced = is_reproduced and result is not False
+    return is_reproduced
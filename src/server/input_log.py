@@ -0,0 +1,169 @@
+import struct
+from typing import BinaryIO
+
+from src.core.enum import MoveDirection
+from src.core.event import ClientEvent
+from src.core.type import DIRECTION_CODES, MOVE_DIRECTIONS
+
+# Version of the input log format, written after the magic bytes at the start of a log
+INPUT_LOG_VERSION = 2
+_FILE_HEADER = struct.Struct('<4sB')
+_MAGIC = b'DPIL'
+
+# Every record starts with its kind and the id of the room it belongs to
+_RECORD_HEADER = struct.Struct('<BI')
+
+_KIND_MATCH_STARTED = 0
+_KIND_INPUT = 1
+_KIND_PLAYER_LEFT = 2
+_KIND_MATCH_FINISHED = 3
+
+_MATCH_STARTED = struct.Struct('<QBHHI?H')  # seed, level, grid width and height, deer count, vectorized deer, player count; then the player ids
+_ENTITY_ID = struct.Struct('<H')
+_INPUT = struct.Struct('<IHB')  # tick, player id, event code
+_PLAYER_LEFT = struct.Struct('<IH')  # tick, player id
+_MATCH_FINISHED = struct.Struct('<I8s')  # ticks, prefix of the final state digest
+
+_PICTURE_CODE = len(MOVE_DIRECTIONS)  # codes below it are move directions
+
+
+def _event_code(event: ClientEvent) -> int:
+    return _PICTURE_CODE if event.take_picture else DIRECTION_CODES[event.move_direction]
+
+
+class InputLogWriter:
+    def __init__(self, path: str) -> None:
+        """
+        Postcondition:
+            - Appends records to the log at path, which is created with a header if it does not exist yet
+        """
+        self._file: BinaryIO = open(path, 'ab')
+        if self._file.tell() == 0:
+            self._file.write(_FILE_HEADER.pack(_MAGIC, INPUT_LOG_VERSION))
+
+    def match_started(self, room_id: int, seed: int, level: int, grid_size: tuple[int, int], deer_count: int, vectorized_deer: bool,
+                      entity_ids: list[int]) -> None:
+        """
+        Precondition:
+            - entity_ids are the players of the room in the order the room updates them
+
+        Postcondition:
+            - Records the start of a match, from which a room with the same players replays it
+        """
+        self._file.write(_RECORD_HEADER.pack(_KIND_MATCH_STARTED, room_id)
+                         + _MATCH_STARTED.pack(seed, level, *grid_size, deer_count, vectorized_deer, len(entity_ids))
+                         + b''.join(_ENTITY_ID.pack(entity_id) for entity_id in entity_ids))
+
+    def inputs(self, room_id: int, tick: int, entity_id: int, events: list[ClientEvent]) -> None:
+        """
+        Postcondition:
+            - Records the events the player's inputs applied in the tick, in order
+        """
+        for event in events:
+            self._file.write(_RECORD_HEADER.pack(_KIND_INPUT, room_id) + _INPUT.pack(tick, entity_id, _event_code(event)))
+
+    def player_left(self, room_id: int, tick: int, entity_id: int) -> None:
+        """
+        Postcondition:
+            - Records that the player left the match before the tick
+        """
+        self._file.write(_RECORD_HEADER.pack(_KIND_PLAYER_LEFT, room_id) + _PLAYER_LEFT.pack(tick, entity_id))
+
+    def match_finished(self, room_id: int, ticks: int, digest: str) -> None:
+        """
+        Precondition:
+            - digest is the hex state digest of the room's context after its last tick
+
+        Postcondition:
+            - Records the end of the match after ticks ticks, with the state it ended in
+        """
+        self._file.write(_RECORD_HEADER.pack(_KIND_MATCH_FINISHED, room_id) + _MATCH_FINISHED.pack(ticks, bytes.fromhex(digest)[:8]))
+
+    def flush(self) -> None:
+        self._file.flush()
+
+    def close(self) -> None:
+        self._file.close()
+
+
+class RecordedMatch:
+    def __init__(self, room_id: int, seed: int, level: int, grid_size: tuple[int, int], deer_count: int, vectorized_deer: bool,
+                 entity_ids: list[int]) -> None:
+        """
+        Postcondition:
+            - Match as recorded at its start, without inputs yet
+        """
+        self.room_id = room_id
+        self.seed = seed
+        self.level = level
+        self.grid_size = grid_size
+        self.deer_count = deer_count
+        self.vectorized_deer = vectorized_deer
+        self.entity_ids = entity_ids
+        # tick -> (player id, move direction or None for a picture) in the order the events were applied
+        self.inputs: dict[int, list[tuple[int, MoveDirection | None]]] = {}
+        self.departures: dict[int, list[int]] = {}  # tick -> ids of the players that left before it
+        self.ticks: int | None = None  # None if the log ends before the match finished
+        self.digest: bytes | None = None
+
+    def __repr__(self) -> str:
+        return f'RecordedMatch(room {self.room_id}, level {self.level}, {len(self.entity_ids)} players, {self.length()} ticks)'
+
+    def length(self) -> int:
+        """
+        Postcondition:
+            - Returns the number of ticks the match ran, or for an unfinished match up to its last recorded tick
+        """
+        if self.ticks is not None:
+            return self.ticks
+        return max([tick + 1 for tick in self.inputs] + [tick for tick in self.departures] + [0])
+
+
+def read_input_log(path: str) -> list[RecordedMatch]:
+    """
+    Precondition:
+        - path is an input log written by InputLogWriter
+
+    Postcondition:
+        - Returns the recorded matches in the order they started; a truncated last record is ignored
+    """
+    with open(path, 'rb') as file:
+        buffer = file.read()
+
+    magic, version = _FILE_HEADER.unpack_from(buffer)
+    if magic != _MAGIC or version != INPUT_LOG_VERSION:
+        raise ValueError(f'{path} is not an input log of version {INPUT_LOG_VERSION}')
+
+    matches: list[RecordedMatch] = []
+    playing: dict[int, RecordedMatch] = {}  # room id -> match in progress
+    offset = _FILE_HEADER.size
+    try:
+        while offset < len(buffer):
+            kind, room_id = _RECORD_HEADER.unpack_from(buffer, offset)
+            offset += _RECORD_HEADER.size
+            if kind == _KIND_MATCH_STARTED:
+                seed, level, width, height, deer_count, vectorized_deer, player_count = _MATCH_STARTED.unpack_from(buffer, offset)
+                offset += _MATCH_STARTED.size
+                entity_ids = list(struct.unpack_from(f'<{player_count}H', buffer, offset))
+                offset += _ENTITY_ID.size * player_count
+                match = playing[room_id] = RecordedMatch(room_id, seed, level, (width, height), deer_count, vectorized_deer, entity_ids)
+                matches.append(match)
+            elif kind == _KIND_INPUT:
+                tick, entity_id, code = _INPUT.unpack_from(buffer, offset)
+                offset += _INPUT.size
+                move_direction = MOVE_DIRECTIONS[code] if code != _PICTURE_CODE else None
+                playing[room_id].inputs.setdefault(tick, []).append((entity_id, move_direction))
+            elif kind == _KIND_PLAYER_LEFT:
+                tick, entity_id = _PLAYER_LEFT.unpack_from(buffer, offset)
+                offset += _PLAYER_LEFT.size
+                playing[room_id].departures.setdefault(tick, []).append(entity_id)
+            elif kind == _KIND_MATCH_FINISHED:
+                ticks, digest = _MATCH_FINISHED.unpack_from(buffer, offset)
+                offset += _MATCH_FINISHED.size
+                match = playing.pop(room_id)
+                match.ticks, match.digest = ticks, digest
+            else:
+                raise ValueError(f'Unknown record kind {kind} at offset {offset - _RECORD_HEADER.size} of {path}')
+    except struct.error:
+        pass  # the server was stopped while writing the last record
+    return matches
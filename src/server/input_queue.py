@@ -0,0 +1,49 @@
+from src.core.event import ClientEvent
+
+
+class InputQueue:
+    def __init__(self) -> None:
+        """
+        Postcondition:
+            - Empty queue for the client events of one player; it holds at most the first move and
+              the first picture request that arrive between two ticks, so it never grows and never
+              pushes out an event the tick would apply
+        """
+        self._events: list[ClientEvent] = []
+        self._has_move = False
+        self._has_picture = False
+
+    def __len__(self) -> int:
+        return len(self._events)
+
+    def push(self, event: ClientEvent) -> None:
+        """
+        Postcondition:
+            - event waits for the next tick if it is the first move or the first picture request
+              since the last drain, otherwise it is dropped
+        """
+        if event.take_picture:
+            if self._has_picture:
+                return
+            self._has_picture = True
+        else:
+            if self._has_move:
+                return
+            self._has_move = True
+        self._events.append(event)
+
+    def drain(self) -> list[ClientEvent]:
+        """
+        Postcondition:
+            - Returns the events to apply this tick in arrival order: the first move and
+              the first picture request
+            - The queue is empty
+        """
+        events = self._events
+        self.clear()
+        return events
+
+    def clear(self) -> None:
+        self._events = []
+        self._has_move = False
+        self._has_picture = False
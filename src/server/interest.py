@@ -0,0 +1,31 @@
+from src.server.cell_grid import CellGrid
+from src.server.snapshot import EntityState
+
+
+class InterestGrid:
+    def __init__(self, states: dict[int, EntityState]) -> None:
+        """
+        Postcondition:
+            - Every entity id is bucketed by the coarse cell its position falls into,
+              so view queries only visit the cells overlapping the view
+        """
+        self._states = states
+        self._grid = CellGrid()
+        for entity_id, (x, y, _) in states.items():
+            self._grid.add(CellGrid.cell(x, y), entity_id)
+
+    def query(self, x: int, y: int, half_width: int, half_height: int) -> set[int]:
+        """
+        Precondition:
+            - half_width >= 0 and half_height >= 0
+
+        Postcondition:
+            - Returns the ids of the entities within half_width columns and half_height rows of (x, y)
+        """
+        visible: set[int] = set()
+        for entity_ids in self._grid.in_rectangle(x, y, half_width, half_height):
+            for entity_id in entity_ids:
+                entity_x, entity_y, _ = self._states[entity_id]
+                if abs(entity_x - x) <= half_width and abs(entity_y - y) <= half_height:
+                    visible.add(entity_id)
+        return visible
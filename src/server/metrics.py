@@ -0,0 +1,116 @@
+import asyncio
+import time
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from src.server.game_server import GameServer
+
+
+class MetricsEndpoint:
+    RATE_INTERVAL = 1.0  # in seconds, over which the per-second traffic rates are measured
+
+    def __init__(self, server: 'GameServer') -> None:
+        """
+        Postcondition:
+            - Endpoint reporting on server, not yet listening
+        """
+        self._server = server
+        self._rates: dict[str, float] = {'messages_in': 0.0, 'bytes_in': 0.0, 'messages_out': 0.0, 'bytes_out': 0.0}
+
+    async def start(self, address: int | str) -> None:
+        """
+        Postcondition:
+            - Serves the metrics over HTTP on the loopback port, or on the Unix socket path, given by address
+            - Traffic rates are sampled every RATE_INTERVAL seconds
+        """
+        if isinstance(address, int):
+            await asyncio.start_server(self._handle, '127.0.0.1', address)
+        else:
+            await asyncio.start_unix_server(self._handle, address)
+        asyncio.get_running_loop().create_task(self._sample_rates())
+        print(f'Metrics served on {address}')
+
+    async def _sample_rates(self) -> None:
+        traffic = self._server.traffic
+        previous_time = time.monotonic()
+        previous = {name: getattr(traffic, name) for name in self._rates}
+        while True:
+            await asyncio.sleep(self.RATE_INTERVAL)
+            now = time.monotonic()
+            current = {name: getattr(traffic, name) for name in self._rates}
+            self._rates = {name: (current[name] - previous[name]) / (now - previous_time) for name in self._rates}
+            previous_time, previous = now, current
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """
+        Postcondition:
+            - Answers any HTTP request with the metrics and closes the connection
+        """
+        try:
+            # Read the request head, its content is irrelevant
+            while (line := await asyncio.wait_for(reader.readline(), timeout=5)) not in (b'\r\n', b'\n', b''):
+                pass
+            body = self.render().encode()
+            writer.write(b'HTTP/1.0 200 OK\r\n'
+                         b'Content-Type: text/plain; version=0.0.4; charset=utf-8\r\n'
+                         + f'Content-Length: {len(body)}\r\n\r\n'.encode() + body)
+            await writer.drain()
+        except (TimeoutError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    def render(self) -> str:
+        """
+        Postcondition:
+            - Returns the current metrics in the Prometheus text exposition format
+        """
+        server = self._server
+        profiler = server.profiler
+        lines: list[str] = []
+
+        def metric(name: str, kind: str, help_text: str, samples: list[tuple[str, float]]) -> None:
+            lines.append(f'# HELP {name} {help_text}')
+            lines.append(f'# TYPE {name} {kind}')
+            lines.extend(f'{name}{labels} {value}' for labels, value in samples)
+
+        tick = profiler.histograms.get('tick')
+        summary = tick.summary() if tick is not None else {'p50': 0.0, 'p99': 0.0, 'max': 0.0}
+        metric('game_tick_duration_seconds', 'summary', 'Duration of a server tick over the recent window.', [
+            ('{quantile="0.5"}', summary['p50']),
+            ('{quantile="0.99"}', summary['p99']),
+            ('_sum', tick.total if tick is not None else 0.0),
+            ('_count', tick.count if tick is not None else 0),
+        ])
+        metric('game_tick_duration_max_seconds', 'gauge', 'Longest server tick so far.', [('', summary['max'])])
+        metric('game_tick_overruns_total', 'counter', 'Ticks that took longer than the tick budget.', [('', profiler.overruns)])
+        metric('game_ticks_skipped_total', 'counter', 'Ticks dropped after a stall longer than the catch-up limit.', [('', server.scheduler.skipped_steps)])
+
+        rooms = list(server.rooms.values())
+        metric('game_players', 'gauge', 'Connected players.', [('', sum(len(room.context.players) for room in rooms))])
+        metric('game_matches', 'gauge', 'Open rooms.', [('', len(rooms))])
+        metric('game_matches_playing', 'gauge', 'Rooms with a game in progress.', [('', sum(room.is_active() for room in rooms))])
+        metric('game_deer', 'gauge', 'Deer in all rooms.', [('', sum(room.context.deer_count() for room in rooms))])
+
+        traffic = server.traffic
+        for direction in ('in', 'out'):
+            metric(f'game_messages_{direction}_total', 'counter', f'Messages {"received" if direction == "in" else "sent"}.',
+                   [('', getattr(traffic, f'messages_{direction}'))])
+            metric(f'game_bytes_{direction}_total', 'counter', f'Bytes {"received" if direction == "in" else "sent"}.',
+                   [('', getattr(traffic, f'bytes_{direction}'))])
+            metric(f'game_messages_{direction}_per_second', 'gauge', f'Message rate over the last {self.RATE_INTERVAL:g} s.',
+                   [('', self._rates[f'messages_{direction}'])])
+            metric(f'game_bytes_{direction}_per_second', 'gauge', f'Byte rate over the last {self.RATE_INTERVAL:g} s.',
+                   [('', self._rates[f'bytes_{direction}'])])
+
+        metric('game_messages_dropped_total', 'counter', 'Messages dropped for exceeding the rate limit of their action.', [
+            (f'{{action="{action}"}}', count) for action, count in server.dropped_messages.items()
+        ])
+        metric('game_abusive_disconnects_total', 'counter', 'Channels disconnected for flooding.', [('', server.abusive_disconnects)])
+
+        # No label per channel or room: every client address and room id would become a series of its own
+        outbound = [channel.outbound_buffer_size for channel in server.channels]
+        metric('game_channel_outbound_bytes', 'gauge', 'Bytes queued for sending over all channels.', [('', sum(outbound))])
+        metric('game_channel_outbound_bytes_max', 'gauge', 'Bytes queued for sending on the most congested channel.',
+               [('', max(outbound, default=0))])
+        return '\n'.join(lines) + '\n'
@@ -0,0 +1,103 @@
+from typing import Sequence, TYPE_CHECKING
+
+from src.core.type import Position
+
+if TYPE_CHECKING:
+    from src.server.free_tiles import FreeTileSet
+    from src.server.game_server import GameObject
+
+
+_NO_OBJECTS: tuple['GameObject', ...] = ()
+
+
+class OccupancyGrid:
+    def __init__(self, width: int, height: int, free_tiles: 'FreeTileSet | None' = None) -> None:
+        """
+        Precondition:
+            - width > 0 and height > 0
+
+        Postcondition:
+            - Initializes an empty per-tile index of the game objects standing on each tile;
+              only occupied tiles take memory, so its size does not depend on the map size
+            - Tiles are taken from free_tiles while an object stands on them, and given back when the last one leaves
+        """
+        assert width > 0 and height > 0
+        self._width = width
+        self._height = height
+        self._cells: dict[int, list['GameObject']] = {}
+        self._free_tiles = free_tiles
+
+    def _index(self, position: Position) -> int:
+        return position.x * self._height + position.y
+
+    def _is_in_bounds(self, position: Position) -> bool:
+        return 0 <= position.x < self._width and 0 <= position.y < self._height
+
+    def add(self, game_object: 'GameObject', position: Position) -> None:
+        """
+        Precondition:
+            - position lies within the grid
+
+        Postcondition:
+            - game_object is registered on the tile at position
+        """
+        assert self._is_in_bounds(position)
+        index = self._index(position)
+        cell = self._cells.get(index)
+        if cell is None:
+            self._cells[index] = [game_object]
+            if self._free_tiles is not None:
+                self._free_tiles.discard(position.x, position.y)
+        else:
+            cell.append(game_object)
+
+    def remove(self, game_object: 'GameObject', position: Position) -> None:
+        """
+        Postcondition:
+            - game_object is no longer registered on the tile at position
+        """
+        if not self._is_in_bounds(position):
+            return
+        index = self._index(position)
+        cell = self._cells.get(index)
+        if cell is None or game_object not in cell:
+            return
+        cell.remove(game_object)
+        if not cell:
+            del self._cells[index]
+            if self._free_tiles is not None:
+                self._free_tiles.add(position.x, position.y)
+
+    def move(self, game_object: 'GameObject', old_position: Position, new_position: Position) -> None:
+        """
+        Postcondition:
+            - game_object is registered on new_position instead of old_position
+        """
+        self.remove(game_object, old_position)
+        self.add(game_object, new_position)
+
+    def get(self, position: Position) -> Sequence['GameObject']:
+        """
+        Postcondition:
+            - Returns the game objects on the tile at position (empty if out of bounds)
+        """
+        if not self._is_in_bounds(position):
+            return _NO_OBJECTS
+        return self._cells.get(self._index(position), _NO_OBJECTS)
+
+    def get_unchecked(self, x: int, y: int) -> Sequence['GameObject']:
+        """
+        Precondition:
+            - (x, y) lies within the grid (not checked)
+
+        Postcondition:
+            - Returns the game objects on the tile at (x, y)
+        """
+        return self._cells.get(x * self._height + y, _NO_OBJECTS)
+
+    def clear(self) -> None:
+        """
+        Postcondition:
+            - All tiles are empty; free_tiles is left as it is
+        """
+        self._cells.clear()
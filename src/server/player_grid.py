@@ -0,0 +1,74 @@
+from typing import Iterable, TYPE_CHECKING
+
+from src.core.type import Position
+from src.server.cell_grid import CellGrid
+
+if TYPE_CHECKING:
+    from src.server.game_server import Player
+
+
+class PlayerGrid:
+    def __init__(self, width: int, height: int) -> None:
+        """
+        Precondition:
+            - width > 0 and height > 0
+
+        Postcondition:
+            - Empty index of players bucketed by the coarse cell their position falls into, so distance
+              queries only visit the cells around the position instead of every player
+        """
+        assert width > 0 and height > 0
+        self._max_ring = max(width, height) // CellGrid.CELL_SIZE + 1  # ring of cells that covers the whole map
+        self._grid = CellGrid()
+        self._cell_of: dict['Player', tuple[int, int]] = {}
+
+    def __len__(self) -> int:
+        return len(self._cell_of)
+
+    def add(self, player: 'Player') -> None:
+        """
+        Postcondition:
+            - player is indexed at its current position
+        """
+        self.remove(player)
+        cell = self._cell_of[player] = CellGrid.cell(player.position.x, player.position.y)
+        self._grid.add(cell, player)
+
+    def remove(self, player: 'Player') -> None:
+        """
+        Postcondition:
+            - player is no longer indexed
+        """
+        cell = self._cell_of.pop(player, None)
+        if cell is not None:
+            self._grid.remove(cell, player)
+
+    def update(self, players: Iterable['Player']) -> None:
+        """
+        Precondition:
+            - players are the indexed players
+
+        Postcondition:
+            - Every player that moved to another cell since the last update is indexed at its current position
+        """
+        for player in players:
+            if self._cell_of.get(player) != CellGrid.cell(player.position.x, player.position.y):
+                self.add(player)
+
+    def nearest(self, position: Position, max_distance: int) -> 'Player | None':
+        """
+        Precondition:
+            - max_distance >= 0
+
+        Postcondition:
+            - Returns a player at the smallest Manhattan distance to position, if one is within max_distance
+        """
+        nearest_player, nearest_distance = None, max_distance + 1
+        for lower_bound, players in self._grid.rings(position.x, position.y, max_distance, self._max_ring):
+            if lower_bound >= nearest_distance:
+                break
+            for player in players:
+                distance = position.distance_to(player.position)
+                if distance < nearest_distance:
+                    nearest_player, nearest_distance = player, distance
+        return nearest_player
@@ -0,0 +1,133 @@
+import time
+from array import array
+
+
+class LatencyHistogram:
+    WINDOW = 4096  # most recent samples the percentiles are taken over
+
+    def __init__(self) -> None:
+        """
+        Postcondition:
+            - Histogram without samples
+        """
+        self._samples = array('d', bytes(8 * self.WINDOW))
+        self._count = 0
+        self._total = 0.0  # sum of all samples, in seconds
+        self._max = 0.0
+
+    def record(self, seconds: float) -> None:
+        """
+        Postcondition:
+            - The sample replaces the oldest one once the window is full
+        """
+        self._samples[self._count % self.WINDOW] = seconds
+        self._count += 1
+        self._total += seconds
+        if seconds > self._max:
+            self._max = seconds
+
+    @property
+    def count(self) -> int:
+        return self._count
+
+    @property
+    def total(self) -> float:
+        return self._total
+
+    def summary(self) -> dict[str, float]:
+        """
+        Postcondition:
+            - Returns p50 and p99 over the window and the maximum since the last reset, in seconds
+        """
+        samples = sorted(self._samples[:min(self._count, self.WINDOW)])
+        if not samples:
+            return {'p50': 0.0, 'p99': 0.0, 'max': 0.0}
+        return {
+            'p50': samples[(len(samples) - 1) // 2],
+            'p99': samples[(len(samples) - 1) * 99 // 100],
+            'max': self._max,
+        }
+
+
+class TickProfiler:
+    def __init__(self, budget: float, is_enabled: bool = False) -> None:
+        """
+        Precondition:
+            - budget > 0, the time in seconds one tick may take
+
+        Postcondition:
+            - Profiler without samples; while disabled, lap and tick_finished cost a single check
+        """
+        assert budget > 0
+        self.budget = budget
+        self.is_enabled = is_enabled
+        self.histograms: dict[str, LatencyHistogram] = {}
+        self.ticks = 0
+        self.overruns = 0
+
+    def now(self) -> float:
+        """
+        Postcondition:
+            - Returns the start time of a phase, 0.0 while disabled
+        """
+        return time.perf_counter() if self.is_enabled else 0.0
+
+    def lap(self, phase: str, start: float) -> float:
+        """
+        Precondition:
+            - start was returned by now() or lap()
+
+        Postcondition:
+            - Records the time since start for the phase and returns the start time of the next phase
+        """
+        if not self.is_enabled:
+            return 0.0
+        now = time.perf_counter()
+        if phase not in self.histograms:
+            self.histograms[phase] = LatencyHistogram()
+        self.histograms[phase].record(now - start)
+        return now
+
+    def tick_finished(self, start: float) -> None:
+        """
+        Precondition:
+            - start was returned by now() at the beginning of the tick
+
+        Postcondition:
+            - Records the tick duration and counts it as an overrun if it exceeded the budget
+        """
+        if not self.is_enabled:
+            return
+        self.ticks += 1
+        if time.perf_counter() - start > self.budget:
+            self.overruns += 1
+        self.lap('tick', start)
+
+    def toggle(self) -> None:
+        """
+        Postcondition:
+            - Profiling is switched on or off; samples are kept
+        """
+        self.is_enabled = not self.is_enabled
+
+    def reset(self) -> None:
+        """
+        Postcondition:
+            - All samples and counters are discarded
+        """
+        self.histograms.clear()
+        self.ticks = 0
+        self.overruns = 0
+
+    def report(self) -> str:
+        """
+        Postcondition:
+            - Returns p50/p99/max per phase in milliseconds and the overrun count
+        """
+        lines = [f'tick profile ({"on" if self.is_enabled else "off"}): {self.ticks} ticks, '
+                 f'{self.overruns} over the {self.budget * 1000:.0f} ms budget']
+        for phase, histogram in self.histograms.items():
+            summary = histogram.summary()
+            lines.append(f'  {phase:<14} n={histogram.count:<8} p50={summary["p50"] * 1000:8.3f} ms  '
+                         f'p99={summary["p99"] * 1000:8.3f} ms  max={summary["max"] * 1000:8.3f} ms')
+        return '\n'.join(lines)
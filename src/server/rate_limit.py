@@ -0,0 +1,70 @@
+import time
+from typing import Callable
+
+
+class TokenBucket:
+    __slots__ = ('_rate', '_burst', '_tokens', '_updated', '_clock')
+
+    def __init__(self, rate: float, burst: int, clock: Callable[[], float] = time.monotonic) -> None:
+        """
+        Precondition:
+            - rate > 0 and burst >= 1
+
+        Postcondition:
+            - Full bucket of burst tokens that refills with rate tokens per second
+        """
+        assert rate > 0 and burst >= 1
+        self._rate = rate
+        self._burst = burst
+        self._tokens = float(burst)
+        self._clock = clock
+        self._updated = clock()
+
+    def consume(self) -> bool:
+        """
+        Postcondition:
+            - Takes one token and returns True, or returns False if the bucket is empty
+        """
+        now = self._clock()
+        self._tokens = min(self._burst, self._tokens + (now - self._updated) * self._rate)
+        self._updated = now
+        if self._tokens < 1:
+            return False
+        self._tokens -= 1
+        return True
+
+
+class RateLimiter:
+    def __init__(self, limits: dict[str, tuple[float, int]], default_limit: tuple[float, int], strike_limit: tuple[float, int],
+                 clock: Callable[[], float] = time.monotonic) -> None:
+        """
+        Precondition:
+            - limits maps actions to (messages per second, burst), default_limit applies to all other actions
+            - strike_limit is the (rate, burst) of dropped messages a peer may cause before it counts as abusive
+
+        Postcondition:
+            - Limiter of one channel without any dropped messages
+        """
+        self._limits = limits
+        self._default_limit = default_limit
+        self._clock = clock
+        self._buckets: dict[str | None, TokenBucket] = {}
+        self._strikes = TokenBucket(*strike_limit, clock=clock)
+        self.dropped: dict[str | None, int] = {}
+        self.is_abusive = False
+
+    def allow(self, action: str | None) -> bool:
+        """
+        Postcondition:
+            - Returns True if a message with the action is within its rate, otherwise counts it as dropped
+            - The limiter turns abusive once dropped messages exhaust the strike bucket
+        """
+        bucket = self._buckets.get(action)
+        if bucket is None:
+            bucket = self._buckets[action] = TokenBucket(*self._limits.get(action, self._default_limit), clock=self._clock)
+        if bucket.consume():
+            return True
+        self.dropped[action] = self.dropped.get(action, 0) + 1
+        if not self._strikes.consume():
+            self.is_abusive = True
+        return False
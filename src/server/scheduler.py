@@ -0,0 +1,87 @@
+import time
+from typing import Callable
+
+
+class FixedTimestepScheduler:
+    def __init__(self, rate: int, max_catch_up_steps: int, clock: Callable[[], float] = time.monotonic) -> None:
+        """
+        Precondition:
+            - rate > 0 and max_catch_up_steps >= 1
+
+        Postcondition:
+            - Scheduler for rate steps per second on a monotonic clock, not yet running
+        """
+        assert rate > 0 and max_catch_up_steps >= 1
+        self._step = 1 / rate
+        self._max_catch_up_steps = max_catch_up_steps
+        self._clock = clock
+        self._next_step_time: float | None = None
+        self._skipped_steps = 0
+
+    @property
+    def step_ms(self) -> int:
+        return round(self._step * 1000)
+
+    @property
+    def is_running(self) -> bool:
+        return self._next_step_time is not None
+
+    @property
+    def next_step_time(self) -> float | None:
+        """
+        Postcondition:
+            - Returns the clock time the next step is due at, None while stopped
+        """
+        return self._next_step_time
+
+    @property
+    def skipped_steps(self) -> int:
+        """
+        Postcondition:
+            - Returns how many steps were dropped because more than max_catch_up_steps were due at once
+        """
+        return self._skipped_steps
+
+    def now(self) -> float:
+        return self._clock()
+
+    def start(self) -> None:
+        """
+        Postcondition:
+            - The first step is due immediately
+        """
+        self._next_step_time = self._clock()
+
+    def stop(self) -> None:
+        self._next_step_time = None
+
+    def due_steps(self) -> int:
+        """
+        Postcondition:
+            - Returns how many steps to run now and advances the schedule by them
+            - Steps stay on a fixed grid, so a late step does not delay the following ones;
+              after a stall of more than max_catch_up_steps steps the backlog is dropped
+              and the grid restarts from now
+        """
+        if self._next_step_time is None:
+            return 0
+        now = self._clock()
+        if now < self._next_step_time:
+            return 0
+
+        steps = int((now - self._next_step_time) / self._step) + 1
+        if steps > self._max_catch_up_steps:
+            self._skipped_steps += steps - self._max_catch_up_steps
+            self._next_step_time = now + self._step
+            return self._max_catch_up_steps
+        self._next_step_time += steps * self._step
+        return steps
+
+    def time_until_next_step(self) -> float | None:
+        """
+        Postcondition:
+            - Returns the seconds until the next step is due (0.0 if overdue), None while stopped
+        """
+        if self._next_step_time is None:
+            return None
+        return max(self._next_step_time - self._clock(), 0.0)
@@ -0,0 +1,114 @@
+from typing import Any
+
+EntityState = tuple[int, int, str]  # x, y, direction name
+View = tuple[set[int], set[int]]  # ids of the players and deer a client is sent
+
+KEYFRAME = -1  # baseline of a snapshot that replaces everything the client knows
+
+
+class Snapshot:
+    def __init__(self, sequence: int, players: dict[int, EntityState], deer: dict[int, EntityState],
+                 views: dict[int, View] | None = None) -> None:
+        """
+        Postcondition:
+            - Snapshot holds the state of every player and deer, keyed by stable entity id
+            - views holds what each player sees, keyed by its entity id; None if every player sees everything
+        """
+        self.sequence = sequence
+        self.players = players
+        self.deer = deer
+        self.views = views
+
+    def visible_states(self, viewer: int | None) -> tuple[dict[int, EntityState], dict[int, EntityState]] | None:
+        """
+        Postcondition:
+            - Returns the player and deer states the viewer sees, or None if the snapshot has no view of it
+        """
+        if self.views is None:
+            return self.players, self.deer
+        if viewer not in self.views:
+            return None
+        visible_players, visible_deer = self.views[viewer]
+        return (
+            {entity_id: self.players[entity_id] for entity_id in visible_players},
+            {entity_id: self.deer[entity_id] for entity_id in visible_deer},
+        )
+
+
+def _changed(current: dict[int, EntityState], baseline: dict[int, EntityState]) -> list[dict[str, Any]]:
+    return [
+        {'id': entity_id, 'x': state[0], 'y': state[1], 'direction': state[2]}
+        for entity_id, state in current.items() if baseline.get(entity_id) != state
+    ]
+
+
+def _removed(current: dict[int, EntityState], baseline: dict[int, EntityState]) -> list[int]:
+    return [entity_id for entity_id in baseline if entity_id not in current]
+
+
+class SnapshotHistory:
+    HISTORY_LENGTH = 32  # snapshots a client ack may refer to before it gets a keyframe
+    KEYFRAME_INTERVAL = 30  # ticks between keyframes sent to every client
+
+    def __init__(self) -> None:
+        """
+        Postcondition:
+            - History is empty, the next snapshot gets sequence number 0
+        """
+        self._snapshots: dict[int, Snapshot] = {}
+        self._next_sequence = 0
+        self._messages: dict[tuple[int, int | None], dict[str, Any]] = {}
+
+    def clear(self) -> None:
+        """
+        Postcondition:
+            - No earlier snapshot can serve as a baseline; sequence numbers keep increasing
+        """
+        self._snapshots.clear()
+        self._messages.clear()
+
+    def record(self, players: dict[int, EntityState], deer: dict[int, EntityState],
+               views: dict[int, View] | None = None) -> Snapshot:
+        """
+        Postcondition:
+            - Stores and returns the snapshot of the current tick, dropping the oldest one if needed
+        """
+        snapshot = Snapshot(self._next_sequence, players, deer, views)
+        self._next_sequence += 1
+        self._snapshots[snapshot.sequence] = snapshot
+        self._snapshots.pop(snapshot.sequence - self.HISTORY_LENGTH, None)
+        self._messages.clear()
+        return snapshot
+
+    def message(self, snapshot: Snapshot, acked_sequence: int | None, viewer: int | None = None) -> dict[str, Any]:
+        """
+        Precondition:
+            - snapshot is the latest recorded snapshot
+            - viewer is the entity id of the receiving player if the snapshot has views
+        Postcondition:
+            - Returns the state_update message body that brings a client from acked_sequence to snapshot,
+              a keyframe if the acked snapshot is unknown or a keyframe is due
+            - Entities that entered the viewer's view are sent in full, those that left it are listed as removed
+        """
+        baseline = self._snapshots.get(acked_sequence) if acked_sequence is not None else None
+        baseline_states = baseline.visible_states(viewer) if baseline is not None else None
+        if baseline_states is None or snapshot.sequence % self.KEYFRAME_INTERVAL == 0:
+            baseline_sequence = KEYFRAME
+            baseline_states = ({}, {})
+        else:
+            baseline_sequence = baseline.sequence
+
+        # Clients that see the same and acked the same snapshot get the same message, so build it once per tick
+        key = (baseline_sequence, viewer if snapshot.views is not None else None)
+        if key not in self._messages:
+            players, deer = snapshot.visible_states(viewer)
+            baseline_players, baseline_deer = baseline_states
+            self._messages[key] = {
+                'sequence': snapshot.sequence,
+                'baseline': baseline_sequence,
+                'players': _changed(players, baseline_players),
+                'deer': _changed(deer, baseline_deer),
+                'removed_players': _removed(players, baseline_players),
+                'removed_deer': _removed(deer, baseline_deer),
+            }
+        return self._messages[key]
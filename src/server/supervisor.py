@@ -0,0 +1,247 @@
+import asyncio
+import multiprocessing
+import socket
+import time
+from multiprocessing.connection import Connection, wait
+from multiprocessing.process import BaseProcess
+from multiprocessing.reduction import send_handle, recv_handle
+from typing import Any, TYPE_CHECKING
+
+from src.core.config import GameServerConfig
+
+if TYPE_CHECKING:
+    from src.server.game_server import GameServer
+
+
+def run_worker(config: GameServerConfig, connection: Connection) -> None:
+    """
+    Precondition:
+        - connection is the worker end of the supervisor pipe
+
+    Postcondition:
+        - Runs a GameServer that serves the connections handed over by the supervisor
+          and reports its load every second, until the supervisor goes away
+        - An error of the server is raised, so the worker exits with its traceback
+    """
+    # Imported here so the supervisor process itself never loads the game simulation
+    from src.server.game_server import GameServer
+
+    if asyncio.run(_serve_worker(GameServer(config), connection)):
+        print('Supervisor gone, shutting down worker')
+
+
+async def _serve_worker(server: 'GameServer', connection: Connection) -> bool:
+    """
+    Postcondition:
+        - Returns True once the supervisor closed the pipe, False if the server stopped by itself
+        - Raises the error the server or the load report failed with
+    """
+    loop = asyncio.get_running_loop()
+    supervisor_gone = loop.create_future()
+
+    def on_supervisor_gone() -> None:
+        loop.remove_reader(connection.fileno())
+        if not supervisor_gone.done():
+            supervisor_gone.set_result(None)
+
+    def receive_connections() -> None:
+        try:
+            while connection.poll():
+                address = connection.recv()
+                try:
+                    client = socket.socket(fileno=recv_handle(connection))
+                except OSError as error:
+                    print(f'Could not receive connection {address}: {error!r}')
+                    continue
+                server.accept_connection(client, address)
+        except (EOFError, ConnectionError):
+            on_supervisor_gone()
+
+    async def report_load() -> None:
+        try:
+            while True:
+                connection.send(server.load())
+                await asyncio.sleep(1)
+        except ConnectionError:
+            on_supervisor_gone()
+
+    loop.add_reader(connection.fileno(), receive_connections)
+    tasks = [asyncio.create_task(server.serve(listen=False)), asyncio.create_task(report_load())]
+    done, _ = await asyncio.wait([supervisor_gone, *tasks], return_when=asyncio.FIRST_COMPLETED)
+    [task.cancel() for task in tasks if task not in done]
+    [task.result() for task in tasks if task in done and not task.cancelled()]  # raises the error it failed with
+    return supervisor_gone.done()
+
+
+class Worker:
+    def __init__(self, worker_id: int, process: BaseProcess, connection: Connection, failures: int = 0) -> None:
+        """
+        Postcondition:
+            - Worker holds the process and its pipe, with no load reported yet
+        """
+        self.worker_id = worker_id
+        self.process = process
+        self.connection = connection
+        self.load: dict[str, int] = {'rooms': 0, 'players': 0, 'open_slots': 0}
+        self.pending = 0  # connections handed over since the last load report
+        self.failures = failures  # deaths in a row of the workers with this id before this one
+        self.started_at = time.monotonic()
+
+    def __repr__(self) -> str:
+        return f'Worker({self.worker_id}, pid={self.process.pid}, {self.load})'
+
+
+class GameServerSupervisor:
+    def __init__(self, config: GameServerConfig) -> None:
+        """
+        Precondition:
+            - config.worker_count > 0
+
+        Postcondition:
+            - Listens on config.host and has started config.worker_count worker processes
+        """
+        assert config.worker_count > 0
+        self.config = config
+        self._context = multiprocessing.get_context('spawn')
+
+        self._listener = socket.create_server(config.host, backlog=128)
+        self.workers: list[Worker] = [self._start_worker(worker_id) for worker_id in range(config.worker_count)]
+        self._restarts: dict[int, tuple[float, int]] = {}  # dead worker id -> restart time and deaths in a row
+        print(f'Supervisor Launched with {len(self.workers)} workers')
+
+    def _start_worker(self, worker_id: int, failures: int = 0) -> Worker:
+        """
+        Postcondition:
+            - Returns a running worker process connected through a duplex pipe
+        """
+        supervisor_end, worker_end = self._context.Pipe(duplex=True)
+        input_log_path = f'{self.config.input_log_path}.{worker_id}' if self.config.input_log_path is not None else None
+        worker_config = GameServerConfig(host=("127.0.0.1", 0), metrics_address=self._worker_metrics_address(worker_id),
+                                         input_log_path=input_log_path, grid_size=self.config.grid_size)
+        process = self._context.Process(target=run_worker, args=(worker_config, worker_end), name=f'game-worker-{worker_id}', daemon=True)
+        process.start()
+        worker_end.close()
+        return Worker(worker_id, process, supervisor_end, failures)
+
+    def _worker_metrics_address(self, worker_id: int) -> int | str | None:
+        """
+        Postcondition:
+            - Returns where the worker serves its metrics: the ports after config.metrics_address,
+              or the socket path suffixed with the worker id
+        """
+        address = self.config.metrics_address
+        if address is None:
+            return None
+        if isinstance(address, int):
+            return address + 1 + worker_id
+        return f'{address}.{worker_id}'
+
+    def _choose_worker(self) -> Worker:
+        """
+        Postcondition:
+            - Returns a worker with a free slot in a joinable room if there is one, so rooms fill up,
+              otherwise the worker with the fewest players
+        """
+        with_open_slots = [worker for worker in self.workers if worker.load['open_slots'] > worker.pending]
+        candidates = with_open_slots if with_open_slots else self.workers
+        return min(candidates, key=lambda worker: worker.load['players'] + worker.pending)
+
+    def _hand_over(self, client: socket.socket, address: Any) -> None:
+        """
+        Postcondition:
+            - client is served by one of the live workers and closed in the supervisor; a worker
+              that cannot take it is restarted and the next one tried, without any the client is dropped
+        """
+        try:
+            while self.workers:
+                worker = self._choose_worker()
+                try:
+                    worker.connection.send(address)
+                    send_handle(worker.connection, client.fileno(), worker.process.pid)
+                    worker.pending += 1
+                    return
+                except OSError as error:
+                    self._worker_died(worker, error)
+            print(f'No worker alive, dropping connection {address}')
+        finally:
+            client.close()
+
+    def _receive_load(self, worker: Worker) -> None:
+        """
+        Postcondition:
+            - worker.load holds its latest report, or the worker is restarted if it died
+        """
+        try:
+            worker.load = worker.connection.recv()
+            worker.pending = 0
+        except (EOFError, OSError) as error:
+            self._worker_died(worker, error)
+
+    def _worker_died(self, worker: Worker, error: BaseException) -> None:
+        """
+        Postcondition:
+            - worker no longer gets connections and its process is stopped
+            - A new worker with its id is started after GameServerConfig.WORKER_RESTART_BACKOFF, doubling with
+              every death in a row; a worker that ran longer than the largest backoff resets the count
+        """
+        initial_backoff, max_backoff = GameServerConfig.WORKER_RESTART_BACKOFF
+        failures = worker.failures if time.monotonic() - worker.started_at <= max_backoff else 0
+        backoff = min(initial_backoff * 2 ** failures, max_backoff)
+        print(f'Worker {worker.worker_id} died ({error!r}), restarting in {backoff:.1f}s')
+
+        self.workers.remove(worker)
+        worker.connection.close()
+        if worker.process.is_alive():
+            worker.process.terminate()
+        worker.process.join(timeout=1)
+        self._restarts[worker.worker_id] = (time.monotonic() + backoff, failures + 1)
+
+    def _restart_workers(self) -> None:
+        """
+        Postcondition:
+            - Every dead worker whose backoff has passed runs again
+        """
+        now = time.monotonic()
+        for worker_id, (restart_time, failures) in list(self._restarts.items()):
+            if restart_time <= now:
+                del self._restarts[worker_id]
+                self.workers.append(self._start_worker(worker_id, failures))
+
+    def report_load(self) -> None:
+        """
+        Postcondition:
+            - Prints rooms, players and open slots of every live worker, and which workers are restarting
+        """
+        for worker_id in sorted(self._restarts):
+            print(f'worker {worker_id}: restarting')
+        for worker in self.workers:
+            print(f'worker {worker.worker_id} (pid {worker.process.pid}): '
+                  f'{worker.load["rooms"]} rooms, {worker.load["players"]} players, {worker.load["open_slots"]} open slots')
+
+    def run(self) -> None:
+        """
+        Postcondition:
+            - Accepts connections, hands each over to a worker and keeps track of the worker load
+        """
+        next_report_time = time.time() + GameServerConfig.LOAD_REPORT_INTERVAL
+        while True:
+            self._restart_workers()
+            timeout = max(next_report_time - time.time(), 0.0)
+            if self._restarts:
+                next_restart_time = min(restart_time for restart_time, _ in self._restarts.values())
+                timeout = min(timeout, max(next_restart_time - time.monotonic(), 0.0))
+            ready = wait([self._listener] + [worker.connection for worker in self.workers], timeout=timeout)
+
+            for source in ready:
+                if source is self._listener:
+                    client, address = self._listener.accept()
+                    print(f'connection {address}')
+                    self._hand_over(client, address)
+                else:
+                    worker = next((worker for worker in self.workers if worker.connection is source), None)
+                    if worker is not None:  # not restarted by a failed hand-over in this round
+                        self._receive_load(worker)
+
+            if time.time() >= next_report_time:
+                self.report_load()
+                next_report_time = time.time() + GameServerConfig.LOAD_REPORT_INTERVAL
@@ -0,0 +1,56 @@
+import random
+
+from src.core.codec import decode_frame, encode_frame
+from src.core.type import MOVE_DIRECTIONS
+
+
+def _random_entities(rng: random.Random, count: int) -> list[dict]:
+    return [
+        {'id': rng.randrange(2 ** 32), 'x': rng.randrange(2 ** 16), 'y': rng.randrange(2 ** 16), 'direction': rng.choice(MOVE_DIRECTIONS).name}
+        for _ in range(count)
+    ]
+
+
+def _messages(rng: random.Random) -> list[dict]:
+    return [
+        {'action': 'state_update', 'message': {
+            'sequence': rng.randrange(2 ** 32),
+            'baseline': rng.choice([-1, rng.randrange(2 ** 31)]),
+            'players': _random_entities(rng, rng.randrange(5)),
+            'deer': _random_entities(rng, rng.randrange(50)),
+            'removed_players': [rng.randrange(2 ** 32) for _ in range(rng.randrange(3))],
+            'removed_deer': [rng.randrange(2 ** 32) for _ in range(rng.randrange(10))],
+            'time_left': 12.5,
+        }},
+        {'action': 'move', 'move_direction': rng.choice(MOVE_DIRECTIONS).name},
+        {'action': 'take_picture'},
+        {'action': 'score', 'score': rng.randrange(-1, 100)},
+        {'action': 'game_started', 'level': rng.randrange(1, 21), 'width': rng.randrange(40, 2 ** 16), 'height': rng.randrange(30, 2 ** 16),
+         'entity_id': rng.randrange(4)},
+        {'action': 'ack', 'sequence': rng.randrange(2 ** 32)},
+        {'action': 'select_level', 'level': 3},  # no compact layout, rencoded
+    ]
+
+
+def test_every_message_round_trips():
+    rng = random.Random(0)
+    for _ in range(50):
+        for message in _messages(rng):
+            frame = bytearray(encode_frame(message))
+            assert decode_frame(frame, 0) == (message, len(frame))
+
+
+def test_frames_decode_one_after_another_from_a_stream():
+    messages = _messages(random.Random(1))
+    stream = bytearray(b''.join(encode_frame(message) for message in messages))
+    decoded, offset = [], 0
+    while offset < len(stream):
+        message, offset = decode_frame(stream, offset)
+        decoded.append(message)
+    assert decoded == messages
+
+
+def test_incomplete_frame_is_not_decoded():
+    frame = encode_frame(_messages(random.Random(2))[0])
+    for end in range(len(frame)):
+        assert decode_frame(bytearray(frame[:end]), 0) is None
@@ -0,0 +1,42 @@
+import random
+from collections import deque
+
+import numpy as np
+
+from src.core.type import Position
+from src.server.flow_field import FlowField
+from src.server.game_map import GameMap
+
+
+def _breadth_first_search(game_map: GameMap, sources: list[Position], max_distance: int) -> dict[tuple[int, int], int]:
+    distances = {(source.x, source.y): 0 for source in sources}
+    queue = deque(distances)
+    while queue:
+        x, y = queue.popleft()
+        if distances[(x, y)] == max_distance:
+            continue
+        for neighbour in ((x - 1, y), (x + 1, y), (x, y - 1), (x, y + 1)):
+            if neighbour not in distances and game_map.is_walkable(Position.at(*neighbour)):
+                distances[neighbour] = distances[(x, y)] + 1
+                queue.append(neighbour)
+    return distances
+
+
+def test_distances_match_breadth_first_search():
+    rng = random.Random(0)
+    for level, size in ((1, (40, 30)), (9, (90, 70)), (20, (200, 130))):
+        game_map = GameMap(level, *size)
+        walkable = [(x, y) for y in range(game_map.height) for x in range(game_map.width) if game_map.walkable.get(x, y)]
+        ys, xs = np.mgrid[0:game_map.height, 0:game_map.width]
+        for max_distance in (5, 32, 200):
+            flow_field = FlowField(game_map, max_distance)
+            for _ in range(3):
+                sources = [Position.at(*rng.choice(walkable)) for _ in range(rng.randrange(7))]
+                flow_field.update(sources)
+                expected = _breadth_first_search(game_map, sources, max_distance)
+                distances = flow_field.distances_at(xs, ys)
+                for y in range(game_map.height):
+                    for x in range(game_map.width):
+                        assert distances[y, x] == expected.get((x, y), flow_field.out_of_reach)
+                for x, y in rng.sample(walkable, 50):
+                    assert flow_field.distance(Position.at(x, y)) == distances[y, x]
@@ -0,0 +1,72 @@
+import random
+
+import numpy as np
+
+from src.core.enum import Tile
+from src.core.type import Position
+from src.server.free_tiles import FreeTileSet
+from src.server.game_map import GameMap
+
+
+def _empty_tiles(game_map: GameMap) -> set[tuple[int, int]]:
+    return {(x, y) for y in range(game_map.height) for x in range(game_map.width) if game_map.get_tile_unchecked(x, y) == Tile.EMPTY}
+
+
+def _assert_matches(free_tiles: FreeTileSet, expected: set[tuple[int, int]], game_map: GameMap) -> None:
+    assert len(free_tiles) == len(expected)
+    assert {(x, y) for y in range(game_map.height) for x in range(game_map.width) if Position.at(x, y) in free_tiles} == expected
+
+
+def test_operations_match_a_set_of_tiles():
+    rng = random.Random(0)
+    for level, size in ((1, (40, 30)), (7, (150, 90)), (20, (130, 200))):
+        game_map = GameMap(level, *size)
+        free_tiles = FreeTileSet(game_map)
+        empty = _empty_tiles(game_map)
+        expected = set(empty)
+        _assert_matches(free_tiles, expected, game_map)
+        for _ in range(20):
+            for _ in range(rng.randrange(100)):
+                x, y = rng.randrange(game_map.width), rng.randrange(game_map.height)
+                if rng.random() < 0.5:
+                    free_tiles.discard(x, y)
+                    expected.discard((x, y))
+                else:
+                    free_tiles.add(x, y)
+                    if (x, y) in empty:
+                        expected.add((x, y))
+            tiles = rng.sample(range(game_map.width * game_map.height), rng.randrange(200))
+            indices = np.array(tiles, dtype=np.int64)
+            positions = {(index % game_map.width, index // game_map.width) for index in tiles}
+            if rng.random() < 0.5:
+                free_tiles.discard_many(indices)
+                expected -= positions
+            else:
+                free_tiles.add_many(indices)
+                expected |= positions & empty
+            for _ in range(rng.randrange(10)):
+                position = free_tiles.take(rng)
+                assert (position.x, position.y) in expected
+                expected.remove((position.x, position.y))
+            _assert_matches(free_tiles, expected, game_map)
+
+
+def test_sample_reaches_every_free_tile():
+    game_map = GameMap(3, 100, 80)
+    free_tiles = FreeTileSet(game_map)
+    rng = random.Random(1)
+    kept = set(rng.sample(sorted(_empty_tiles(game_map)), 20))
+    for x, y in _empty_tiles(game_map) - kept:
+        free_tiles.discard(x, y)
+    samples = {(position.x, position.y) for position in (free_tiles.sample(rng) for _ in range(2000))}
+    assert samples == kept
+
+
+def test_reset_frees_the_tiles_of_the_new_map():
+    free_tiles = FreeTileSet(GameMap(2, 70, 70))
+    rng = random.Random(2)
+    for _ in range(500):
+        free_tiles.take(rng)
+    game_map = GameMap(5, 90, 60)
+    free_tiles.reset(game_map)
+    _assert_matches(free_tiles, _empty_tiles(game_map), game_map)
@@ -0,0 +1,56 @@
+import random
+
+from src.core.enum import MoveDirection
+from src.server.game_server import GameRoom, GameServerContext, GameServerState
+from src.server.headless import MatchReplay, VirtualPlayer
+from src.server.input_log import InputLogWriter, read_input_log
+
+
+def _record(path: str) -> list[str]:
+    """
+    Postcondition:
+        - Records a match of random inputs with a departure per deer mode to the input log at path
+        - Returns the digests the matches finished with
+    """
+    rng = random.Random(0)
+    log = InputLogWriter(path)
+    digests = []
+    for room_id, vectorized_deer in ((0, False), (1, True)):
+        context = GameServerContext(deer_count=30, vectorized_deer=vectorized_deer)
+        room = GameRoom(room_id, context=context, input_log=log)
+        players = [VirtualPlayer(False) for _ in range(3)]
+        [room.add_player(player) for player in players]
+        room.start_game(rng.randint(1, 20))
+        while room.state == GameServerState.PLAYING:
+            for player in list(context.players):
+                for _ in range(rng.randint(0, 3)):
+                    if rng.random() < 0.7:
+                        player.Network_move({'move_direction': rng.choice(list(MoveDirection)).name})
+                    if rng.random() < 0.1:
+                        player.Network_take_picture({})
+            if room.tick_number == 100:
+                room.remove_player(players[1])
+            room.tick(100)
+        digests.append(context.state_digest())
+    log.close()
+    return digests
+
+
+def test_replay_reproduces_the_recorded_matches(tmp_path):
+    path = str(tmp_path / 'inputs.log')
+    digests = _record(path)
+    matches = read_input_log(path)
+    assert [match.vectorized_deer for match in matches] == [False, True]
+    for match, digest in zip(matches, digests):
+        assert len(match.entity_ids) == 3 and 100 in match.departures
+        replay = MatchReplay(match)
+        assert replay.run()
+        assert replay.context.state_digest() == digest
+
+
+def test_replay_without_the_inputs_diverges(tmp_path):
+    path = str(tmp_path / 'inputs.log')
+    _record(path)
+    match = read_input_log(path)[0]
+    match.inputs = {tick: inputs for tick, inputs in match.inputs.items() if tick < match.length() // 2}
+    assert MatchReplay(match).run() is False
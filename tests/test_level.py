@@ -0,0 +1,28 @@
+from src.core.chunked_grid import CHUNK_MASK, CHUNK_SHIFT
+from src.core.level import MAX_CLEAR_RUN
+from src.core.type import MOVE_DIRECTIONS, UNIT_DIRECTIONS, Position
+from src.server.game_map import GameMap
+
+
+def _walk_clear_run(game_map: GameMap, x: int, y: int, dx: int, dy: int) -> int:
+    run = 0
+    x, y = x + dx, y + dy
+    while run < MAX_CLEAR_RUN and 0 <= x < game_map.width and 0 <= y < game_map.height and not game_map.opaque.get(x, y):
+        run += 1
+        x, y = x + dx, y + dy
+    return run
+
+
+def test_clear_runs_match_walking_the_ray():
+    for level, size in ((1, (40, 30)), (4, (100, 70)), (20, (130, 150))):
+        game_map = GameMap(level, *size)
+        for move_direction in MOVE_DIRECTIONS:
+            step = UNIT_DIRECTIONS[move_direction]
+            for chunk_y in range((game_map.height + CHUNK_MASK) >> CHUNK_SHIFT):
+                for chunk_x in range((game_map.width + CHUNK_MASK) >> CHUNK_SHIFT):
+                    runs = game_map.clear_run_chunk(chunk_x, chunk_y, move_direction)
+                    for y in range(chunk_y << CHUNK_SHIFT, min((chunk_y + 1) << CHUNK_SHIFT, game_map.height)):
+                        for x in range(chunk_x << CHUNK_SHIFT, min((chunk_x + 1) << CHUNK_SHIFT, game_map.width)):
+                            expected = _walk_clear_run(game_map, x, y, step.x, step.y)
+                            assert runs[(y & CHUNK_MASK) << CHUNK_SHIFT | (x & CHUNK_MASK)] == expected
+                            assert game_map.clear_run(Position.at(x, y), move_direction) == expected
@@ -0,0 +1,46 @@
+from src.server.rate_limit import RateLimiter, TokenBucket
+
+
+class _Clock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_bucket_allows_a_burst_then_refills_at_its_rate():
+    clock = _Clock()
+    bucket = TokenBucket(10, 3, clock)
+    assert [bucket.consume() for _ in range(4)] == [True, True, True, False]
+    clock.now += 0.05
+    assert not bucket.consume()
+    clock.now += 0.05
+    assert bucket.consume()
+    assert not bucket.consume()
+    clock.now += 60
+    assert [bucket.consume() for _ in range(4)] == [True, True, True, False]
+
+
+def test_limiter_counts_what_a_bucket_per_action_drops():
+    clock = _Clock()
+    limiter = RateLimiter({'move': (20, 5)}, (1, 1), (100, 1000), clock)
+    for tick in range(100):
+        clock.now = tick / 100
+        for _ in range(3):
+            limiter.allow('move')
+        limiter.allow('take_picture')
+    # In one second 'move' gets its burst and 20 more, the default action its burst of 1 and 1 more
+    assert limiter.dropped == {'move': 300 - 5 - 19, 'take_picture': 100 - 1 - 0}
+    assert not limiter.is_abusive
+
+
+def test_limiter_turns_abusive_once_drops_exhaust_the_strikes():
+    clock = _Clock()
+    limiter = RateLimiter({}, (1, 1), (1, 10), clock)
+    assert limiter.allow(None)
+    for _ in range(10):
+        assert not limiter.allow(None)
+    assert not limiter.is_abusive
+    assert not limiter.allow(None)
+    assert limiter.is_abusive
@@ -0,0 +1,63 @@
+import random
+
+from src.server.scheduler import FixedTimestepScheduler
+
+
+class _Clock:
+    def __init__(self) -> None:
+        self.now = 100.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_steps_stay_on_a_fixed_grid():
+    clock = _Clock()
+    scheduler = FixedTimestepScheduler(10, 5, clock)
+    assert scheduler.due_steps() == 0 and scheduler.time_until_next_step() is None
+    scheduler.start()
+    assert scheduler.due_steps() == 1
+    clock.now += 0.05
+    assert scheduler.due_steps() == 0
+    assert abs(scheduler.time_until_next_step() - 0.05) < 1e-9
+    # A late step does not delay the following ones
+    clock.now += 0.08
+    assert scheduler.due_steps() == 1
+    clock.now += 0.07
+    assert scheduler.due_steps() == 1
+    assert scheduler.skipped_steps == 0
+
+
+def test_catch_up_matches_walking_the_step_grid():
+    rng = random.Random(0)
+    clock = _Clock()
+    scheduler = FixedTimestepScheduler(8, 5, clock)  # steps and elapsed times are exact binary fractions
+    scheduler.start()
+    next_step_time, skipped_steps = clock.now, 0
+    for _ in range(1000):
+        clock.now += rng.choice([0, 1, 3, 8, 16, 40, 100]) / 64
+        due = 0
+        while next_step_time <= clock.now:
+            due += 1
+            next_step_time += 1 / 8
+        if due > 5:
+            skipped_steps += due - 5
+            due, next_step_time = 5, clock.now + 1 / 8
+        assert scheduler.due_steps() == due
+        assert scheduler.next_step_time == next_step_time
+        assert scheduler.skipped_steps == skipped_steps
+
+
+def test_drops_the_backlog_after_a_stall():
+    clock = _Clock()
+    scheduler = FixedTimestepScheduler(8, 5, clock)
+    scheduler.start()
+    scheduler.due_steps()
+    clock.now += 2.0
+    assert scheduler.due_steps() == 5
+    assert scheduler.skipped_steps == 16 - 5
+    assert scheduler.time_until_next_step() == 0.125
+    clock.now += 0.125
+    assert scheduler.due_steps() == 1
+    scheduler.stop()
+    assert not scheduler.is_running and scheduler.due_steps() == 0
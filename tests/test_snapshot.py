@@ -0,0 +1,87 @@
+import random
+
+from src.core.type import MOVE_DIRECTIONS
+from src.server.snapshot import KEYFRAME, EntityState, SnapshotHistory, View
+
+
+class _Client:
+    """
+    Applies state_update messages like the game client: deltas on top of the snapshots it acked.
+    """
+
+    def __init__(self) -> None:
+        self.snapshots: dict[int, tuple[dict[int, EntityState], dict[int, EntityState]]] = {}
+        self.acked: int | None = None
+
+    def apply(self, message: dict) -> tuple[dict[int, EntityState], dict[int, EntityState]]:
+        if message['baseline'] == KEYFRAME:
+            players, deer = {}, {}
+        else:
+            baseline_players, baseline_deer = self.snapshots[message['baseline']]
+            players, deer = dict(baseline_players), dict(baseline_deer)
+        players.update((state['id'], (state['x'], state['y'], state['direction'])) for state in message['players'])
+        deer.update((state['id'], (state['x'], state['y'], state['direction'])) for state in message['deer'])
+        [players.pop(entity_id) for entity_id in message['removed_players']]
+        [deer.pop(entity_id) for entity_id in message['removed_deer']]
+        self.snapshots[message['sequence']] = (players, deer)
+        return players, deer
+
+
+def _step(rng: random.Random, states: dict[int, EntityState], next_id: int, size: int) -> int:
+    for entity_id in list(states):
+        if rng.random() < 0.05:
+            del states[entity_id]
+        elif rng.random() < 0.5:
+            x, y, _ = states[entity_id]
+            states[entity_id] = (min(max(x + rng.choice([-1, 0, 1]), 0), size), min(max(y + rng.choice([-1, 0, 1]), 0), size),
+                                 rng.choice(MOVE_DIRECTIONS).name)
+    while rng.random() < 0.3:
+        states[next_id] = (rng.randrange(size), rng.randrange(size), rng.choice(MOVE_DIRECTIONS).name)
+        next_id += 1
+    return next_id
+
+
+def _views(players: dict[int, EntityState], deer: dict[int, EntityState], half: int) -> dict[int, View]:
+    def near(x: int, y: int, states: dict[int, EntityState]) -> set[int]:
+        return {entity_id for entity_id, (other_x, other_y, _) in states.items() if abs(other_x - x) <= half and abs(other_y - y) <= half}
+    return {player_id: (near(x, y, players), near(x, y, deer)) for player_id, (x, y, _) in players.items()}
+
+
+def _reconstructs_every_tick(with_views: bool) -> None:
+    rng = random.Random(with_views)
+    history = SnapshotHistory()
+    players: dict[int, EntityState] = {}
+    deer: dict[int, EntityState] = {}
+    next_player, next_deer = 0, 1000
+    clients: dict[int, _Client] = {}
+    for _ in range(300):
+        next_player = _step(rng, players, next_player, 30)
+        next_deer = _step(rng, deer, next_deer, 30)
+        views = _views(players, deer, 6) if with_views else None
+        snapshot = history.record(dict(players), dict(deer), views)
+        clients = {player_id: clients.get(player_id, _Client()) for player_id in players}
+        for player_id, client in clients.items():
+            message = history.message(snapshot, client.acked, player_id if with_views else None)
+            assert message['sequence'] == snapshot.sequence
+            assert client.apply(message) == snapshot.visible_states(player_id)
+            # Acks get lost or arrive late
+            if rng.random() < 0.7:
+                client.acked = rng.choice(list(client.snapshots)[-4:])
+
+
+def test_deltas_rebuild_the_full_state_from_any_acked_baseline():
+    _reconstructs_every_tick(with_views=False)
+
+
+def test_deltas_rebuild_each_players_view():
+    _reconstructs_every_tick(with_views=True)
+
+
+def test_unknown_or_stale_ack_gets_a_keyframe():
+    history = SnapshotHistory()
+    snapshots = [history.record({0: (0, 0, 'UP')}, {}) for _ in range(SnapshotHistory.HISTORY_LENGTH + 2)]
+    assert history.message(snapshots[-1], None)['baseline'] == KEYFRAME
+    assert history.message(snapshots[-1], snapshots[0].sequence)['baseline'] == KEYFRAME
+    assert history.message(snapshots[-1], snapshots[-2].sequence)['baseline'] == snapshots[-2].sequence
+    history.clear()
+    assert history.message(history.record({}, {}), snapshots[-1].sequence)['baseline'] == KEYFRAME